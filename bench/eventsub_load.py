@@ -0,0 +1,235 @@
+"""
+    Load test for EventSub webhook ingestion. Replays signed stream.online /
+    stream.offline notifications at a fixed rate and reports ack latency,
+    time-to-notification and dropped events for each rate step.
+
+    Usage:
+        python -m bench.eventsub_load --rates 25,50,100,200 --duration 10
+        python -m bench.eventsub_load --url https://bot.example/callback --secret ... --rates 10
+
+    Without --url the bot's own webhook receiver is started locally on top of the
+    bench harness (fake Helix, stubbed Discord sending, in-memory DB), so
+    end-to-end time-to-notification can be measured. --relay runs it split the way
+    ingest.py/worker.py do: the HTTP side only stores events, and a relay feeds them
+    to a second receiver that dispatches. Against a remote --url only
+    the HTTP side (ack latency, non-2xx responses, timeouts) is measured. Use ids
+    of broadcasters nobody is notified for, or the remote bot will really ping.
+
+    Twitch expects a 2xx within a few seconds and disables subscriptions whose
+    callback keeps failing that, so the interesting number is the highest rate
+    whose ack p99 stays well below that.
+"""
+import os
+import sys
+
+os.environ.setdefault("TWITCH_WEBHOOK_SECRET", "bench-secret")
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from bench import fakes, harness
+from bench.stats import Timings, percentile
+
+def sign(secret, message_id, timestamp, body):
+    digest = hmac.new(secret.encode("utf-8"), (message_id + timestamp).encode("utf-8") + body, hashlib.sha256)
+    return "sha256=" + digest.hexdigest()
+
+def build_request(secret, sub_type, user):
+    body = json.dumps(fakes.eventsub_notification(sub_type, user)).encode("utf-8")
+    message_id = str(uuid.uuid4())
+    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    headers = {
+        "Content-Type": "application/json",
+        "Twitch-Eventsub-Message-Id": message_id,
+        "Twitch-Eventsub-Message-Timestamp": timestamp,
+        "Twitch-Eventsub-Message-Signature": sign(secret, message_id, timestamp, body),
+        "Twitch-Eventsub-Message-Type": "notification",
+        "Twitch-Eventsub-Subscription-Type": sub_type,
+        "Twitch-Eventsub-Subscription-Version": "1",
+    }
+    return body, headers
+
+class LocalTarget:
+    """The bot's webhook receiver, running in-process on top of the bench harness."""
+    def __init__(self, args):
+        self.args = args
+        self.ctx = None
+        self.eventsub = None
+        self.ingest = None
+        self.relay = None
+        self.followers = {}
+
+    async def start(self):
+        from helpers.helpers import create_eventsub, handle_stream_online, handle_stream_offline
+        from helpers.eventsub import EventSubReceiver
+        from helpers import eventrelay
+        import helpers.constants as constants
+        self.ctx = await harness.build_context(self.args)
+        port = self.args.port
+        if self.args.relay:
+            self.ingest = EventSubReceiver(None, "", constants.TWITCH_WEBHOOK_SECRET, port, sink=eventrelay.store)
+            await self.ingest.start()
+            eventsub = EventSubReceiver(self.ctx.twitch, "http://127.0.0.1", constants.TWITCH_WEBHOOK_SECRET, port + 1)
+            await eventsub.start(callback=False)
+            eventsub.start_consumer()
+            self.relay = eventrelay.EventRelay(eventsub, constants.get_live_status())
+            await self.relay.start()
+        else:
+            eventsub = await create_eventsub(self.ctx.twitch, port)
+            eventsub.start_consumer()
+        constants.bot_state.eventsub = eventsub
+        self.eventsub = eventsub
+
+        for user in self.ctx.dataset.broadcasters:
+            await eventsub.listen_stream_online(user["id"], handle_stream_online)
+            await eventsub.listen_stream_offline(user["id"], handle_stream_offline)
+            self.followers[user["login"]] = len(self.ctx.dataset.followers(user["id"]))
+        self.url = f"http://127.0.0.1:{port}/callback"
+        self.secret = eventsub.secret
+        self.broadcasters = self.ctx.dataset.broadcasters
+
+    def messages(self):
+        return self.ctx.discord.messages
+
+    async def stop(self):
+        if self.relay is not None:
+            await self.relay.stop()
+            await self.ingest.stop()
+        await self.eventsub.stop()
+        await harness.stop_context(self.ctx)
+
+class RemoteTarget:
+    def __init__(self, args):
+        self.url = args.url
+        self.secret = args.secret
+        self.broadcasters = [{"id": b, "login": b, "display_name": b} for b in args.broadcaster_ids.split(",")]
+        self.followers = {}
+
+    async def start(self):
+        pass
+
+    def messages(self):
+        return None
+
+    async def stop(self):
+        pass
+
+async def run_step(target, session, rate, duration, settle_timeout):
+    interval = 1 / rate
+    total = int(rate * duration)
+    acks = Timings()
+    statuses = {}
+    errors = 0
+    online_sent = []  # (sent_at, login)
+    last_sent = {}
+    messages = target.messages()
+    baseline = len(messages) if messages is not None else 0
+
+    async def fire(sub_type, user):
+        nonlocal errors
+        body, headers = build_request(target.secret, sub_type, user)
+        sent_at = time.perf_counter()
+        if sub_type == "stream.online":
+            online_sent.append((sent_at, user["login"]))
+        try:
+            async with session.post(target.url, data=body, headers=headers) as response:
+                await response.read()
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+        except Exception:
+            errors += 1
+            return
+        acks.add(sub_type, time.perf_counter() - sent_at)
+
+    # Open-loop schedule: requests go out on time whether or not earlier ones were acked.
+    tasks = []
+    step_start = time.perf_counter()
+    for n in range(total):
+        user = target.broadcasters[n % len(target.broadcasters)]
+        # Alternate offline/online per broadcaster so every online event should notify.
+        sub_type = "stream.online" if last_sent.get(user["id"]) == "stream.offline" else "stream.offline"
+        last_sent[user["id"]] = sub_type
+        delay = step_start + n * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(sub_type, user)))
+    await asyncio.gather(*tasks)
+    send_wall = time.perf_counter() - step_start
+
+    print(f"-- {rate}/s for {duration}s: {total} requests sent in {send_wall:.2f}s")
+    print(acks.report(wall_time=send_wall))
+    print(f"responses: {dict(sorted(statuses.items()))}, transport errors/timeouts: {errors}")
+
+    if messages is None:
+        print()
+        return
+
+    expected = sum(target.followers.get(login, 0) for _, login in online_sent)
+    deadline = time.perf_counter() + settle_timeout
+    while len(messages) - baseline < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    pings = {}
+    for sent_at, _, payload in messages[baseline:]:
+        login = (payload.get("content") or "").rsplit("/", 1)[-1]
+        pings.setdefault(login, []).append(sent_at)
+    time_to_notification = []
+    dropped = 0
+    for index, (sent_at, login) in enumerate(online_sent):
+        if not target.followers.get(login):
+            continue
+        # Attribute each ping to the latest online event for that broadcaster sent before it.
+        later = next((t for t, l in online_sent[index + 1:] if l == login), float("inf"))
+        hits = [t for t in pings.get(login, []) if sent_at <= t < later]
+        if not hits:
+            dropped += 1
+            continue
+        time_to_notification.append(min(hits) - sent_at)
+    print(
+        f"time-to-notification p50 {percentile(time_to_notification, 50) * 1000:.1f} ms, "
+        f"p99 {percentile(time_to_notification, 99) * 1000:.1f} ms; "
+        f"{dropped}/{len(online_sent)} online events produced no ping, "
+        f"{len(messages) - baseline}/{expected} pings delivered\n"
+    )
+
+async def main(args):
+    target = RemoteTarget(args) if args.url else LocalTarget(args)
+    await target.start()
+    try:
+        timeout = ClientTimeout(total=args.request_timeout)
+        async with ClientSession(timeout=timeout, connector=TCPConnector(limit=args.connections)) as session:
+            for rate in (float(r) for r in args.rates.split(",")):
+                await run_step(target, session, rate, args.duration, args.timeout)
+    finally:
+        await target.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay signed EventSub notifications against the webhook receiver.")
+    parser.add_argument("--rates", default="25,50,100,200", help="Comma separated requests/second steps")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate step")
+    parser.add_argument("--url", default=None, help="Remote callback URL; omit to start the receiver locally")
+    parser.add_argument("--secret", default=os.getenv("TWITCH_WEBHOOK_SECRET"))
+    parser.add_argument("--broadcaster-ids", default="", help="Remote mode: comma separated broadcaster ids to replay")
+    parser.add_argument("--port", type=int, default=8089, help="Local mode: port for the receiver")
+    parser.add_argument("--relay", action="store_true", help="Local mode: split ingest and dispatch through the eventsub_events relay")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--request-timeout", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for pings after each step")
+    # Harness options used by the local target.
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--broadcasters", type=int, default=100)
+    parser.add_argument("--follows", type=int, default=5)
+    parser.add_argument("--birthdays", type=int, default=0)
+    parser.add_argument("--helix-latency", type=float, default=0.0)
+    parser.add_argument("--discord-latency", type=float, default=0.0)
+    parser.add_argument("--db-latency", type=float, default=0.0)
+    parser.add_argument("--dsn", default=None)
+    parser.add_argument("--seed", type=int, default=507)
+    args = parser.parse_args()
+    if args.url and not args.broadcaster_ids:
+        sys.exit("--broadcaster-ids is required with --url")
+    asyncio.run(main(args))
@@ -0,0 +1,801 @@
+"""
+    Local stand-ins for the services cocoabot talks to, so the hot paths can be
+    driven without touching production Discord, Twitch or Postgres.
+
+    - FakeHelix: an aiohttp server that speaks enough of the Helix/OAuth API for
+      twitchAPI.Twitch (pass its base_url/auth_base_url to the Twitch constructor).
+    - FakeDiscordHTTP: replaces discord.py's HTTPClient.request, so channel.send and
+      friends run through the real library and stop right before the network.
+    - InMemoryDB/FakePool: a tiny evaluator for the single-table statements psql.py
+      is used with. Install it with install_pool(db).
+"""
+import asyncio
+import itertools
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from aiohttp import web
+import discord
+import psql
+
+SNOWFLAKE_BASE = 1_300_000_000_000_000_000
+
+# ---------------------------------------------------------------------------
+# Twitch
+# ---------------------------------------------------------------------------
+
+class FakeHelix:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.users = {}
+        self.streams = {}
+        self.subscriptions = {}
+        self.calls = {}
+        self._ids = itertools.count(1)
+        self._runner = None
+        self.port = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}/helix/"
+
+    @property
+    def auth_base_url(self):
+        return f"http://127.0.0.1:{self.port}/oauth2/"
+
+    def add_user(self, user_id, login, display_name=None):
+        self.users[str(user_id)] = {
+            "id": str(user_id),
+            "login": login,
+            "display_name": display_name or login,
+            "type": "",
+            "broadcaster_type": "affiliate",
+            "description": f"{login}'s channel",
+            "profile_image_url": f"https://static-cdn.jtvnw.net/jtv_user_pictures/{login}-profile_image-300x300.png",
+            "offline_image_url": "",
+            "view_count": 0,
+            "created_at": "2016-01-18T05:42:39Z"
+        }
+
+    def set_live(self, user_id, title="Bench stream", game_name="Just Chatting"):
+        user = self.users[str(user_id)]
+        self.streams[str(user_id)] = {
+            "id": str(next(self._ids)),
+            "user_id": user["id"],
+            "user_login": user["login"],
+            "user_name": user["display_name"],
+            "game_id": "509658",
+            "game_name": game_name,
+            "type": "live",
+            "title": title,
+            "viewer_count": 42,
+            "started_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "language": "en",
+            "thumbnail_url": f"https://static-cdn.jtvnw.net/previews-ttv/live_user_{user['login']}-{{width}}x{{height}}.jpg",
+            "tag_ids": [],
+            "tags": [],
+            "is_mature": False
+        }
+
+    def set_offline(self, user_id):
+        self.streams.pop(str(user_id), None)
+
+    async def start(self):
+        app = web.Application()
+        app.add_routes([
+            web.post("/oauth2/token", self._token),
+            web.get("/oauth2/validate", self._validate),
+            web.get("/helix/users", self._users),
+            web.get("/helix/streams", self._streams),
+            web.get("/helix/channels", self._channels),
+            web.get("/helix/clips", self._clips),
+            web.get("/helix/videos", self._videos),
+            web.get("/helix/games", self._games),
+            web.get("/helix/schedule", self._schedule),
+            web.get("/helix/eventsub/subscriptions", self._list_subscriptions),
+            web.post("/helix/eventsub/subscriptions", self._create_subscription),
+            web.delete("/helix/eventsub/subscriptions", self._delete_subscription),
+        ])
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _respond(self, request, payload, status=200):
+        self.calls[request.path] = self.calls.get(request.path, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(payload, status=status)
+
+    async def _token(self, request):
+        return await self._respond(request, {"access_token": "bench", "expires_in": 3600, "token_type": "bearer"})
+
+    async def _validate(self, request):
+        return await self._respond(request, {"client_id": "bench", "scopes": [], "expires_in": 3600})
+
+    async def _users(self, request):
+        ids = set(request.query.getall("id", []))
+        logins = set(request.query.getall("login", []))
+        data = [u for u in self.users.values() if u["id"] in ids or u["login"] in logins]
+        return await self._respond(request, {"data": data})
+
+    async def _streams(self, request):
+        ids = request.query.getall("user_id", [])
+        data = [self.streams[i] for i in ids if i in self.streams]
+        return await self._respond(request, {"data": data, "pagination": {}})
+
+    async def _channels(self, request):
+        data = []
+        for user_id in request.query.getall("broadcaster_id", []):
+            user = self.users.get(user_id)
+            if user is None:
+                continue
+            stream = self.streams.get(user_id, {})
+            data.append({
+                "broadcaster_id": user["id"],
+                "broadcaster_login": user["login"],
+                "broadcaster_name": user["display_name"],
+                "broadcaster_language": "en",
+                "game_id": stream.get("game_id", "509658"),
+                "game_name": stream.get("game_name", "Just Chatting"),
+                "title": stream.get("title", "Bench stream"),
+                "delay": 0,
+                "tags": [],
+                "content_classification_labels": [],
+                "is_branded_content": False
+            })
+        return await self._respond(request, {"data": data})
+
+    async def _clips(self, request):
+        user = self.users.get(request.query.get("broadcaster_id"))
+        now = datetime.now(timezone.utc)
+        data = [] if user is None else [{
+            "id": f"Clip{user['id']}x{n}",
+            "url": f"https://clips.twitch.tv/Clip{user['id']}x{n}",
+            "embed_url": f"https://clips.twitch.tv/embed?clip=Clip{user['id']}x{n}",
+            "broadcaster_id": user["id"],
+            "broadcaster_name": user["display_name"],
+            "creator_id": "1",
+            "creator_name": "clipper",
+            "video_id": "",
+            "game_id": "509658",
+            "language": "en",
+            "title": f"Clip {n}",
+            "view_count": 1000 - n,
+            "created_at": (now - timedelta(days=n)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "thumbnail_url": "https://i.imgur.com/ktvDsVQ.png",
+            "duration": 30.0,
+            "vod_offset": None,
+            "is_featured": n % 3 == 0
+        } for n in range(25)]
+        return await self._respond(request, {"data": data, "pagination": {}})
+
+    async def _videos(self, request):
+        user = self.users.get(request.query.get("user_id"))
+        now = datetime.now(timezone.utc)
+        data = [] if user is None else [{
+            "id": f"{user['id']}{n:03d}",
+            "stream_id": None,
+            "user_id": user["id"],
+            "user_login": user["login"],
+            "user_name": user["display_name"],
+            "title": f"VOD {n}",
+            "description": "Bench video " * 20,
+            "created_at": (now - timedelta(days=n)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "published_at": (now - timedelta(days=n)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "url": f"https://www.twitch.tv/videos/{user['id']}{n:03d}",
+            "thumbnail_url": "",
+            "viewable": "public",
+            "view_count": 500 - n,
+            "language": "en",
+            "type": "archive",
+            "duration": "3h2m1s",
+            "muted_segments": []
+        } for n in range(25)]
+        return await self._respond(request, {"data": data, "pagination": {}})
+
+    async def _games(self, request):
+        data = [{"id": i, "name": "Just Chatting", "box_art_url": "", "igdb_id": ""} for i in request.query.getall("id", [])]
+        return await self._respond(request, {"data": data, "pagination": {}})
+
+    async def _schedule(self, request):
+        user = self.users.get(request.query.get("broadcaster_id"))
+        if user is None:
+            return await self._respond(request, {"error": "Not Found", "status": 404, "message": "not found"}, status=404)
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        segments = [{
+            "id": f"segment{n}",
+            "start_time": (start + timedelta(days=n)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "end_time": (start + timedelta(days=n, hours=4)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "title": f"Stream {n}",
+            "canceled_until": None,
+            "category": {"id": "509658", "name": "Just Chatting"},
+            "is_recurring": True
+        } for n in range(int(request.query.get("first", 5)))]
+        payload = {
+            "data": {
+                "segments": segments,
+                "broadcaster_id": user["id"],
+                "broadcaster_name": user["display_name"],
+                "broadcaster_login": user["login"],
+                "vacation": None
+            },
+            "pagination": {}
+        }
+        return await self._respond(request, payload)
+
+    async def _list_subscriptions(self, request):
+        data = list(self.subscriptions.values())
+        payload = {"data": data, "total": len(data), "total_cost": 0, "max_total_cost": 10000, "pagination": {}}
+        return await self._respond(request, payload)
+
+    async def _create_subscription(self, request):
+        body = await request.json()
+        sub = {
+            "id": f"sub-{next(self._ids)}",
+            "status": "enabled",
+            "type": body["type"],
+            "version": body["version"],
+            "condition": body["condition"],
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "transport": {"method": "webhook", "callback": body["transport"]["callback"]},
+            "cost": 0
+        }
+        self.subscriptions[sub["id"]] = sub
+        return await self._respond(request, {"data": [sub], "total": len(self.subscriptions)}, status=202)
+
+    async def _delete_subscription(self, request):
+        self.subscriptions.pop(request.query.get("id"), None)
+        self.calls[request.path] = self.calls.get(request.path, 0) + 1
+        return web.Response(status=204)
+
+def eventsub_notification(sub_type, user, subscription_id=None):
+    """Body of an EventSub webhook notification as Twitch would POST it."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    event = {
+        "broadcaster_user_id": user["id"],
+        "broadcaster_user_login": user["login"],
+        "broadcaster_user_name": user["display_name"],
+    }
+    version = "1"
+    if sub_type == "stream.online":
+        event.update({"id": str(time.monotonic_ns()), "type": "live", "started_at": now})
+    elif sub_type == "channel.update":
+        version = "2"
+        event.update({
+            "title": "Bench stream",
+            "language": "en",
+            "category_id": "509658",
+            "category_name": "Just Chatting",
+            "content_classification_labels": []
+        })
+    return {
+        "subscription": {
+            "id": subscription_id or f"sub-{sub_type}-{user['id']}",
+            "status": "enabled",
+            "type": sub_type,
+            "version": version,
+            "condition": {"broadcaster_user_id": user["id"]},
+            "transport": {"method": "webhook", "callback": "https://localhost/callback"},
+            "created_at": now,
+            "cost": 0
+        },
+        "event": event
+    }
+
+def eventsub_metadata(sub_type, message_id, version="1"):
+    return {
+        "message_id": message_id,
+        "message_type": "notification",
+        "message_timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "subscription_type": sub_type,
+        "subscription_version": version
+    }
+
+# ---------------------------------------------------------------------------
+# Discord
+# ---------------------------------------------------------------------------
+
+def snowflake(n):
+    return SNOWFLAKE_BASE + n
+
+def user_payload(user_id, name=None, bot=False):
+    return {
+        "id": str(user_id),
+        "username": name or f"user{user_id % 100000}",
+        "discriminator": "0",
+        "global_name": None,
+        "avatar": None,
+        "bot": bot
+    }
+
+def member_payload(user_id, name=None):
+    return {
+        "user": user_payload(user_id, name),
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0
+    }
+
+def guild_payload(guild_id, channel_ids, role_ids, emoji_names=(), member_ids=()):
+    return {
+        "id": str(guild_id),
+        "name": f"guild{guild_id % 100000}",
+        "owner_id": str(snowflake(0)),
+        "features": [],
+        "member_count": len(member_ids),
+        "channels": [
+            {"id": str(cid), "type": 0, "name": f"channel{n}", "position": n, "permission_overwrites": [], "guild_id": str(guild_id)}
+            for n, cid in enumerate(channel_ids)
+        ],
+        "roles": [
+            {"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+             "hoist": False, "managed": False, "mentionable": False}
+        ] + [
+            {"id": str(rid), "name": f"role{n}", "permissions": "0", "position": n + 1, "color": 0,
+             "hoist": False, "managed": False, "mentionable": True}
+            for n, rid in enumerate(role_ids)
+        ],
+        "emojis": [
+            {"id": str(snowflake(900_000 + n)), "name": name, "animated": False, "available": True,
+             "require_colons": True, "managed": False, "roles": []}
+            for n, name in enumerate(emoji_names)
+        ],
+        "members": [member_payload(uid) for uid in member_ids]
+    }
+
+class FakeDiscordHTTP:
+    """Drop-in for HTTPClient.request that records every call instead of sending it."""
+    MEMBER_ROUTE = re.compile(r"/guilds/(\d+)/members/(\d+)$")
+    MESSAGE_ROUTE = re.compile(r"/channels/(\d+)/messages$")
+
+    def __init__(self, bot_user_id, latency=0.0):
+        self.bot_user_id = bot_user_id
+        self.latency = latency
+        self.requests = []
+        self.messages = []
+        self._ids = itertools.count(1)
+        self._changed = asyncio.Condition()
+
+    def install(self, bot):
+        bot.http.request = self.request
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        self.requests.append((route.method, route.path))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        match = self.MESSAGE_ROUTE.search(route.url)
+        if route.method == "POST" and match:
+            payload = kwargs.get("json") or {}
+            self.messages.append((time.perf_counter(), int(match.group(1)), payload))
+            async with self._changed:
+                self._changed.notify_all()
+            return {
+                "id": str(snowflake(next(self._ids))),
+                "channel_id": match.group(1),
+                "author": user_payload(self.bot_user_id, "cocoabot", bot=True),
+                "content": payload.get("content") or "",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "edited_timestamp": None,
+                "tts": False,
+                "mention_everyone": False,
+                "mentions": [],
+                "mention_roles": [],
+                "attachments": [],
+                "embeds": payload.get("embeds") or [],
+                "pinned": False,
+                "type": 0
+            }
+
+        match = self.MEMBER_ROUTE.search(route.url)
+        if route.method == "GET" and match:
+            return member_payload(int(match.group(2)))
+
+        return {}
+
+    async def wait_for_messages(self, count, timeout):
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: len(self.messages) >= count), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return len(self.messages)
+
+class FakeResponse:
+    def __init__(self):
+        self.deferred = False
+
+    async def defer(self, *args, **kwargs):
+        self.deferred = True
+
+    async def send_message(self, *args, **kwargs):
+        pass
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for command callbacks and autocompletes."""
+    def __init__(self, guild, user):
+        self.guild = guild
+        self.user = user
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+def add_guild(bot, payload):
+    guild = discord.Guild(data=payload, state=bot._connection)
+    bot._connection._add_guild(guild)
+    return guild
+
+def set_bot_user(bot, user_id):
+    bot._connection.user = discord.ClientUser(state=bot._connection, data=user_payload(user_id, "cocoabot", bot=True))
+
+# ---------------------------------------------------------------------------
+# Postgres
+# ---------------------------------------------------------------------------
+
+_WS = re.compile(r"\s+")
+_SELECT = re.compile(r"^SELECT (?P<cols>.+?) FROM (?P<table>\w+)(?: WHERE (?P<where>.+?))?(?: ORDER BY (?P<order>\w+))?$", re.I)
+_UPDATE = re.compile(r"^UPDATE (?P<table>\w+) SET (?P<sets>.+?)(?: WHERE (?P<where>.+))?$", re.I)
+_DELETE = re.compile(r"^DELETE FROM (?P<table>\w+)(?: WHERE (?P<where>.+))?$", re.I)
+_INSERT = re.compile(
+    r"^INSERT INTO (?P<table>\w+) \((?P<cols>[^)]+)\) VALUES \((?P<vals>[^)]+)\)"
+    r"(?: ON CONFLICT \((?P<conflict>[^)]+)\) DO (?P<action>.+))?$",
+    re.I
+)
+_AND = re.compile(r"\s+AND\s+", re.I)
+
+class InMemoryDB:
+    """
+        Evaluates the simple single-table statements the bot issues (equality WHEREs
+        joined by AND, SET lists, INSERT ... ON CONFLICT). Anything else raises
+        NotImplementedError with the query so a scenario fails loudly instead of lying.
+    """
+    KEYS = {
+        "notification": ("broadcaster_id", "guild_id"),
+        "birthday_guild": ("guild_id",),
+        "birthday_user": ("guild_id", "user_id"),
+        "user_timezone": ("user_id",),
+        "twitch_tokens": ("discord_user_id",),
+        "notification_outbox": ("id",),
+        "eventsub_events": ("id",),
+    }
+    DEFAULTS = {
+        "notification": {"is_live": False},
+        "birthday_guild": {"role_id": None},
+        "birthday_user": {"last_updated": datetime.now},
+        "notification_outbox": {
+            "id": itertools.count(1).__next__,
+            "attempts": 0,
+            "dead": False,
+            "last_error": None,
+            "available_at": lambda: datetime.now(timezone.utc),
+            "created_at": lambda: datetime.now(timezone.utc),
+        },
+    }
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {name: [] for name in self.KEYS}
+        self.handlers = []
+        self.queries = {}
+        self.listeners = {}  # channel -> callbacks added through FakeConnection.add_listener
+        self._event_ids = itertools.count(1)
+        self.register(r"^INSERT INTO notification_outbox .* FROM unnest", _outbox_enqueue)
+        self.register(r"^UPDATE notification_outbox SET attempts = attempts \+ 1", _outbox_claim)
+        self.register(r"^UPDATE notification_outbox SET available_at = ", _outbox_retry)
+        self.register(r"^DELETE FROM notification_outbox WHERE id = ANY", _outbox_complete)
+        self.register(r"^UPDATE notification_outbox AS o SET available_at = ", _outbox_renew)
+        self.register(r"^SELECT COUNT\(\*\) FROM notification_outbox WHERE NOT dead$", _outbox_depth)
+        self.register(r"^WITH stored AS \( INSERT INTO eventsub_events", _eventsub_store)
+        self.register(r"^UPDATE eventsub_events SET attempts = attempts \+ 1", _eventsub_claim)
+        self.register(r"^DELETE FROM eventsub_events WHERE id = ", _eventsub_complete)
+        self.register(r"^WITH changed AS \( UPDATE notification SET is_live", _notification_transition)
+        self.register(r"^CREATE TEMP TABLE birthday_import", _birthday_import_table)
+        self.register(r"^INSERT INTO birthday_user .* FROM birthday_import .* DO UPDATE", lambda db, args: _birthday_merge(db, args, overwrite=True))
+        self.register(r"^INSERT INTO birthday_user .* FROM birthday_import .* DO NOTHING", lambda db, args: _birthday_merge(db, args, overwrite=False))
+
+    def register(self, pattern, handler):
+        """Teach the fake a statement the generic evaluator can't handle."""
+        self.handlers.append((re.compile(pattern, re.I | re.S), handler))
+
+    def load(self, table, rows):
+        defaults = self.DEFAULTS.get(table, {})
+        for row in rows:
+            full = {k: (v() if callable(v) else v) for k, v in defaults.items()}
+            full.update(row)
+            self.tables.setdefault(table, []).append(full)
+
+    async def run(self, query, args):
+        self.queries[query] = self.queries.get(query, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        normalized = _WS.sub(" ", query).strip().rstrip(";")
+        for pattern, handler in self.handlers:
+            if pattern.search(normalized):
+                return handler(self, args)
+
+        if m := _SELECT.match(normalized):
+            rows = self._filter(m["table"], m["where"], args)
+            if m["order"]:
+                rows = sorted(rows, key=lambda r: r[m["order"]])
+            cols = m["cols"].strip()
+            if cols == "*":
+                return "SELECT", [dict(r) for r in rows]
+            if cols == "1":
+                return "SELECT", [{"?column?": 1} for _ in rows]
+            names = [c.strip() for c in cols.split(",")]
+            return "SELECT", [{n: r[n] for n in names} for r in rows]
+
+        if m := _UPDATE.match(normalized):
+            rows = self._filter(m["table"], m["where"], args)
+            for row in rows:
+                for assignment in m["sets"].split(","):
+                    col, value = (p.strip() for p in assignment.split("=", 1))
+                    row[col] = self._value(value, args, row)
+            return f"UPDATE {len(rows)}", []
+
+        if m := _DELETE.match(normalized):
+            rows = self._filter(m["table"], m["where"], args)
+            self.tables[m["table"]] = [r for r in self.tables[m["table"]] if r not in rows]
+            return f"DELETE {len(rows)}", []
+
+        if m := _INSERT.match(normalized):
+            table = m["table"]
+            cols = [c.strip() for c in m["cols"].split(",")]
+            vals = [self._value(v.strip(), args) for v in m["vals"].split(",")]
+            new = dict(zip(cols, vals))
+            keys = self.KEYS[table]
+            existing = next((r for r in self.tables[table] if all(r.get(k) == new.get(k) for k in keys)), None)
+            if existing is not None:
+                if not m["conflict"]:
+                    raise RuntimeError(f"duplicate key value violates unique constraint on {table}")
+                action = m["action"].strip()
+                if action.upper().startswith("UPDATE SET"):
+                    for assignment in action[len("UPDATE SET"):].split(","):
+                        col, value = (p.strip() for p in assignment.split("=", 1))
+                        existing[col] = new[value.split(".", 1)[1]] if value.upper().startswith("EXCLUDED.") else self._value(value, args, existing)
+                return "INSERT 0 0", []
+            self.load(table, [new])
+            return "INSERT 0 1", []
+
+        raise NotImplementedError(f"InMemoryDB can't evaluate: {normalized}")
+
+    def _filter(self, table, where, args):
+        rows = self.tables[table]
+        if not where:
+            return list(rows)
+        conditions = []
+        for clause in _AND.split(where):
+            col, value = (p.strip() for p in clause.split("=", 1))
+            conditions.append((col, self._value(value, args)))
+        return [r for r in rows if all(r.get(col) == value for col, value in conditions)]
+
+    @staticmethod
+    def _value(token, args, row=None):
+        upper = token.upper()
+        if token.startswith("$"):
+            return args[int(token[1:]) - 1]
+        if upper == "TRUE":
+            return True
+        if upper == "FALSE":
+            return False
+        if upper == "NULL":
+            return None
+        if upper in ("CURRENT_TIMESTAMP", "NOW()"):
+            return datetime.now()
+        if token.startswith("'") and token.endswith("'"):
+            return token[1:-1]
+        if row is not None and token in row:
+            return row[token]
+        return int(token)
+
+# The outbox statements use subqueries, intervals and SKIP LOCKED; emulate them directly.
+# There is no concurrency inside a single event loop, so claiming is just filtering.
+def _outbox_enqueue(db, args):
+    broadcaster_id, channel_ids, contents, embed, lease = args
+    available_at = datetime.now(timezone.utc) + timedelta(seconds=lease)
+    start = len(db.tables["notification_outbox"])
+    db.load("notification_outbox", [
+        {"broadcaster_id": broadcaster_id, "channel_id": c, "content": t, "embed": embed, "attempts": 1, "available_at": available_at}
+        for c, t in zip(channel_ids, contents)
+    ])
+    columns = ("id", "channel_id", "content", "embed", "attempts", "created_at")
+    rows = db.tables["notification_outbox"][start:]
+    return f"INSERT 0 {len(rows)}", [{c: r[c] for c in columns} for r in rows]
+
+def _outbox_claim(db, args):
+    limit, lease = args
+    now = datetime.now(timezone.utc)
+    ready = sorted(
+        (r for r in db.tables["notification_outbox"] if not r["dead"] and r["available_at"] <= now),
+        key=lambda r: (r["available_at"], r["id"])
+    )[:limit]
+    for row in ready:
+        row["attempts"] += 1
+        row["available_at"] = now + timedelta(seconds=lease)
+    columns = ("id", "channel_id", "content", "embed", "attempts", "created_at")
+    return f"UPDATE {len(ready)}", [{c: r[c] for c in columns} for r in ready]
+
+def _outbox_retry(db, args):
+    job_id, delay, error, dead = args
+    for row in db.tables["notification_outbox"]:
+        if row["id"] == job_id:
+            row.update(available_at=datetime.now(timezone.utc) + timedelta(seconds=delay), last_error=error, dead=dead)
+            return "UPDATE 1", []
+    return "UPDATE 0", []
+
+def _outbox_renew(db, args):
+    ids, attempts, lease = args
+    leased = dict(zip(ids, attempts))
+    available_at = datetime.now(timezone.utc) + timedelta(seconds=lease)
+    renewed = []
+    for row in db.tables["notification_outbox"]:
+        if leased.get(row["id"]) == row["attempts"] and not row["dead"]:
+            row["available_at"] = available_at
+            renewed.append({"id": row["id"]})
+    return f"UPDATE {len(renewed)}", renewed
+
+def _outbox_complete(db, args):
+    ids = set(args[0])
+    before = len(db.tables["notification_outbox"])
+    db.tables["notification_outbox"] = [r for r in db.tables["notification_outbox"] if r["id"] not in ids]
+    return f"DELETE {before - len(db.tables['notification_outbox'])}", []
+
+def _outbox_depth(db, args):
+    return "SELECT", [{"count": sum(1 for r in db.tables["notification_outbox"] if not r["dead"])}]
+
+# EventSub handoff between ingest.py and the worker: insert + pg_notify, lease, delete when handled.
+def _eventsub_store(db, args):
+    message_id, sub_type, payload, channel, broadcast_channel, broadcast = args
+    if any(r["message_id"] == message_id for r in db.tables["eventsub_events"]):
+        return "SELECT 0", []
+    event_id = next(db._event_ids)
+    db.tables["eventsub_events"].append({
+        "id": event_id, "message_id": message_id, "sub_type": sub_type, "payload": payload,
+        "attempts": 0, "available_at": datetime.now(timezone.utc)
+    })
+    for callback in db.listeners.get(channel, ()):
+        callback(None, 0, channel, str(event_id))
+    for callback in db.listeners.get(broadcast_channel, ()):
+        callback(None, 0, broadcast_channel, broadcast)
+    return "SELECT 1", [{"pg_notify": ""}]
+
+def _eventsub_claim(db, args):
+    limit, lease = args
+    now = datetime.now(timezone.utc)
+    claimed = [r for r in db.tables["eventsub_events"] if r["available_at"] <= now][:limit]
+    for row in claimed:
+        row["attempts"] += 1
+        row["available_at"] = now + timedelta(seconds=lease)
+    return f"UPDATE {len(claimed)}", [{"id": r["id"], "payload": r["payload"], "attempts": r["attempts"]} for r in claimed]
+
+def _eventsub_complete(db, args):
+    before = len(db.tables["eventsub_events"])
+    db.tables["eventsub_events"] = [r for r in db.tables["eventsub_events"] if r["id"] != args[0]]
+    return f"DELETE {before - len(db.tables['eventsub_events'])}", []
+
+# Shared live state (RoutingTable.transition): conditional update + pg_notify.
+def _notification_transition(db, args):
+    broadcaster_id, live, channel = args
+    changed = [r for r in db.tables["notification"] if r["broadcaster_id"] == broadcaster_id and r["is_live"] != live]
+    for row in changed:
+        row["is_live"] = live
+    if changed:
+        for callback in db.listeners.get(channel, ()):
+            callback(None, 0, channel, broadcaster_id)
+    return "SELECT", [{"broadcaster_id": broadcaster_id, "pg_notify": ""} for _ in changed]
+
+# Bulk birthday import: COPY into a temp table, then merge with ON CONFLICT.
+def _birthday_import_table(db, args):
+    db.tables["birthday_import"] = []
+    return "CREATE TABLE", []
+
+def _birthday_merge(db, args, overwrite):
+    guild_id = args[0]
+    existing = {r["user_id"]: r for r in db.tables["birthday_user"] if r["guild_id"] == guild_id}
+    written = 0
+    for row in db.tables.pop("birthday_import", []):
+        current = existing.get(row["user_id"])
+        if current is None:
+            db.load("birthday_user", [{"guild_id": guild_id, **row}])
+            written += 1
+        elif overwrite:
+            current.update(birthdate=row["birthdate"], timezone=row["timezone"], last_updated=datetime.now())
+            written += 1
+    return f"INSERT 0 {written}", []
+
+class _Transaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def transaction(self):
+        return _Transaction()
+
+    async def execute(self, query, *args):
+        status, _ = await self.db.run(query, args)
+        return status
+
+    async def executemany(self, query, args):
+        for item in args:
+            await self.db.run(query, item)
+
+    async def fetch(self, query, *args):
+        _, rows = await self.db.run(query, args)
+        return rows
+
+    async def copy_records_to_table(self, table, *, records, columns):
+        if self.db.latency:
+            await asyncio.sleep(self.db.latency)
+        self.db.tables[table].extend(dict(zip(columns, record)) for record in records)
+        return f"COPY {len(records)}"
+
+    async def cursor(self, query, *args, prefetch=50):
+        _, rows = await self.db.run(query, args)
+        for row in rows:
+            yield row
+
+    async def fetchrow(self, query, *args):
+        _, rows = await self.db.run(query, args)
+        return rows[0] if rows else None
+
+    async def fetchval(self, query, *args):
+        row = await self.fetchrow(query, *args)
+        return next(iter(row.values())) if row else None
+
+    async def add_listener(self, channel, callback):
+        self.db.listeners.setdefault(channel, []).append(callback)
+
+    async def remove_listener(self, channel, callback):
+        self.db.listeners.get(channel, []).remove(callback)
+
+class _Acquire:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __await__(self):
+        # `conn = await pool.acquire()`, as used for LISTEN connections.
+        async def acquire():
+            return self.conn
+        return acquire().__await__()
+
+class FakePool:
+    def __init__(self, db):
+        self.db = db
+
+    def acquire(self):
+        return _Acquire(FakeConnection(self.db))
+
+    async def release(self, conn):
+        pass
+
+    async def close(self):
+        pass
+
+def install_pool(db):
+    psql._pool = FakePool(db)
@@ -0,0 +1,394 @@
+"""
+    Drives cocoabot's hot paths against local stand-ins (see bench/fakes.py) and
+    reports latency percentiles and throughput for each.
+
+    Usage: python -m bench.harness [--guilds 50] [--broadcasters 200] [--birthdays 5000] [--scenarios online,birthdays,...]
+
+    By default the database is the in-memory fake. Pass --dsn to run against a
+    scratch Postgres instead; bench rows are inserted with ids far outside the
+    Discord snowflake range currently in use and are deleted afterwards.
+"""
+import os
+
+# helpers.constants reads these at import time.
+os.environ.setdefault("PRIVATE_GUILD_ID", "1")
+os.environ.setdefault("COCOAS_GUILD_ID", "2")
+os.environ.setdefault("TWITCH_WEBHOOK_SECRET", "bench-secret")
+os.environ.setdefault("PUBLIC_URL", "https://localhost")
+
+import argparse
+import asyncio
+import logging
+import random
+import string
+import time
+from helpers.timeutil import all_timezones
+from twitchAPI.twitch import Twitch
+from twitchAPI.object.eventsub import StreamOnlineEvent, StreamOfflineEvent
+import psql
+import helpers.constants as constants
+from helpers import metrics
+from helpers.outbox import Outbox
+from helpers.supervisor import TaskSupervisor
+from helpers.routing import RoutingTable
+from helpers.guildconfig import GuildConfigCache
+from helpers.livestatus import LiveStatusCache
+from helpers.helpers import build_emoji_registry
+from bench.stats import Timings
+from bench import fakes
+
+EMOJI_NAMES = ("cocoaLicense", "cocoaLove", "cocoaShy", "cocoaBonk", "cocoaMwah", "cocoaBoba", "sparkles", "cocoaCaughtIn4K", "cocoaLargeCoke", "cocoascontroller")
+SCENARIOS = ("online", "reconcile", "birthdays", "announce", "autocomplete", "paginated", "import")
+
+class Dataset:
+    def __init__(self, args):
+        rng = random.Random(args.seed)
+        self.guild_ids = [fakes.snowflake(1_000 + g) for g in range(args.guilds)]
+        self.channels = {gid: [fakes.snowflake(100_000 + g * 10 + c) for c in range(3)] for g, gid in enumerate(self.guild_ids)}
+        self.roles = {gid: [fakes.snowflake(200_000 + g * 10 + r) for r in range(3)] for g, gid in enumerate(self.guild_ids)}
+        self.bot_user_id = fakes.snowflake(1)
+
+        self.broadcasters = []
+        for b in range(args.broadcasters):
+            login = "cocoakissies" if b == 0 else f"streamer{b}"
+            self.broadcasters.append({"id": str(10_000_000 + b), "login": login, "display_name": login.capitalize()})
+
+        # Broadcaster 0 is followed everywhere, the rest follow a long-tail distribution.
+        weights = [1 / (rank + 1) for rank in range(len(self.broadcasters))]
+        self.notification = []
+        for gid in self.guild_ids:
+            followed = {0} | set(rng.choices(range(len(self.broadcasters)), weights=weights, k=args.follows))
+            for b in followed:
+                user = self.broadcasters[b]
+                self.notification.append({
+                    "broadcaster_id": user["id"],
+                    "twitch_name": user["display_name"],
+                    "twitch_link": f"https://twitch.tv/{user['login']}",
+                    "role_id": rng.choice(self.roles[gid]),
+                    "channel_id": rng.choice(self.channels[gid]),
+                    "guild_id": gid,
+                    "is_live": False
+                })
+
+        self.birthday_guild = [{"guild_id": gid, "channel_id": self.channels[gid][1], "role_id": self.roles[gid][1]} for gid in self.guild_ids]
+        zones = sorted(z for z in all_timezones() if "/" in z and not z.startswith(("Etc/", "SystemV/")))
+        self.birthday_user = []
+        self.members = {gid: [] for gid in self.guild_ids}
+        for n in range(args.birthdays):
+            gid = rng.choice(self.guild_ids)
+            user_id = fakes.snowflake(10_000_000 + n)
+            self.birthday_user.append({
+                "guild_id": gid,
+                "user_id": user_id,
+                "birthdate": f"{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "timezone": rng.choice(zones)
+            })
+            # Half of the members are cached, the other half go through fetch_member.
+            if n % 2 == 0:
+                self.members[gid].append(user_id)
+
+    def followers(self, broadcaster_id):
+        return [r for r in self.notification if r["broadcaster_id"] == broadcaster_id]
+
+class Context:
+    pass
+
+async def seed_database(args, dataset):
+    tables = {
+        "notification": dataset.notification,
+        "birthday_guild": dataset.birthday_guild,
+        "birthday_user": dataset.birthday_user,
+    }
+    if args.dsn:
+        os.environ["DATABASE_URL"] = args.dsn
+        await psql.init_pool()
+        async with psql.get_pool().acquire() as conn:
+            for table, rows in tables.items():
+                if not rows:
+                    continue
+                columns = list(rows[0].keys())
+                await conn.copy_records_to_table(table, records=[tuple(r[c] for c in columns) for r in rows], columns=columns)
+        return None
+
+    db = fakes.InMemoryDB(latency=args.db_latency / 1000)
+    for table, rows in tables.items():
+        db.load(table, [dict(r) for r in rows])
+    fakes.install_pool(db)
+    return db
+
+async def cleanup_database(args):
+    if args.dsn:
+        for table in ("notification", "birthday_guild", "birthday_user"):
+            await psql.execute(f"DELETE FROM {table} WHERE guild_id >= $1", fakes.SNOWFLAKE_BASE)
+        await psql.execute("DELETE FROM notification_outbox WHERE channel_id >= $1", fakes.SNOWFLAKE_BASE)
+    await psql.close_pool()
+
+async def build_context(args):
+    ctx = Context()
+    ctx.args = args
+    ctx.dataset = dataset = Dataset(args)
+
+    ctx.helix = fakes.FakeHelix(latency=args.helix_latency / 1000)
+    for user in dataset.broadcasters:
+        ctx.helix.add_user(user["id"], user["login"], user["display_name"])
+        ctx.helix.set_live(user["id"])
+    await ctx.helix.start()
+
+    ctx.db = await seed_database(args, dataset)
+
+    # Reuse the real bot object and cog loading from main.py; only the HTTP layer is swapped.
+    import main
+    bot = main.bot
+    await bot._async_setup_hook()
+    ctx.discord = fakes.FakeDiscordHTTP(dataset.bot_user_id, latency=args.discord_latency / 1000)
+    ctx.discord.install(bot)
+    fakes.set_bot_user(bot, dataset.bot_user_id)
+    for n, gid in enumerate(dataset.guild_ids):
+        payload = fakes.guild_payload(
+            gid,
+            dataset.channels[gid],
+            dataset.roles[gid],
+            emoji_names=EMOJI_NAMES if n == 0 else (),
+            member_ids=dataset.members[gid]
+        )
+        fakes.add_guild(bot, payload)
+    await main.load_cogs()
+
+    twitch = Twitch("bench", "bench", base_url=ctx.helix.base_url, auth_base_url=ctx.helix.auth_base_url)
+    metrics.instrument_twitch(twitch)
+    await twitch.authenticate_app([])
+
+    constants.bot_state.bot = bot
+    constants.bot_state.twitch = twitch
+    constants.bot_state.live_status = LiveStatusCache(twitch)
+    constants.bot_state.cocoasguild = bot.get_guild(dataset.guild_ids[0])
+    constants.bot_state.privateguild = None
+    constants.bot_state.tree = bot.tree
+    build_emoji_registry(bot)
+    constants.bot_state.supervisor = ctx.supervisor = TaskSupervisor()
+    ctx.supervisor.start()
+    constants.bot_state.outbox = ctx.outbox = Outbox(bot)
+    await ctx.outbox.start()
+    # Relay workers share is_live through the database, as in helpers.setup_database
+    constants.bot_state.routing = ctx.routing = RoutingTable(shared=getattr(args, "relay", False))
+    await ctx.routing.start()
+    await constants.bot_state.live_status.prime(ctx.routing.broadcasters())
+    constants.bot_state.guild_configs = GuildConfigCache()
+    await constants.bot_state.guild_configs.load()
+    ctx.bot = bot
+    ctx.twitch = twitch
+    return ctx
+
+async def stop_context(ctx):
+    await ctx.supervisor.drain()
+    await constants.get_live_status().stop()
+    await ctx.outbox.stop()
+    await ctx.routing.stop()
+    await ctx.helix.stop()
+    await cleanup_database(ctx.args)
+
+def stream_online_event(user):
+    data = fakes.eventsub_notification("stream.online", user)
+    data["metadata"] = fakes.eventsub_metadata("stream.online", f"bench-{time.monotonic_ns()}")
+    return StreamOnlineEvent(**data)
+
+def stream_offline_event(user):
+    data = fakes.eventsub_notification("stream.offline", user)
+    data["metadata"] = fakes.eventsub_metadata("stream.offline", f"bench-{time.monotonic_ns()}")
+    return StreamOfflineEvent(**data)
+
+async def settle():
+    # The stream handlers hand their work to the task supervisor, which queues pings
+    # for the outbox workers; wait for both to finish.
+    await constants.get_supervisor().join()
+    while await constants.get_outbox().depth():
+        await asyncio.sleep(0.005)
+
+async def bench_online(ctx):
+    from helpers.helpers import handle_stream_online, handle_stream_offline
+    args = ctx.args
+    rng = random.Random(args.seed)
+    timings = Timings()
+    total_events = 0
+    dropped = 0
+    wall_start = time.perf_counter()
+
+    for _ in range(args.iterations):
+        batch = rng.sample(ctx.dataset.broadcasters, min(args.concurrency, len(ctx.dataset.broadcasters)))
+        for user in batch:
+            await handle_stream_offline(stream_offline_event(user))
+        await settle()
+
+        expected = sum(len(ctx.dataset.followers(u["id"])) for u in batch)
+        baseline = len(ctx.discord.messages)
+        started = {}
+        for user in batch:
+            started[user["login"]] = time.perf_counter()
+            await handle_stream_online(stream_online_event(user))
+        await ctx.discord.wait_for_messages(baseline + expected, timeout=args.timeout)
+        await settle()
+
+        delivered = {}
+        for sent_at, _, payload in ctx.discord.messages[baseline:]:
+            login = (payload.get("content") or "").rsplit("/", 1)[-1]
+            delivered.setdefault(login, []).append(sent_at)
+        for user in batch:
+            times = delivered.get(user["login"])
+            if not times:
+                continue
+            timings.add("time_to_first_ping", min(times) - started[user["login"]])
+            timings.add("time_to_last_ping", max(times) - started[user["login"]])
+        total_events += len(batch)
+        dropped += max(0, expected - (len(ctx.discord.messages) - baseline))
+
+    wall = time.perf_counter() - wall_start
+    print(timings.report(f"stream.online fan-out (concurrency {args.concurrency})"))
+    print(f"{total_events} events, {total_events / wall:.1f} events/s, {dropped} dropped pings\n")
+
+async def bench_reconcile(ctx):
+    from helpers.reconciler import LiveStateReconciler
+    rng = random.Random(ctx.args.seed)
+    timings = Timings()
+    reconciler = LiveStateReconciler(constants.get_twitch(), ctx.routing, constants.get_live_status(), grace=0)
+    broadcasters = [b["id"] for b in ctx.dataset.broadcasters]
+    corrected = 0
+    for _ in range(ctx.args.iterations):
+        # Drift ~10% of broadcasters as if their EventSub events had been lost.
+        for broadcaster_id in rng.sample(broadcasters, max(1, len(broadcasters) // 10)):
+            if broadcaster_id in ctx.helix.streams:
+                ctx.helix.set_offline(broadcaster_id)
+            else:
+                ctx.helix.set_live(broadcaster_id)
+        with timings.measure("reconcile"):
+            corrected += await reconciler.reconcile()
+    print(timings.report(f"live state reconciliation ({len(broadcasters)} broadcasters)"))
+    print(f"{corrected} corrections, {ctx.helix.calls.get('/helix/streams', 0)} Get Streams calls so far\n")
+
+async def bench_birthdays(ctx):
+    from helpers.birthday import check_birthdays
+    timings = Timings()
+    for _ in range(ctx.args.iterations):
+        with timings.measure("check_birthdays"):
+            await check_birthdays(ctx.bot)
+    print(timings.report(f"check_birthdays ({len(ctx.dataset.birthday_user)} registered users)"))
+    print()
+
+async def bench_announce(ctx):
+    from helpers.birthday import announce_birthday
+    rng = random.Random(ctx.args.seed)
+    timings = Timings()
+    for _ in range(ctx.args.iterations):
+        hits = [{"guild_id": r["guild_id"], "user_id": r["user_id"]} for r in rng.sample(ctx.dataset.birthday_user, min(200, len(ctx.dataset.birthday_user)))]
+        with timings.measure("announce_birthday"):
+            await announce_birthday(ctx.bot, hits)
+    print(timings.report("announce_birthday (200 hits per run)"))
+    print()
+
+async def bench_import(ctx):
+    from helpers.birthdaycsv import parse_csv, import_birthdays, export_birthdays
+    rng = random.Random(ctx.args.seed)
+    timings = Timings()
+    guild_id = ctx.dataset.guild_ids[0]
+    zones = sorted(z for z in all_timezones() if "/" in z)
+    for i in range(ctx.args.iterations):
+        lines = ["user_id,birthdate,timezone"]
+        for n in range(ctx.args.birthdays):
+            lines.append(f"{fakes.snowflake(900_000 + n)},{rng.randint(1, 12)}/{rng.randint(1, 28)},{rng.choice(zones)}")
+        data = "\n".join(lines).encode()
+        with timings.measure("parse_csv"):
+            records, errors = parse_csv(data)
+        with timings.measure("import_birthdays"):
+            await import_birthdays(guild_id, records, overwrite=True)
+        with timings.measure("export_birthdays"):
+            await export_birthdays(guild_id)
+    print(timings.report(f"bulk birthday import/export ({ctx.args.birthdays} rows per file)"))
+    print()
+
+async def bench_autocomplete(ctx):
+    from helpers.autocomplete import streamer_autocomplete, timezone_autocomplete, command_autocomplete
+    rng = random.Random(ctx.args.seed)
+    timings = Timings()
+    user = ctx.bot.user
+    for _ in range(ctx.args.iterations * 10):
+        guild = ctx.bot.get_guild(rng.choice(ctx.dataset.guild_ids))
+        interaction = fakes.FakeInteraction(guild, user)
+        current = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(0, 2)))
+        with timings.measure("streamer_autocomplete"):
+            await streamer_autocomplete(interaction, current)
+        with timings.measure("timezone_autocomplete"):
+            await timezone_autocomplete(interaction, current)
+        with timings.measure("command_autocomplete"):
+            await command_autocomplete(interaction, current)
+    print(timings.report("autocompletes"))
+    print()
+
+async def bench_paginated(ctx):
+    rng = random.Random(ctx.args.seed)
+    timings = Timings()
+    twitch_cog = ctx.bot.get_cog("TwitchCog")
+    birthday_cog = ctx.bot.get_cog("BirthdayCog")
+    commands = {
+        "status": lambda i: twitch_cog.status.callback(twitch_cog, i),
+        "schedule": lambda i: twitch_cog.schedule.callback(twitch_cog, i),
+        "clips": lambda i: twitch_cog.clips.callback(twitch_cog, i),
+        "videos": lambda i: twitch_cog.videos.callback(twitch_cog, i),
+        "status all": lambda i: twitch_cog.status.callback(twitch_cog, i, streamer="all"),
+        "schedule all": lambda i: twitch_cog.schedule.callback(twitch_cog, i, streamer="all"),
+        "clips all": lambda i: twitch_cog.clips.callback(twitch_cog, i, streamer="all"),
+        "videos all": lambda i: twitch_cog.videos.callback(twitch_cog, i, streamer="all"),
+        "listbirthdays": lambda i: birthday_cog.list_birthdays.callback(birthday_cog, i),
+    }
+    failures = 0
+    for _ in range(ctx.args.iterations):
+        guild = ctx.bot.get_guild(rng.choice(ctx.dataset.guild_ids))
+        for name, run in commands.items():
+            interaction = fakes.FakeInteraction(guild, ctx.bot.user)
+            with timings.measure(name):
+                await run(interaction)
+            if any(str(content or "").startswith("❌") for content, _ in interaction.followup.sent):
+                failures += 1
+    print(timings.report("slash commands"))
+    print(f"{failures} command errors\n")
+
+async def main(args):
+    logging.getLogger().setLevel(args.log_level)
+    ctx = await build_context(args)
+    scenarios = {
+        "online": bench_online,
+        "reconcile": bench_reconcile,
+        "birthdays": bench_birthdays,
+        "announce": bench_announce,
+        "import": bench_import,
+        "autocomplete": bench_autocomplete,
+        "paginated": bench_paginated,
+    }
+    print(
+        f"Dataset: {len(ctx.dataset.guild_ids)} guilds, {len(ctx.dataset.broadcasters)} broadcasters, "
+        f"{len(ctx.dataset.notification)} notification rows, {len(ctx.dataset.birthday_user)} birthdays\n"
+    )
+    try:
+        for name in args.scenarios.split(","):
+            await scenarios[name.strip()](ctx)
+        if args.metrics:
+            print(metrics.render())
+    finally:
+        await stop_context(ctx)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark harness for cocoabot's hot paths.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--broadcasters", type=int, default=200)
+    parser.add_argument("--follows", type=int, default=10, help="Broadcasters followed per guild")
+    parser.add_argument("--birthdays", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10, help="stream.online events fired at once")
+    parser.add_argument("--helix-latency", type=float, default=0.0, help="Simulated Helix latency in ms")
+    parser.add_argument("--discord-latency", type=float, default=0.0, help="Simulated Discord latency in ms")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="Simulated DB latency in ms (in-memory DB only)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for pings before counting them dropped")
+    parser.add_argument("--dsn", default=None, help="Run against this Postgres instead of the in-memory DB")
+    parser.add_argument("--seed", type=int, default=507)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--metrics", action="store_true", help="Print what /metrics would serve after the scenarios")
+    asyncio.run(main(parser.parse_args()))
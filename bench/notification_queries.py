@@ -0,0 +1,113 @@
+"""
+    Seeds a throwaway copy of the notification table and reports p50/p99 for the
+    queries the bot runs against it, first without and then with the secondary
+    indexes from migration 3.
+
+    Usage: DATABASE_URL=postgres://... python -m bench.notification_queries [--guilds 2000] [--broadcasters 5000]
+
+    Everything lives in its own schema (dropped afterwards), so it is safe to point
+    at a development database. Don't point it at production.
+"""
+import argparse
+import asyncio
+import os
+import random
+import asyncpg
+from psql import MIGRATIONS
+from bench.stats import Timings
+
+BENCH_SCHEMA = "cocoabot_bench"
+
+QUERIES = {
+    "streamer_autocomplete": ("SELECT twitch_name, twitch_link FROM notification WHERE guild_id = $1", "guild"),
+    "liststreamers": ("SELECT twitch_name, twitch_link FROM notification WHERE guild_id = $1", "guild"),
+    "alert": ("SELECT channel_id, role_id FROM notification WHERE broadcaster_id = $1 AND guild_id = $2", "pair"),
+    "online_is_live": ("SELECT is_live FROM notification WHERE broadcaster_id = $1", "broadcaster"),
+    "online_fanout": ("SELECT channel_id, role_id FROM notification WHERE broadcaster_id = $1", "broadcaster"),
+    "online_update": ("UPDATE notification SET is_live = TRUE WHERE broadcaster_id = $1", "broadcaster"),
+}
+
+def migration_statements(version):
+    for v, _, statements in MIGRATIONS:
+        if v == version:
+            return statements
+    raise KeyError(version)
+
+def build_rows(guilds, broadcasters, per_guild):
+    # A few broadcasters are followed by many guilds, most by only a handful.
+    weights = [1 / (rank + 1) for rank in range(broadcasters)]
+    rows = []
+    for guild_index in range(guilds):
+        guild_id = 100_000_000_000_000_000 + guild_index
+        count = random.randint(1, per_guild)
+        chosen = set(random.choices(range(broadcasters), weights=weights, k=count))
+        for b in chosen:
+            rows.append((
+                str(10_000_000 + b),
+                f"streamer{b}",
+                f"https://twitch.tv/streamer{b}",
+                200_000_000_000_000_000 + guild_index,
+                300_000_000_000_000_000 + guild_index,
+                guild_id,
+                False
+            ))
+    return rows
+
+async def run_queries(conn, samples, iterations, label):
+    timings = Timings()
+    for _ in range(iterations):
+        guild_id, broadcaster_id = random.choice(samples)
+        for name, (query, kind) in QUERIES.items():
+            if kind == "guild":
+                args = (guild_id,)
+            elif kind == "pair":
+                args = (broadcaster_id, guild_id)
+            else:
+                args = (broadcaster_id,)
+            with timings.measure(name):
+                if query.startswith("UPDATE"):
+                    await conn.execute(query, *args)
+                else:
+                    await conn.fetch(query, *args)
+    print(timings.report(label))
+    print()
+
+async def main(args):
+    conn = await asyncpg.connect(dsn=args.dsn)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        await conn.execute(f"SET search_path TO {BENCH_SCHEMA}")
+        await conn.execute(migration_statements(1)[0])
+
+        rows = build_rows(args.guilds, args.broadcasters, args.per_guild)
+        await conn.copy_records_to_table(
+            "notification",
+            records=rows,
+            columns=["broadcaster_id", "twitch_name", "twitch_link", "role_id", "channel_id", "guild_id", "is_live"],
+            schema_name=BENCH_SCHEMA
+        )
+        await conn.execute("ANALYZE notification")
+        print(f"Seeded {len(rows)} notification rows across {args.guilds} guilds and {args.broadcasters} broadcasters.\n")
+
+        samples = [(r[5], r[0]) for r in random.sample(rows, min(len(rows), 1000))]
+        await run_queries(conn, samples, args.iterations, "before (primary key only)")
+
+        for statement in migration_statements(3):
+            await conn.execute(statement)
+        await conn.execute("ANALYZE notification")
+        await run_queries(conn, samples, args.iterations, "after (migration 3 indexes)")
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        await conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark notification table lookups before/after secondary indexes.")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--guilds", type=int, default=2000)
+    parser.add_argument("--broadcasters", type=int, default=5000)
+    parser.add_argument("--per-guild", type=int, default=20, help="Max tracked broadcasters per guild")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema for manual EXPLAIN ANALYZE")
+    asyncio.run(main(parser.parse_args()))
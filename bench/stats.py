@@ -0,0 +1,42 @@
+import time
+from contextlib import contextmanager
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class Timings:
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, name, seconds):
+        self.samples.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self, title=None, wall_time=None):
+        lines = []
+        if title:
+            lines.append(f"== {title} ==")
+        width = max((len(name) for name in self.samples), default=10)
+        lines.append(f"{'name':<{width}}  {'count':>7}  {'p50 ms':>9}  {'p99 ms':>9}  {'max ms':>9}  {'ops/s':>9}")
+        for name, samples in self.samples.items():
+            total = wall_time if wall_time else sum(samples)
+            throughput = len(samples) / total if total else 0.0
+            lines.append(
+                f"{name:<{width}}  {len(samples):>7}  "
+                f"{percentile(samples, 50) * 1000:>9.3f}  "
+                f"{percentile(samples, 99) * 1000:>9.3f}  "
+                f"{max(samples) * 1000:>9.3f}  "
+                f"{throughput:>9.1f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,85 @@
+"""
+    Compares the old per-call time zone handling with helpers.timeutil: validating a
+    zone name, filtering autocomplete choices, and localizing "now" for every
+    registered birthday the way check_birthdays does.
+
+    Usage: python -m bench.timezones [--users 5000] [--iterations 20]
+
+    The "before" rows use pytz when it is installed (it no longer is a dependency)
+    and fall back to uncached zoneinfo otherwise.
+"""
+import argparse
+import random
+import string
+from datetime import datetime
+from zoneinfo import ZoneInfo, available_timezones
+from helpers import timeutil
+from bench.stats import Timings
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+def localize_before(utc_now, rows):
+    hits = 0
+    for tz_name in rows:
+        if pytz is not None:
+            user_now = utc_now.replace(tzinfo=pytz.utc).astimezone(pytz.timezone(tz_name))
+        else:
+            user_now = utc_now.replace(tzinfo=timeutil.UTC).astimezone(ZoneInfo(tz_name))
+        hits += user_now.hour == 0
+    return hits
+
+def localize_after(utc_now, rows):
+    hits = 0
+    local_now = {}
+    for tz_name in rows:
+        if tz_name not in local_now:
+            user_now = utc_now.astimezone(timeutil.get_zone(tz_name))
+            local_now[tz_name] = (user_now.strftime("%m-%d"), user_now.hour)
+        hits += local_now[tz_name][1] == 0
+    return hits
+
+def autocomplete_before(current):
+    zones = pytz.all_timezones if pytz is not None else sorted(available_timezones())
+    return [tz for tz in zones if current.lower() in tz.lower()][:25]
+
+def autocomplete_after(current):
+    current = current.lower()
+    return [tz for tz, lowered in timeutil.sorted_timezones() if current in lowered][:25]
+
+def main(args):
+    rng = random.Random(args.seed)
+    zones = sorted(z for z in timeutil.all_timezones() if "/" in z)
+    rows = [rng.choice(zones) for _ in range(args.users)]
+    timings = Timings()
+
+    for _ in range(args.iterations):
+        name = rng.choice(zones)
+        with timings.measure("validate before"):
+            name in available_timezones()
+        with timings.measure("validate after"):
+            timeutil.is_valid_timezone(name)
+
+        current = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(0, 2)))
+        with timings.measure("autocomplete before"):
+            autocomplete_before(current)
+        with timings.measure("autocomplete after"):
+            autocomplete_after(current)
+
+        utc_now = datetime.utcnow()
+        with timings.measure("check_birthdays before"):
+            localize_before(utc_now, rows)
+        aware_now = timeutil.utcnow()
+        with timings.measure("check_birthdays after"):
+            localize_after(aware_now, rows)
+
+    print(timings.report(f"time zone handling ({args.users} users, {'pytz' if pytz else 'zoneinfo'} baseline)"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark for time zone lookups.")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=507)
+    main(parser.parse_args())
@@ -1,19 +1,18 @@
 from discord.ext import commands, tasks
 from discord import (
-    HTTPException, 
     app_commands, 
     Interaction, 
     Embed, 
-    utils, 
     Color, 
-    NotFound, 
-    Forbidden,
     Member
 )
 from handlers.logger import logger
 from helpers.constants import (
     is_whitelisted,
-    get_cocoasguild
+    get_emoji,
+    get_guild_configs,
+    get_leader,
+    is_leader
 )
 from helpers.autocomplete import timezone_autocomplete
 from psql import (
@@ -21,27 +20,55 @@ from psql import (
     fetchrow,
     execute
 )
-from zoneinfo import available_timezones
+from helpers.timeutil import is_valid_timezone, utcnow
+from helpers.members import get_members
+from helpers import metrics
 from discord.ext import commands
 import discord.ext
-from helpers.birthday import check_birthdays, announce_birthday
+from helpers.birthday import check_birthdays, announce_birthday, claim_birthday_hour, release_birthday_hour
+from helpers.birthdayparser import parse
+from handlers.buttons import BirthdaySetupButton, BirthdayUpdateButton, PaginatorEmbedView
+from datetime import datetime, timedelta
 
 class BirthdayCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.birthday_check.start()
+        # A standby taking over may be most of an hour from its next tick; check straight away.
+        if get_leader() is not None:
+            get_leader().on_elected(self.on_elected)
         
     # Check every hour since we defined their tz, we want to announce their birthday at 12am in their tz
     @tasks.loop(hours=1)
     async def birthday_check(self):
-        # logger.info("[BirthdayAnnouncer] Checking for birthdays...")
-        hits = await check_birthdays(self.bot)
-        if not hits:
-            # logger.info("[BirthdayAnnouncer] No birthdays found.")
-            pass
-        else:
-            # logger.info(f"[BirthdayAnnouncer] Found {len(hits)} birthday(s).")
-            await announce_birthday(self.bot, hits)
+        # Only the leader announces, otherwise every replica would post the same birthdays
+        if not is_leader():
+            return
+        await self.run_birthday_check()
+    
+    async def on_elected(self):
+        await self.bot.wait_until_ready()
+        await self.run_birthday_check()
+    
+    async def run_birthday_check(self):
+        now = utcnow()
+        if not await claim_birthday_hour(now):
+            logger.info("[BirthdayAnnouncer] Birthdays for this hour were already checked.")
+            return
+        try:
+            with metrics.BIRTHDAY_CHECK.time():
+                # logger.info("[BirthdayAnnouncer] Checking for birthdays...")
+                hits = await check_birthdays(self.bot)
+                if not hits:
+                    # logger.info("[BirthdayAnnouncer] No birthdays found.")
+                    pass
+                else:
+                    # logger.info(f"[BirthdayAnnouncer] Found {len(hits)} birthday(s).")
+                    await announce_birthday(self.bot, hits)
+        except Exception:
+            logger.exception("[BirthdayAnnouncer] Birthday check failed, releasing the hour so it can be retried.")
+            # A standby taking over (on_elected) checks the hour again instead of skipping it.
+            await release_birthday_hour(now)
     
     @birthday_check.before_loop
     async def before_birthday_check(self):
@@ -56,14 +83,14 @@ class BirthdayCog(commands.Cog):
     async def birthdaysetup(self, interaction: discord.Interaction, channel: discord.TextChannel, role: discord.Role = None):
         await interaction.response.defer()
         try:
-            from handlers.buttons import BirthdaySetupButton
-            existing = await fetchrow("""
-                SELECT * FROM birthday_guild WHERE guild_id = $1
-            """,
-                interaction.guild.id
-            )
+            existing = await get_guild_configs().get_birthday(interaction.guild.id)
             
-            if existing:
+            # Only the channel is missing (it was deleted), so no need to confirm; keep the role unless a new one is given
+            if existing and existing.channel_id is None:
+                role_id = role.id if role else existing.role_id
+                await get_guild_configs().save_birthday(interaction.guild.id, channel.id, role_id, overwrite=True)
+                role_mention = f"<@&{role_id}>" if role_id else None
+            elif existing:
                 embed = discord.Embed(
                     title="Configuration Already Exists",
                     description="Setup has already been completed for this server.\nWould you like to overwrite the existing configuration?",
@@ -72,16 +99,14 @@ class BirthdayCog(commands.Cog):
                 view = BirthdaySetupButton(interaction, channel, role)
                 await interaction.followup.send(embed=embed, view=view, ephemeral=False)
                 return
-                
-            # If the guild isn't setup
-            await execute("""
-                INSERT INTO birthday_guild (guild_id, channel_id, role_id)
-                VALUES ($1, $2, $3)
-            """,
-                interaction.guild.id,
-                channel.id,
-                role.id if role else None
-            )
+            else:
+                # If the guild isn't setup
+                await get_guild_configs().save_birthday(
+                    interaction.guild.id,
+                    channel.id,
+                    role.id if role else None
+                )
+                role_mention = role.mention if role else None
             embed = discord.Embed(
                 title="Setup Complete!",
                 color=discord.Color(value=0xf8e7ef)
@@ -92,7 +117,7 @@ class BirthdayCog(commands.Cog):
             )
             embed.add_field(
                 name="Role",
-                value=f"No Role Set" if not role else f'Notifying {role.mention} when birthday\'s appears'
+                value=f"No Role Set" if not role_mention else f'Notifying {role_mention} when birthday\'s appears'
             )
             await interaction.followup.send(embed=embed, ephemeral=False)
         except Exception as e:
@@ -106,22 +131,17 @@ class BirthdayCog(commands.Cog):
     async def setbirthday(self, interaction: Interaction, birthdate: str, time_zone: str):
         await interaction.response.defer()
         try:
-            from helpers.birthdayparser import parse
             try:
                 birthdate = parse(birthdate)
             except ValueError as e:
                 await interaction.followup.send(str(e), ephemeral=True)
                 return
             
-            if time_zone not in available_timezones():
+            if not is_valid_timezone(time_zone):
                 await interaction.followup.send(f"❌ Invalid timezone: `{time_zone}`. Please use the autocomplete suggestions.", ephemeral=True)
                 return
             
-            config = await fetchrow("""
-                SELECT * FROM birthday_guild WHERE guild_id = $1
-            """,
-                interaction.guild.id
-            )
+            config = await get_guild_configs().get_birthday(interaction.guild.id)
             if config is None:
                 await interaction.followup.send("Cannot find server configuration.\nPlease have someone with manage guild permissions to use the /birthdaysetup command", ephemeral=False)
                 return
@@ -133,7 +153,6 @@ class BirthdayCog(commands.Cog):
                 interaction.user.id
             )
             if existing:
-                from datetime import datetime, timedelta
                 last_updated = existing['last_updated']
                 can_update = last_updated < datetime.now() - timedelta(days=90)
                 
@@ -153,7 +172,6 @@ class BirthdayCog(commands.Cog):
                 )
                 
                 if can_update:
-                    from handlers.buttons import BirthdayUpdateButton
                     view = BirthdayUpdateButton(interaction, birthdate, time_zone)
                     embed.add_field(
                         name="New Birthday You Are Setting",
@@ -209,11 +227,15 @@ class BirthdayCog(commands.Cog):
                 inline=False
             )
             
-            channel = interaction.guild.get_channel(config['channel_id'])
-            channel_mention = channel.mention if channel else f"<#{config['channel_id']}>"
+            if config.channel_id is None:
+                server_config = "This server's birthday channel was deleted. Please have someone with manage guild permissions use the /setupbirthday command"
+            else:
+                channel = interaction.guild.get_channel(config.channel_id)
+                channel_mention = channel.mention if channel else f"<#{config.channel_id}>"
+                server_config = f"Your birthday will be mentioned in {channel_mention}"
             embed.add_field(
                 name="Server Config",
-                value=f"Your birthday will be mentioned in {channel_mention}",
+                value=server_config,
                 inline=False
             )
             
@@ -254,7 +276,72 @@ class BirthdayCog(commands.Cog):
         except Exception as e:
             logger.exception("Error in /remove command")
             await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
-    
+
+    @discord.ext.commands.has_guild_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.command(name="importbirthdays", description="Import birthdays from a CSV file (user_id, birthdate, timezone)")
+    @is_whitelisted()
+    @app_commands.describe(file="CSV with user_id, birthdate and timezone columns.", overwrite="Replace birthdays that are already registered.")
+    async def importbirthdays(self, interaction: Interaction, file: discord.Attachment, overwrite: bool = False):
+        # Rarely used, so the CSV code is only loaded the first time it's needed
+        from helpers.birthdaycsv import parse_csv, import_birthdays, MAX_IMPORT_BYTES, MAX_REPORTED_ERRORS
+        await interaction.response.defer()
+        try:
+            config = await get_guild_configs().get_birthday(interaction.guild.id)
+            if config is None:
+                await interaction.followup.send("Cannot find server configuration.\nPlease have someone with manage guild permissions to use the /birthdaysetup command", ephemeral=False)
+                return
+
+            if file.size > MAX_IMPORT_BYTES:
+                await interaction.followup.send(f"❌ File is too large ({file.size // 1000} KB). The limit is {MAX_IMPORT_BYTES // 1000} KB.", ephemeral=True)
+                return
+
+            try:
+                records, errors = parse_csv(await file.read())
+            except UnicodeDecodeError:
+                await interaction.followup.send("❌ File must be a UTF-8 encoded CSV.", ephemeral=True)
+                return
+
+            written = await import_birthdays(interaction.guild.id, records, overwrite)
+            logger.info(f"Imported {written} of {len(records)} birthdays into guild {interaction.guild.id} ({len(errors)} rows rejected)")
+
+            embed = Embed(
+                title="Birthdays Imported",
+                color=Color(value=0xf8e7ef)
+            )
+            embed.add_field(name="Imported", value=str(written))
+            if not overwrite:
+                embed.add_field(name="Already Registered", value=str(len(records) - written))
+            embed.add_field(name="Rejected", value=str(len(errors)))
+            if errors:
+                lines = [f"Line {line}: {message}" for line, message in errors[:MAX_REPORTED_ERRORS]]
+                if len(errors) > MAX_REPORTED_ERRORS:
+                    lines.append(f"...and {len(errors) - MAX_REPORTED_ERRORS} more")
+                embed.add_field(name="Problems", value="\n".join(lines), inline=False)
+            await interaction.followup.send(embed=embed, ephemeral=False)
+
+        except Exception as e:
+            logger.exception("Error in /importbirthdays command")
+            await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+
+    @discord.ext.commands.has_guild_permissions(manage_guild=True)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @app_commands.command(name="exportbirthdays", description="Download this server's birthdays as a CSV file")
+    @is_whitelisted()
+    async def exportbirthdays(self, interaction: Interaction):
+        import io
+        from helpers.birthdaycsv import export_birthdays
+        await interaction.response.defer(ephemeral=True)
+        try:
+            data = await export_birthdays(interaction.guild.id)
+            await interaction.followup.send(
+                file=discord.File(io.BytesIO(data), filename=f"birthdays-{interaction.guild.id}.csv"),
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.exception("Error in /exportbirthdays command")
+            await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+
     @app_commands.command(name="listbirthdays", description="Get a list of all the birthday's in this server")
     @is_whitelisted()
     async def list_birthdays(self, interaction: Interaction):
@@ -269,8 +356,7 @@ class BirthdayCog(commands.Cog):
                 interaction.guild.id
             )
             
-            cocoasguild = get_cocoasguild()
-            personEmoji = utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else ''
+            personEmoji = get_emoji("cocoaLove")
             title_base = f"{personEmoji} Birthdays"
             
             if not hits:
@@ -285,8 +371,8 @@ class BirthdayCog(commands.Cog):
             # Build pages
             CHUNK_SIZE = 25
             pages = []
+            members = await get_members(interaction.guild, [hit['user_id'] for hit in hits])
 
-            from handlers.buttons import PaginatorEmbedView
             for i in range(0, len(hits), CHUNK_SIZE):
                 chunk = hits[i:i + CHUNK_SIZE]
 
@@ -300,19 +386,9 @@ class BirthdayCog(commands.Cog):
                     user_id = hit['user_id']
                     birthdate = hit['birthdate']
 
-                    # Requires server member intents
-                    member = interaction.guild.get_member(user_id)
-                    if member is None:
-                        try:
-                            # doesn't require server member intents but can be rate limited and slower
-                            member = await interaction.guild.fetch_member(user_id)
-                        except (Forbidden, HTTPException, NotFound):
-                            # On any failure, just use user_id cleanly
-                            username = str(user_id)
-                        else:
-                            username = member.display_name
-                    else:
-                        username = member.display_name
+                    member = members.get(user_id)
+                    # Users who left the server just show their id
+                    username = member.display_name if member is not None else str(user_id)
                     
                     line = f"**{username}** \u2022 **{birthdate}**"
                     embed.add_field(
@@ -1,6 +1,8 @@
 import discord
 from discord.ui import View, Button
 from discord import Interaction, ButtonStyle, Embed, Color, Forbidden
+from helpers.constants import get_guild_configs
+from psql import execute
 
 class BirthdaySetupButton(View):
     def __init__(self, interaction, channel, role):
@@ -12,16 +14,11 @@ class BirthdaySetupButton(View):
     
     @discord.ui.button(label="Yes",style=ButtonStyle.green)
     async def setup_callback(self, interaction: Interaction, button: Button):
-        from psql import execute
-        await execute("""
-            INSERT INTO birthday_guild (guild_id, channel_id, role_id)
-            VALUES ($1, $2, $3)
-            ON CONFLICT (guild_id)
-            DO UPDATE SET channel_id = EXCLUDED.channel_id, role_id = EXCLUDED.role_id
-        """,
+        await get_guild_configs().save_birthday(
             self.interaction.guild.id,
             self.channel.id,
-            self.role.id if self.role else None
+            self.role.id if self.role else None,
+            overwrite=True
         )
         embed = Embed(
             title="Setup Complete!",
@@ -55,7 +52,6 @@ class BirthdayUpdateButton(View):
     
     @discord.ui.button(label="Yes",style=ButtonStyle.green)
     async def update_callback(self, interaction: Interaction, button: Button):
-        from psql import execute
         await execute("""
             UPDATE birthday_user
             SET birthdate = $1,
@@ -1,5 +1,5 @@
 import discord.ext
-from datetime import datetime
+from helpers.timeutil import utcnow
 from discord.ext import commands
 from discord import app_commands
 from discord.ui import Modal, TextInput
@@ -7,6 +7,7 @@ from helpers.constants import (
     is_whitelisted
 )
 from helpers.autocomplete import command_autocomplete
+from handlers.buttons import BugActionButton, FeatureRequestButton
 from handlers.logger import logger
 
 class ReportBugModal(Modal, title="Bug Report"):
@@ -51,8 +52,7 @@ class ReportBugModal(Modal, title="Bug Report"):
         embed.add_field(name="Description", value=self.description_input.value, inline=False)
         embed.add_field(name="Steps to Reproduce", value=self.steps_input.value, inline=False)
         embed.set_footer(text=f"Reported by {interaction.user}")
-        embed.timestamp = datetime.now()
-        from handlers.buttons import BugActionButton
+        embed.timestamp = utcnow()
         if bug_channel:
             await bug_channel.send(embed=embed, view=BugActionButton(self.bot, reporter=interaction.user))
         
@@ -101,8 +101,7 @@ class RequestFeatureModal(Modal, title="Request Feature"):
         embed.add_field(name="Description", value=self.description_input.value, inline=False)
         embed.add_field(name="Impact", value=self.impact_input.value, inline=False)
         embed.set_footer(text=f"Requested by {interaction.user}")
-        embed.timestamp = datetime.now()
-        from handlers.buttons import FeatureRequestButton
+        embed.timestamp = utcnow()
         if feature_channel:
             await feature_channel.send(embed=embed, view=FeatureRequestButton(self.bot, reporter=interaction.user))
         
@@ -1,10 +1,11 @@
 from discord.ext import commands
 from discord import app_commands
 import discord.ext
-from twitchAPI.helper import first
+from helpers.timeutil import utcnow
 from helpers.constants import (
     is_whitelisted,
-    get_cocoasguild,
+    get_emoji,
+    get_guild_configs,
     get_twitch,
     get_eventsub,
     get_bot
@@ -29,11 +30,11 @@ class TestsCog(commands.Cog):
     @app_commands.command(name="testtwitch", description="Test Twitch API and EventSub integration.")
     @is_whitelisted()
     async def testtwitch(self, interaction: discord.Interaction):
+        from twitchAPI.helper import first
         await interaction.response.defer(ephemeral=True)
         try:
             twitch = get_twitch()
             eventsub = get_eventsub()
-            cocoasguild = get_cocoasguild()
             user = await first(twitch.get_users(logins=["lxchet"]))
             if not user:
                 await interaction.followup.send("❌ Twitch API: User not found.", ephemeral=True)
@@ -95,7 +96,7 @@ class TestsCog(commands.Cog):
                 msg += f"🔄 Restored original subscription.\n"
             
             # Load emoji from server, or fallback
-            streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else ""
+            streamEmoji = get_emoji("cocoaLicense")
 
             emoji_embed = discord.Embed(
                 title=f"🩷 {user.display_name} is OFFLINE",
@@ -136,13 +137,7 @@ class TestsCog(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         try:
             bot = get_bot()
-            cocoasguild = get_cocoasguild()
-            from datetime import datetime
-            server_config = await fetchrow("""
-                SELECT * FROM birthday_guild WHERE guild_id = $1                   
-            """,
-                interaction.guild.id,
-            )
+            server_config = await get_guild_configs().get_birthday(interaction.guild.id)
             if server_config is None:
                 await interaction.followup.send(f"Could not find configuration for this server.\nPlease use /setup before using this command.")
                 return
@@ -164,13 +159,8 @@ class TestsCog(commands.Cog):
                     value=f"Date: {birthdate}\nTimezone: {time_zone}",
                     inline=False
                 )
-                guild_setup = await fetchrow("""
-                    SELECT * FROM birthday_guild WHERE guild_id = $1
-                """,
-                    interaction.guild.id
-                )
-                channel = interaction.guild.get_channel(guild_setup['channel_id'])
-                channel_mention = channel.mention if channel else f"<#{guild_setup['channel_id']}>"
+                channel = interaction.guild.get_channel(server_config.channel_id) if server_config.channel_id else None
+                channel_mention = channel.mention if channel else f"<#{server_config.channel_id}>" if server_config.channel_id else "no channel (run /setupbirthday)"
                 embed.add_field(
                     name="Server Config",
                     value=f"Your birthday will be mentioned in {channel_mention}",
@@ -200,12 +190,12 @@ class TestsCog(commands.Cog):
             guild = bot.get_guild(hit['guild_id'])
             member = guild.get_member(hit['user_id'])
             role_mention = ""
-            if server_config['role_id']:
-                role = guild.get_role(server_config['role_id'])
+            if server_config.role_id:
+                role = guild.get_role(server_config.role_id)
                 if role:
                     role_mention = role.mention
             
-            personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else ""
+            personEmoji = get_emoji("cocoaLove")
             
             embed = discord.Embed(
                 title=f"{personEmoji} Today is the following user(s) birthdays!",
@@ -218,7 +208,7 @@ class TestsCog(commands.Cog):
                 inline=False
             )
             embed.set_footer(text="Happy Birthday!!!")
-            embed.timestamp = datetime.now()
+            embed.timestamp = utcnow()
             await interaction.followup.send(content=role_mention if role_mention else None, embed=embed, ephemeral=True)
             
             if test_user is None:
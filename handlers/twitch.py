@@ -2,74 +2,115 @@ import discord.ext
 from discord.ext import commands
 from discord import app_commands
 from helpers.autocomplete import (
+    ALL_TRACKED,
+    tracked_streamer_autocomplete,
     streamer_autocomplete, 
     video_types_autocomplete, 
     features_autocomplete
 )
-from dateutil import parser
-from zoneinfo import ZoneInfo
+from helpers.timeutil import to_local
 from twitchAPI.helper import first
 from twitchAPI.type import TwitchResourceNotFound, VideoType
 from helpers.constants import (
     is_whitelisted,
-    get_cocoasguild,
-    get_twitch
+    get_emoji,
+    get_eventsub,
+    get_routing,
+    get_twitch,
+    get_live_status
 )
+from helpers.helpers import handle_stream_offline, handle_stream_online, handle_channel_update
+from handlers.buttons import PaginatorEmbedView
+import helpers.helix as helix
 from psql import (
-    fetchrow
+    fetch,
+    fetchrow,
+    execute
 )
 from handlers.logger import logger
 
+DEFAULT_STREAMER = "cocoakissies"
+NO_TRACKED_STREAMERS = "There are no streamers with notifications set up in this server."
+STATUS_PAGE_SIZE = 10
+
+def is_all_tracked(streamer: str | None) -> bool:
+    return streamer is not None and streamer.strip().lower() == ALL_TRACKED
+
 class TwitchCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
     
+    async def resolve_streamers(self, interaction: discord.Interaction, streamer: str | None) -> list:
+        """TwitchUsers for a `streamer` option: one login, or every broadcaster tracked in this guild."""
+        twitch = get_twitch()
+        if is_all_tracked(streamer):
+            routing = get_routing()
+            tracked = [b for b in routing.broadcasters() if routing.route(b, interaction.guild.id)]
+            return await helix.get_users(twitch, user_ids=tracked)
+        return await helix.get_users(twitch, logins=[(streamer or DEFAULT_STREAMER).strip().lower()])
+
     @app_commands.command(name="schedule", description="Get Cocoa's schedule.")
     @is_whitelisted()
-    async def schedule(self, interaction: discord.Interaction):
+    @app_commands.describe(streamer="Streamer to look up (default cocoakissies), or all tracked streamers")
+    @app_commands.autocomplete(streamer=tracked_streamer_autocomplete)
+    async def schedule(self, interaction: discord.Interaction, streamer: str = None):
         await interaction.response.defer() 
         try:
             # get user if any
             twitch = get_twitch()
-            user = await first(twitch.get_users(logins=["cocoakissies"]))
-            if not user.id or not user.login:
-                await interaction.followup.send("Twitch user not found.", ephemeral=True)
-                return
-            # get the first 5 segments of their stream schedule
-            try:
-                hit = await twitch.get_channel_stream_schedule(broadcaster_id=str(user.id), first=5)
-            except TwitchResourceNotFound:
-                await interaction.followup.send(f"{user.display_name} does not have a schedule.", ephemeral=False)
+            all_tracked = is_all_tracked(streamer)
+            users = await self.resolve_streamers(interaction, streamer)
+            if not users:
+                await interaction.followup.send(NO_TRACKED_STREAMERS if all_tracked else "Twitch user not found.", ephemeral=True)
                 return
-            except Exception as e:
-                logger.exception(f"Error in /get_channel_stream_schedule: {e}")
-                await interaction.followup.send(f"❌ Error fetching schedule: {e}", ephemeral=True)
+            # get the first 5 segments of each stream schedule
+            results = await helix.gather_limited(
+                twitch.get_channel_stream_schedule(broadcaster_id=str(user.id), first=5) for user in users
+            )
+            schedules = []
+            for user, result in zip(users, results):
+                if isinstance(result, TwitchResourceNotFound):
+                    continue
+                if isinstance(result, Exception):
+                    if not all_tracked:
+                        logger.error(f"Error in /get_channel_stream_schedule: {result}", exc_info=result)
+                        await interaction.followup.send(f"❌ Error fetching schedule: {result}", ephemeral=True)
+                        return
+                    logger.warning(f"Could not fetch schedule for {user.login}: {result}")
+                    continue
+                logger.debug(f"Schedule for {user.login}: {result}")
+                schedules.append(result)
+            if not schedules:
+                who = "None of the tracked streamers have" if all_tracked else f"{users[0].display_name} does not have"
+                await interaction.followup.send(f"{who} a schedule.", ephemeral=False)
                 return
                 
-            # debug 
-            logger.info(f"hit: {hit}")
-            # If there's a schedule, iterate over each segment
-            segments = hit.segments
-            name = hit.broadcaster_name
+            # If there's a schedule, iterate over each segment, soonest first across broadcasters
+            segments = sorted(
+                ((s, hit.broadcaster_name) for hit in schedules for s in hit.segments or []),
+                key=lambda entry: entry[0].start_time
+            )
+            name = "Tracked Streamers" if all_tracked else schedules[0].broadcaster_name
     
             # Timezone is not available to discord public API
             user_tz = await get_user_timezone(interaction.user.id)
             if user_tz is None:
                 user_tz = "UTC"
 
-            cocoasguild = get_cocoasguild()
-            streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else ''
-            boba = discord.utils.get(cocoasguild.emojis, name="cocoaBoba") if cocoasguild else ''
-            personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else ''
-            controllerEmoji = discord.utils.get(self.bot.emojis, name="cocoascontroller") or '🎮'
+            streamEmoji = get_emoji("cocoaLicense")
+            boba = get_emoji("cocoaBoba")
+            personEmoji = get_emoji("cocoaLove")
+            controllerEmoji = get_emoji("cocoascontroller")
             # https://dev.twitch.tv/docs/api/reference/#get-channel-stream-schedule
             groups = {}
-            for s in segments:
+            for s, broadcaster_name in segments:
                 # Parse datetime in state_time and end_time attributes (RFC 3339 format)
                 # "2025-05-09T12:00:00Z"
                 start_dt = s.start_time
                 end_dt = s.end_time
                 stream_title = s.title or 'Untitled Stream'
+                if all_tracked:
+                    stream_title = f"{broadcaster_name}: {stream_title}"
                 cat = s.category
                 recurring = s.is_recurring
                 cat_name = cat.name if cat is not None else "No Category"
@@ -79,9 +120,9 @@ class TwitchCog(commands.Cog):
                     recurrence_text = "(Recurring)"
                 
                 # This will be either America/Chicago etc. or UTC
-                start_local = start_dt.astimezone(ZoneInfo(user_tz))
+                start_local = to_local(start_dt, user_tz)
                 if end_dt is not None:
-                    end_local = end_dt.astimezone(ZoneInfo(user_tz))
+                    end_local = to_local(end_dt, user_tz)
                     end_str = end_local.strftime("%I:%M %p")
                     time_range = f"{start_local.strftime('%I:%M %p')} → {end_str}"
                 else:
@@ -119,8 +160,11 @@ class TwitchCog(commands.Cog):
                     inline=False
                 )
                 pages.append(embed)
+            
+            if not pages:
+                await interaction.followup.send(f"{name} {'have' if all_tracked else 'has'} no upcoming streams scheduled.", ephemeral=False)
+                return
                 
-            from handlers.buttons import PaginatorEmbedView
             view = PaginatorEmbedView(interaction, pages)
             await interaction.followup.send(embed=pages[0], view=view, ephemeral=False)
         except Exception as e:
@@ -129,53 +173,73 @@ class TwitchCog(commands.Cog):
             
     @app_commands.command(name="status", description="Check Cocoa's Twitch status")
     @is_whitelisted()
-    async def status(self, interaction: discord.Interaction):
+    @app_commands.describe(streamer="Streamer to look up (default cocoakissies), or all tracked streamers")
+    @app_commands.autocomplete(streamer=tracked_streamer_autocomplete)
+    async def status(self, interaction: discord.Interaction, streamer: str = None):
         await interaction.response.defer()
         try:
-            twitch = get_twitch()
-            cocoasguild = get_cocoasguild()
-            user = await first(twitch.get_users(logins=["cocoakissies"]))
-            if not user:
-                await interaction.followup.send("❌ Twitch user not found.", ephemeral=True)
-                return
+            streamEmoji = get_emoji("cocoaLicense")
+            personEmoji = get_emoji("cocoaLove")
+            controllerEmoji = get_emoji("cocoascontroller")
 
-            stream = None
-            async for s in twitch.get_streams(user_id=[user.id]):
-                stream = s
-                break
+            if is_all_tracked(streamer):
+                users = await self.resolve_streamers(interaction, streamer)
+                if not users:
+                    await interaction.followup.send(NO_TRACKED_STREAMERS, ephemeral=True)
+                    return
+                # Cached statuses where fresh, the rest in one Get Streams call per 100.
+                statuses = sorted(await get_live_status().get_many(users), key=lambda s: (not s.live, s.display_name.lower()))
+                live_count = sum(s.live for s in statuses)
+                pages = []
+                for i in range(0, len(statuses), STATUS_PAGE_SIZE):
+                    embed = discord.Embed(
+                        title=f"🩷 Tracked Streamers ({live_count} live)",
+                        color=discord.Color(value=0xf8e7ef) if live_count else discord.Color.greyple()
+                    )
+                    for s in statuses[i:i + STATUS_PAGE_SIZE]:
+                        if s.live:
+                            value = f"{streamEmoji} {s.title or 'No stream title found'}\n{controllerEmoji} {s.game_name or 'Unknown'}\n{personEmoji} https://twitch.tv/{s.login}"
+                        else:
+                            value = f"Offline \u2022 https://twitch.tv/{s.login}"
+                        embed.add_field(name=f"{'🔴 LIVE' if s.live else '⚫'} {s.display_name}", value=value, inline=False)
+                    pages.append(embed)
+                await interaction.followup.send(embed=pages[0], view=PaginatorEmbedView(interaction, pages), ephemeral=False)
+                return
 
-            cocoasguild = get_cocoasguild()
-            streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else '🎬'
-            personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else '🩷'
-            controllerEmoji = discord.utils.get(self.bot.emojis, name="cocoascontroller") or '🎮'
+            # Answered from the EventSub-fed cache; Helix is only asked on a miss.
+            status = await get_live_status().get(streamer or DEFAULT_STREAMER)
+            if not status:
+                await interaction.followup.send("❌ Twitch user not found.", ephemeral=True)
+                return
 
-            if stream:
+            if status.live:
                 embed = discord.Embed(
-                    title=f"🩷 {stream.user_name} is LIVE",
-                    url=f"https://twitch.tv/{user.login}",
+                    title=f"🩷 {status.display_name} is LIVE",
+                    url=f"https://twitch.tv/{status.login}",
                     color=discord.Color(value=0xf8e7ef)
                 )
                 embed.add_field(
                     name=f"{streamEmoji} Title:",
-                    value=stream.title or "No stream title found",
+                    value=status.title or "No stream title found",
                     inline=False
                 )
                 embed.add_field(
                     name=f"{controllerEmoji} Game:",
-                    value=stream.game_name or "Unknown",
+                    value=status.game_name or "Unknown",
                     inline=False
                 )
                 embed.add_field(
                     name=f"{personEmoji} Watch Now:",
-                    value=f"https://twitch.tv/{user.login}",
+                    value=f"https://twitch.tv/{status.login}",
                     inline=False
                 )
-                embed.set_thumbnail(url=stream.thumbnail_url.replace("{width}", "320").replace("{height}", "180"))
+                if status.thumbnail():
+                    embed.set_thumbnail(url=status.thumbnail())
 
             else:
                 embed = discord.Embed(
-                    title=f"🩷 {user.display_name} is OFFLINE",
-                    url=f"https://twitch.tv/{user.login}",
+                    title=f"🩷 {status.display_name} is OFFLINE",
+                    url=f"https://twitch.tv/{status.login}",
                     color=discord.Color.greyple()
                 )
 
@@ -192,7 +256,6 @@ class TwitchCog(commands.Cog):
     async def removenotification(self, interaction: discord.Interaction):
         await interaction.response.defer()
         try:
-            from psql import execute
             twitch = get_twitch()
             user = await first(twitch.get_users(logins=["cocoakissies"]))
             if not user or not user.id:
@@ -213,9 +276,10 @@ class TwitchCog(commands.Cog):
                 str(user.id),
                 interaction.guild.id
             )
+            await get_routing().remove(str(user.id), interaction.guild.id)
             subs = await twitch.get_eventsub_subscriptions()
             for sub in subs.data:
-                if sub.type in ('stream.online', 'stream.offline') and sub.condition.get('broadcaster_user_id') == user.id:
+                if sub.type in ('stream.online', 'stream.offline', 'channel.update') and sub.condition.get('broadcaster_user_id') == user.id:
                     await twitch.delete_eventsub_subscription(sub.id)
             await interaction.followup.send(f"✅ Removed notifications for {user.display_name}.", ephemeral=False)
 
@@ -232,9 +296,6 @@ class TwitchCog(commands.Cog):
         await interaction.response.defer()
         
         try:
-            from helpers.constants import get_eventsub
-            from helpers.helpers import handle_stream_offline, handle_stream_online
-            from psql import execute
             user = await first(get_twitch().get_users(logins=[twitch_username]))
             """
             Example response:
@@ -286,6 +347,7 @@ class TwitchCog(commands.Cog):
                 channel.id,
                 interaction.guild.id,
             )
+            await get_routing().add(str(broadcaster_id), interaction.guild.id, channel.id, role.id)
             
             await get_eventsub().listen_stream_online(
                 broadcaster_user_id=broadcaster_id,
@@ -295,6 +357,10 @@ class TwitchCog(commands.Cog):
                 broadcaster_user_id=broadcaster_id,
                 callback=handle_stream_offline
             )
+            await get_eventsub().listen_channel_update(
+                broadcaster_user_id=broadcaster_id,
+                callback=handle_channel_update
+            )
             
             await interaction.followup.send(f"Notifications for {twitch_name} setup successfully.", ephemeral=False)
             
@@ -307,7 +373,6 @@ class TwitchCog(commands.Cog):
     async def liststreamers(self, interaction: discord.Interaction):
         await interaction.response.defer()
         try:
-            from psql import fetch
             rows = await fetch(
                 "SELECT twitch_name, twitch_link FROM notification WHERE guild_id = $1",
                 interaction.guild.id
@@ -333,10 +398,7 @@ class TwitchCog(commands.Cog):
     async def alert(self, interaction: discord.Interaction):
         await interaction.response.defer()
         try:
-            from helpers.constants import get_twitch, get_cocoasguild
-            from psql import fetchrow, execute
             twitch = get_twitch()
-            cocoasguild = get_cocoasguild()
             user = await first(twitch.get_users(logins=["cocoakissies"]))
             if not user:
                 await interaction.followup.send("❌ Twitch user not found.", ephemeral=True)
@@ -362,17 +424,12 @@ class TwitchCog(commands.Cog):
                     return 
                 
                 # Set to false so the next stream.online event can register correctly.
-                await execute(
-                    "UPDATE notification SET is_live = FALSE WHERE broadcaster_id = $1 AND guild_id = $2",
-                    broadcaster_id,
-                    guild_id
-                )
+                await get_routing().transition(broadcaster_id, False)
                 
                 # Prepare embed
-                cocoasguild = get_cocoasguild()
-                streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else '🎬'
-                personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else '🩷'
-                controllerEmoji = discord.utils.get(self.bot.emojis, name="cocoascontroller") or '🎮'
+                streamEmoji = get_emoji("cocoaLicense")
+                personEmoji = get_emoji("cocoaLove")
+                controllerEmoji = get_emoji("cocoascontroller")
 
                 embed = discord.Embed(
                     title=f"🩷 {user.display_name} is LIVE",
@@ -423,16 +480,20 @@ class TwitchCog(commands.Cog):
             
     @app_commands.command(name="clips", description="Get cocoakissies latest clips!")
     @is_whitelisted()
-    @app_commands.describe(features="Featured clips (optional, default NONE): True, False, or None")
-    @app_commands.autocomplete(features=features_autocomplete)
-    async def clips(self, interaction: discord.Interaction, features: str = "none"):
+    @app_commands.describe(
+        features="Featured clips (optional, default NONE): True, False, or None",
+        streamer="Streamer to look up (default cocoakissies), or all tracked streamers"
+    )
+    @app_commands.autocomplete(features=features_autocomplete, streamer=tracked_streamer_autocomplete)
+    async def clips(self, interaction: discord.Interaction, features: str = "none", streamer: str = None):
         await interaction.response.defer()
         
         try:
             twitch = get_twitch()
-            user = await first(twitch.get_users(logins=["cocoakissies"]))
-            if not user.id or not user.login:
-                await interaction.followup.send("Twitch user not found.", ephemeral=True)
+            all_tracked = is_all_tracked(streamer)
+            users = await self.resolve_streamers(interaction, streamer)
+            if not users:
+                await interaction.followup.send(NO_TRACKED_STREAMERS if all_tracked else "Twitch user not found.", ephemeral=True)
                 return
             
             features_type_map = {
@@ -447,7 +508,20 @@ class TwitchCog(commands.Cog):
             
             feature_type = features_type_map.get(features.lower(), None)
             
-            clips = [clip async for clip in twitch.get_clips(broadcaster_id=user.id, first=25, is_featured=feature_type)]
+            # take() stops after one page; iterating the generator would page through every clip.
+            results = await helix.gather_limited(
+                helix.take(twitch.get_clips(broadcaster_id=user.id, first=25, is_featured=feature_type), 25) for user in users
+            )
+            clips = []
+            for user, result in zip(users, results):
+                if isinstance(result, Exception):
+                    if not all_tracked:
+                        raise result
+                    logger.warning(f"Could not fetch clips for {user.login}: {result}")
+                    continue
+                clips.extend(result)
+            if all_tracked:
+                clips = sorted(clips, key=lambda clip: clip.view_count or 0, reverse=True)[:25]
             
             # Set display type
             if features.lower() == "none":
@@ -458,17 +532,24 @@ class TwitchCog(commands.Cog):
                 type_display = "Non-Featured"
             
             if not clips:
-                await interaction.followup.send(f"No clips found for {user.display_name} with features type {type_display}.", ephemeral=False)
+                who = "the tracked streamers" if all_tracked else users[0].display_name
+                await interaction.followup.send(f"No clips found for {who} with features type {type_display}.", ephemeral=False)
                 return
             
-            cocoasguild = get_cocoasguild()
-            streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else '🎬'
-            bobaEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaBoba") if cocoasguild else '🧋'
-            personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else '🩷'
-            sparkles = discord.utils.get(cocoasguild.emojis, name="sparkles") if cocoasguild else '✨'
-            caught = discord.utils.get(cocoasguild.emojis, name="cocoaCaughtIn4K") if cocoasguild else '👀'
-            cokeEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLargeCoke") if cocoasguild else '🥤'
-            controllerEmoji = discord.utils.get(self.bot.emojis, name="cocoascontroller") or '🎮'
+            # One Get Games call for every clip instead of one per clip
+            try:
+                games = await helix.get_game_names(twitch, (clip.game_id for clip in clips))
+            except Exception as e:
+                logger.warning(f"Could not fetch clip games: {e}")
+                games = {}
+            
+            streamEmoji = get_emoji("cocoaLicense")
+            bobaEmoji = get_emoji("cocoaBoba")
+            personEmoji = get_emoji("cocoaLove")
+            sparkles = get_emoji("sparkles")
+            caught = get_emoji("cocoaCaughtIn4K")
+            cokeEmoji = get_emoji("cocoaLargeCoke")
+            controllerEmoji = get_emoji("cocoascontroller")
             
             pages = []
             for clip in clips:
@@ -481,12 +562,7 @@ class TwitchCog(commands.Cog):
                 
                 embed.add_field(name=f"{streamEmoji} Title", value=clip.title or "No title", inline=False)
                 
-                try:
-                    game = await first(twitch.get_games(game_ids=[clip.game_id])) if clip.game_id else None
-                except:
-                    game = None
-                
-                embed.add_field(name=f"{controllerEmoji} Game", value=game.name if game else "Unknown", inline=False)
+                embed.add_field(name=f"{controllerEmoji} Game", value=games.get(clip.game_id, "Unknown"), inline=False)
                 
                 embed.add_field(name=f"{bobaEmoji} Views", value=f"{clip.view_count:,}" if clip.view_count else "0", inline=True)
                 
@@ -505,7 +581,6 @@ class TwitchCog(commands.Cog):
                 
                 pages.append(embed)
                 
-            from handlers.buttons import PaginatorEmbedView
             view = PaginatorEmbedView(interaction, pages)
             await interaction.followup.send(embed=pages[0], view=view, ephemeral=False)
         except Exception as e:
@@ -514,17 +589,21 @@ class TwitchCog(commands.Cog):
                 
     @app_commands.command(name="videos", description="Get cocoakissies latest video's!")
     @is_whitelisted()
-    @app_commands.describe(type="Video type (optional, default ALL): archive (VOD's), highlight, upload")
-    @app_commands.autocomplete(type=video_types_autocomplete)
-    async def videos(self, interaction: discord.Interaction, type: str = "all"):
+    @app_commands.describe(
+        type="Video type (optional, default ALL): archive (VOD's), highlight, upload",
+        streamer="Streamer to look up (default cocoakissies), or all tracked streamers"
+    )
+    @app_commands.autocomplete(type=video_types_autocomplete, streamer=tracked_streamer_autocomplete)
+    async def videos(self, interaction: discord.Interaction, type: str = "all", streamer: str = None):
         await interaction.response.defer()
         
         try:
             twitch = get_twitch()
-            user = await first(twitch.get_users(logins=["cocoakissies"]))
+            all_tracked = is_all_tracked(streamer)
+            users = await self.resolve_streamers(interaction, streamer)
             
-            if not user.id or not user.login:
-                await interaction.followup.send("Twitch user not found.", ephemeral=True)
+            if not users:
+                await interaction.followup.send(NO_TRACKED_STREAMERS if all_tracked else "Twitch user not found.", ephemeral=True)
                 return
             
             # Convert string to VideoType enum
@@ -542,26 +621,38 @@ class TwitchCog(commands.Cog):
             video_type = video_type_map.get(type.lower(), VideoType.ALL)
             
             # Get videos
-            videos = [video async for video in twitch.get_videos(user_id=user.id, first=25, video_type=video_type)]
+            results = await helix.gather_limited(
+                helix.take(twitch.get_videos(user_id=user.id, first=25, video_type=video_type), 25) for user in users
+            )
+            videos = []
+            for user, result in zip(users, results):
+                if isinstance(result, Exception):
+                    if not all_tracked:
+                        raise result
+                    logger.warning(f"Could not fetch videos for {user.login}: {result}")
+                    continue
+                videos.extend(result)
+            if all_tracked:
+                videos = sorted(videos, key=lambda video: video.created_at, reverse=True)[:25]
             
             if not videos:
-                await interaction.followup.send(f"No videos found for {user.display_name} of type {type}.", ephemeral=False)
+                who = "the tracked streamers" if all_tracked else users[0].display_name
+                await interaction.followup.send(f"No videos found for {who} of type {type}.", ephemeral=False)
                 return
             
             # Store emojis for use
-            cocoasguild = get_cocoasguild()
-            streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else '🎬'
-            bobaEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaBoba") if cocoasguild else '🧋'
-            personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else '🩷'
-            sparkles = discord.utils.get(cocoasguild.emojis, name="sparkles") if cocoasguild else '✨'
-            caught = discord.utils.get(cocoasguild.emojis, name="cocoaCaughtIn4K") if cocoasguild else '👀'
-            controllerEmoji = discord.utils.get(self.bot.emojis, name="cocoascontroller") or '🎮'
+            streamEmoji = get_emoji("cocoaLicense")
+            bobaEmoji = get_emoji("cocoaBoba")
+            personEmoji = get_emoji("cocoaLove")
+            sparkles = get_emoji("sparkles")
+            caught = get_emoji("cocoaCaughtIn4K")
+            controllerEmoji = get_emoji("cocoascontroller")
 
             # Create embeds for each video
             pages = []
             for video in videos:
                 embed = discord.Embed(
-                    title=f"🩷 {user.display_name}'s Videos",
+                    title=f"🩷 {video.user_name}'s Videos",
                     description=f"Showing {type}",
                     url=video.url,
                     color=discord.Color(value=0xf8e7ef)
@@ -594,7 +685,6 @@ class TwitchCog(commands.Cog):
                 
                 pages.append(embed)
             
-            from handlers.buttons import PaginatorEmbedView
             view = PaginatorEmbedView(interaction, pages)
             await interaction.followup.send(embed=pages[0], view=view, ephemeral=False)
                 
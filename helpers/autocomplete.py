@@ -3,6 +3,7 @@ from helpers.constants import (
     get_tree
 )
 from psql import fetch
+from helpers.timeutil import sorted_timezones
 
 async def command_autocomplete(interaction: Interaction, current: str) -> list[app_commands.Choice[str]]:
     tree = get_tree()
@@ -23,29 +24,41 @@ async def streamer_autocomplete(interaction: Interaction, current: str) -> list[
     
     try:
         rows = await fetch(
-            "SELECT twitch_name FROM notification WHERE guild_id = $1",
+            "SELECT twitch_name, twitch_link FROM notification WHERE guild_id = $1",
             interaction.guild.id
         )
     except Exception:
         return []  # Return empty list if DB error
 
-    options = [
-        app_commands.Choice(name=row["twitch_name"], value=row["twitch_name"])
-        for row in rows if current.lower() in row["twitch_name"].lower()
-    ]
+    # twitch_name is the display name; the commands look streamers up by login, which is the end of twitch_link.
+    current = current.lower()
+    options = []
+    for row in rows:
+        login = row["twitch_link"].rstrip("/").rsplit("/", 1)[-1]
+        if current in row["twitch_name"].lower() or current in login.lower():
+            options.append(app_commands.Choice(name=row["twitch_name"], value=login))
 
     return options[:25]
 
+# Value of the "every streamer tracked in this server" choice
+ALL_TRACKED = "all"
+
+async def tracked_streamer_autocomplete(interaction: Interaction, current: str) -> list[app_commands.Choice[str]]:
+    choices = []
+    if current.lower() in "all tracked streamers":
+        choices.append(app_commands.Choice(name="All tracked streamers", value=ALL_TRACKED))
+    return (choices + await streamer_autocomplete(interaction, current))[:25]
+
 async def timezone_autocomplete(interaction: Interaction, current: str) -> list[app_commands.Choice[str]]:
-    import pytz
-    all_timezones = pytz.all_timezones
+    current = current.lower()
+    choices = []
+    for tz, lowered in sorted_timezones():
+        if current in lowered:
+            choices.append(app_commands.Choice(name=tz, value=tz))
+            if len(choices) == 25:
+                break
     
-    filtered = [tz for tz in all_timezones if current.lower() in tz.lower()]
-    
-    return [
-        app_commands.Choice(name=tz, value=tz)
-        for tz in filtered[:25]
-    ]
+    return choices
     
 async def video_types_autocomplete(interaction: Interaction, current: str) -> list[app_commands.Choice[str]]:
     types = {
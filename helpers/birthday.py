@@ -1,16 +1,40 @@
-from psql import fetch, fetchrow
+from psql import fetch, fetchval, execute
 from handlers.logger import logger
-from datetime import datetime
-import pytz
+from helpers.constants import get_emoji, get_guild_configs
+from helpers.timeutil import get_zone, utcnow
+from helpers.sharding import owns_guild, shard_group
+from helpers.members import get_members
 import discord
 
+# Records the last UTC hour whose birthdays were checked; the row only changes when the
+# stored hour is older, so a restart or leader failover can't announce an hour twice.
+CLAIM_HOUR_SQL = """
+    INSERT INTO bot_meta (key, value) VALUES ($1, $2)
+    ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP
+    WHERE bot_meta.value < EXCLUDED.value
+    RETURNING key
+"""
+
+def birthday_hour_key() -> str:
+    # Each shard group has its own leader announcing its own guilds, so each claims the hour separately.
+    return f"birthday_check_hour:{shard_group()}"
+
+async def claim_birthday_hour(now) -> bool:
+    return await fetchval(CLAIM_HOUR_SQL, birthday_hour_key(), now.strftime("%Y-%m-%dT%H")) is not None
+
+async def release_birthday_hour(now):
+    """Undo claim_birthday_hour() after a failed check so the hour can be claimed again."""
+    await execute("DELETE FROM bot_meta WHERE key = $1 AND value = $2", birthday_hour_key(), now.strftime("%Y-%m-%dT%H"))
+
 async def check_birthdays(bot):
-    utc_now = datetime.now()
+    utc_now = utcnow()
     hits = await fetch("""
         SELECT * FROM birthday_user
     """)
     
     birthday_hits = []
+    # Most users share a handful of zones, so work out each zone's local date and hour once.
+    local_now = {}
     
     for row in hits:
         guild_id = row['guild_id']
@@ -18,15 +42,22 @@ async def check_birthdays(bot):
         birthdate = row['birthdate']
         timezone_str = row['timezone']
         
-        try:
-            tz = pytz.timezone(timezone_str)
-        except pytz.UnknownTimeZoneError:
+        # Guilds on shards run by another process are announced there
+        if not owns_guild(bot, guild_id):
+            continue
+        
+        if timezone_str not in local_now:
+            tz = get_zone(timezone_str)
+            if tz is None:
+                local_now[timezone_str] = None
+            else:
+                user_now = utc_now.astimezone(tz)
+                local_now[timezone_str] = (user_now.strftime("%m-%d"), user_now.hour)
+        if local_now[timezone_str] is None:
             logger.warning(f"Unknown timezone for user {user_id} in guild {guild_id}: {timezone_str}")
             continue
         
-        user_now = utc_now.replace(tzinfo=pytz.utc).astimezone(tz)
-        today_str = user_now.strftime("%m-%d")
-        hour_now = user_now.hour
+        today_str, hour_now = local_now[timezone_str]
         
         if today_str == birthdate and hour_now == 0:
             guild = bot.get_guild(guild_id)
@@ -42,7 +73,6 @@ async def check_birthdays(bot):
         return None
     
 async def announce_birthday(bot, hits):
-    from discord import Forbidden, HTTPException, NotFound
     guild_birthdays = {}
     
     for bd in hits:
@@ -64,42 +94,40 @@ async def announce_birthday(bot, hits):
             continue
         
         # get guild config
-        config = await fetchrow("""
-            SELECT * FROM birthday_guild WHERE guild_id = $1
-        """,
-            guild_id
-        )
+        config = await get_guild_configs().get_birthday(guild_id)
+        if not config:
+            continue
+        
+        # the channel was deleted and setup hasn't been run again.
+        if config.channel_id is None:
+            logger.warning(f"Guild {guild_id} has no birthday channel set, skipping {len(users)} birthday(s)")
+            continue
         
         # check if the channel has been deleted.
-        channel = guild.get_channel(config['channel_id'])
+        channel = guild.get_channel(config.channel_id)
         if not channel:
             continue
         
         # check if the role has been deleted.
         role_mention = ""
-        if config['role_id']:
-            role = guild.get_role(config['role_id'])
+        if config.role_id:
+            role = guild.get_role(config.role_id)
             if role:
                 role_mention = role.mention
-        from helpers.constants import get_cocoasguild
-        cocoasguild = get_cocoasguild()
-        personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else ''
+        personEmoji = get_emoji("cocoaLove")
         # build the embed
         embed = discord.Embed(
             title=f"{personEmoji} Today is the following user(s) birthdays!",
             color=discord.Color.gold()
         )
         
+        members = await get_members(guild, [user['user_id'] for user in users])
         for user in users:
             user_id = user['user_id']
-            member = guild.get_member(user_id)
+            member = members.get(user_id)
             if member is None:
-                try:
-                    # doesn't require server member intents but can be rate limited and slower
-                    member = await guild.fetch_member(user_id)
-                except (Forbidden, HTTPException, NotFound):
-                    logger.warning(f"Could not find member {user_id} in guild {guild_id}")
-                    continue  # skip this user if they can't be fetched
+                logger.warning(f"Could not find member {user_id} in guild {guild_id}")
+                continue  # skip this user if they can't be fetched
             
             line = f"{member.mention}"
                 
@@ -110,7 +138,7 @@ async def announce_birthday(bot, hits):
             )
             
         embed.set_footer(text="Happy Birthday!!!")
-        embed.timestamp = datetime.now()
+        embed.timestamp = utcnow()
         await channel.send(
             content=role_mention if role_mention else None,
             embed=embed
@@ -0,0 +1,99 @@
+"""
+    Bulk birthday import/export for /importbirthdays and /exportbirthdays. Imports are
+    COPYed into a temp table and merged into birthday_user in one transaction; exports
+    are read through a server-side cursor so large guilds aren't loaded in one go.
+"""
+import csv
+import io
+from psql import get_pool
+from helpers.birthdayparser import parse
+from helpers.timeutil import is_valid_timezone
+
+CSV_COLUMNS = ("user_id", "birthdate", "timezone")
+MAX_IMPORT_BYTES = 2_000_000
+MAX_REPORTED_ERRORS = 10
+EXPORT_PREFETCH = 500
+
+IMPORT_TABLE_SQL = """
+    CREATE TEMP TABLE birthday_import (
+        user_id BIGINT NOT NULL,
+        birthdate TEXT NOT NULL,
+        timezone TEXT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+MERGE_SQL = """
+    INSERT INTO birthday_user (guild_id, user_id, birthdate, timezone)
+    SELECT $1, user_id, birthdate, timezone FROM birthday_import
+    ON CONFLICT (guild_id, user_id)
+"""
+MERGE_OVERWRITE_SQL = MERGE_SQL + """
+    DO UPDATE SET birthdate = EXCLUDED.birthdate,
+                  timezone = EXCLUDED.timezone,
+                  last_updated = CURRENT_TIMESTAMP
+"""
+MERGE_KEEP_SQL = MERGE_SQL + "DO NOTHING"
+
+EXPORT_SQL = """
+    SELECT user_id, birthdate, timezone
+    FROM birthday_user
+    WHERE guild_id = $1
+    ORDER BY birthdate
+"""
+
+def parse_csv(data: bytes):
+    """
+        Parse `user_id,birthdate,timezone` rows (header optional; user ids may be
+        mentions). Returns (records, errors) where errors are (line, message) pairs.
+        A user listed twice keeps their last row.
+    """
+    records = {}
+    errors = []
+    text = data.decode("utf-8-sig")
+    for line, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if line == 1 and row[0].strip().lower() == CSV_COLUMNS[0]:
+            continue
+        if len(row) < 3:
+            errors.append((line, "expected user_id, birthdate, timezone"))
+            continue
+        user_id, birthdate, timezone = (cell.strip() for cell in row[:3])
+        try:
+            user_id = int(user_id.strip("<@!>"))
+        except ValueError:
+            errors.append((line, f"`{user_id}` isn't a user id"))
+            continue
+        try:
+            birthdate = parse(birthdate)
+        except ValueError:
+            errors.append((line, f"`{birthdate}` isn't a birthday"))
+            continue
+        if not is_valid_timezone(timezone):
+            errors.append((line, f"`{timezone}` isn't a timezone"))
+            continue
+        records[user_id] = (user_id, birthdate, timezone)
+    return list(records.values()), errors
+
+async def import_birthdays(guild_id: int, records, overwrite: bool = False) -> int:
+    """Merge parsed records into birthday_user. Returns how many rows were written."""
+    if not records:
+        return 0
+    async with get_pool().acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(IMPORT_TABLE_SQL)
+            await conn.copy_records_to_table("birthday_import", records=records, columns=CSV_COLUMNS)
+            status = await conn.execute(MERGE_OVERWRITE_SQL if overwrite else MERGE_KEEP_SQL, guild_id)
+    # Status is "INSERT 0 <rows>".
+    return int(status.split()[-1])
+
+async def export_birthdays(guild_id: int) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async with get_pool().acquire() as conn:
+        # Cursors only live inside a transaction.
+        async with conn.transaction():
+            async for row in conn.cursor(EXPORT_SQL, guild_id, prefetch=EXPORT_PREFETCH):
+                writer.writerow((row["user_id"], row["birthdate"], row["timezone"]))
+    return buffer.getvalue().encode("utf-8")
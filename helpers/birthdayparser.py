@@ -1,32 +1,44 @@
+import calendar
 import re
-from datetime import datetime
+
+# Compiled once; parse() runs per row on bulk imports.
+_NUMERIC = re.compile(r'^(\d{1,2})[-/](\d{1,2})$')
+_OF = re.compile(r'\bof\b')
+_ORDINAL = re.compile(r'(\d+)(st|nd|rd|th)')
+_MONTH_DAY = re.compile(r'^([a-z]+)\s+(\d{1,2})$')
+_DAY_MONTH = re.compile(r'^(\d{1,2})\s+([a-z]+)$')
+
+_MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+# Birthdays have no year, so February 29th is allowed.
+_DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+def _format(month: int, day: int) -> str:
+    if not 1 <= month <= 12 or not 1 <= day <= _DAYS_IN_MONTH[month]:
+        raise ValueError(f"❌ `{month:02d}-{day:02d}` isn't a real date.")
+    return f"{month:02d}-{day:02d}"
 
 def parse(input_str: str) -> str:
     input_str = input_str.strip().lower()
-    
-    input_str = re.sub(r'\bof\b', '', input_str, flags=re.IGNORECASE).strip()
-    
-    cleaned_input = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', input_str, flags=re.IGNORECASE)
-    
-    # Try MM-DD or MM/DD first
-    match = re.match(r'^(\d{1,2})[-/](\d{1,2})$', cleaned_input)
+
+    # Fast path: already MM-DD or MM/DD, which is what imports and exports use.
+    match = _NUMERIC.match(input_str)
     if match:
-        month = int(match.group(1))
-        day = int(match.group(2))
-        return f"{month:02d}-{day:02d}"
+        return _format(int(match.group(1)), int(match.group(2)))
+
+    cleaned_input = _ORDINAL.sub(r'\1', _OF.sub('', input_str).strip())
+
+    match = _NUMERIC.match(cleaned_input)
+    if match:
+        return _format(int(match.group(1)), int(match.group(2)))
 
     # Now try Month Day
-    try:
-        parsed = datetime.strptime(cleaned_input, "%B %d")
-        return f"{parsed.month:02d}-{parsed.day:02d}"
-    except ValueError:
-        pass
+    match = _MONTH_DAY.match(cleaned_input)
+    if match and match.group(1) in _MONTHS:
+        return _format(_MONTHS[match.group(1)], int(match.group(2)))
 
     # Try Day Month (reverse)
-    try:
-        parsed = datetime.strptime(cleaned_input, "%d %B")
-        return f"{parsed.month:02d}-{parsed.day:02d}"
-    except ValueError:
-        pass
-    
-    return f"{month:02d}-{day:02d}"
\ No newline at end of file
+    match = _DAY_MONTH.match(cleaned_input)
+    if match and match.group(2) in _MONTHS:
+        return _format(_MONTHS[match.group(2)], int(match.group(1)))
+
+    raise ValueError(f"❌ Couldn't read `{input_str}` as a birthday. Try something like `03-14` or `March 14th`.")
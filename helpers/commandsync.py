@@ -0,0 +1,61 @@
+import hashlib
+import json
+import discord
+from discord import app_commands
+from handlers.logger import logger
+from psql import fetchval, execute
+from helpers.constants import (
+    COMMAND_SYNC_SCOPE,
+    COMMAND_SYNC_FORCE,
+    WHITELISTED_GUILD_IDS
+)
+
+HASH_KEY = "command_tree_hash"
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """Stable digest of what a sync would upload, including where it would go."""
+    payload = {
+        "scope": COMMAND_SYNC_SCOPE,
+        "guilds": sorted(WHITELISTED_GUILD_IDS) if COMMAND_SYNC_SCOPE == "guild" else [],
+        "commands": sorted(
+            (command.to_dict(tree) for command in tree.get_commands()),
+            key=lambda c: (c.get("type", 1), c["name"])
+        )
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+async def sync_commands(tree: app_commands.CommandTree) -> bool:
+    """
+        Upload the command tree only if it changed since the last sync. With
+        COMMAND_SYNC_SCOPE=guild the commands are registered per whitelisted guild,
+        which Discord applies immediately, and the global set is cleared.
+    """
+    digest = command_tree_hash(tree)
+    stored = await fetchval("SELECT value FROM bot_meta WHERE key = $1", HASH_KEY)
+    if stored == digest and not COMMAND_SYNC_FORCE:
+        logger.info(f"Command tree unchanged ({digest[:12]}), skipping sync")
+        return False
+
+    if COMMAND_SYNC_SCOPE == "guild":
+        for guild_id in WHITELISTED_GUILD_IDS:
+            guild = discord.Object(id=guild_id)
+            tree.copy_global_to(guild=guild)
+            synced = await tree.sync(guild=guild)
+            logger.info(f"Synced {len(synced)} commands to guild {guild_id}")
+        # The guild copies keep dispatching; drop the global registrations so they don't show twice.
+        tree.clear_commands(guild=None)
+        await tree.sync()
+    else:
+        synced = await tree.sync()
+        logger.info(f"Synced {len(synced)} global commands")
+
+    await execute("""
+        INSERT INTO bot_meta (key, value)
+        VALUES ($1, $2)
+        ON CONFLICT (key)
+        DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP
+    """,
+        HASH_KEY,
+        digest
+    )
+    return True
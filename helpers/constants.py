@@ -12,6 +12,36 @@ PUBLIC_URL = os.getenv("PUBLIC_URL")
 DATABASE_URL = os.getenv("DATABASE_URL")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 OAUTH_CALLBACK_URL = os.getenv("OAUTH_CALLBACK_URL")
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", 4))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 10))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 5))
+OUTBOX_METRICS_INTERVAL = float(os.getenv("OUTBOX_METRICS_INTERVAL", 300))
+SUPERVISOR_MAX_IN_FLIGHT = int(os.getenv("SUPERVISOR_MAX_IN_FLIGHT", 32))
+SUPERVISOR_QUEUE_SIZE = int(os.getenv("SUPERVISOR_QUEUE_SIZE", 1000))
+ROUTING_FLUSH_INTERVAL = float(os.getenv("ROUTING_FLUSH_INTERVAL", 1))
+ROUTING_LISTEN = os.getenv("ROUTING_LISTEN", "false").lower() in ("1", "true", "yes")
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", 300))
+RECONCILE_GRACE = float(os.getenv("RECONCILE_GRACE", 120))
+# Only for /status lookups of streamers without notifications; tracked ones are kept current by EventSub
+LIVE_STATUS_TTL = float(os.getenv("LIVE_STATUS_TTL", 120))
+NOTIFY_DELIVERY = os.getenv("NOTIFY_DELIVERY", "bot").lower()
+WEBHOOK_NAME = os.getenv("WEBHOOK_NAME", "cocoabot")
+WEBHOOK_POOL_SIZE = int(os.getenv("WEBHOOK_POOL_SIZE", 20))
+# "embedded" runs the webhook in this process; "relay" takes events from ingest.py via Postgres
+EVENTSUB_MODE = os.getenv("EVENTSUB_MODE", "embedded").lower()
+EVENTSUB_RELAY_BATCH = int(os.getenv("EVENTSUB_RELAY_BATCH", 50))
+EVENTSUB_RELAY_POLL_INTERVAL = float(os.getenv("EVENTSUB_RELAY_POLL_INTERVAL", 5))
+LEADER_HEARTBEAT = float(os.getenv("LEADER_HEARTBEAT", 5))
+# Unset runs a single connection; "auto" or a shard count switches to AutoShardedBot.
+# SHARD_IDS (comma separated) picks this process's shards when they're split across processes.
+SHARD_COUNT = os.getenv("SHARD_COUNT", "").strip().lower()
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("SHARD_IDS", "").split(",") if shard_id.strip()]
+SHARD_METRICS_INTERVAL = float(os.getenv("SHARD_METRICS_INTERVAL", 300))
+# "birthdays" only caches members with a registered birthday; "all" chunks every guild at startup
+MEMBER_CACHE = os.getenv("MEMBER_CACHE", "birthdays").lower()
+COMMAND_SYNC_SCOPE = os.getenv("COMMAND_SYNC_SCOPE", "global").lower()
+COMMAND_SYNC_FORCE = os.getenv("COMMAND_SYNC_FORCE", "false").lower() in ("1", "true", "yes")
 
 WHITELISTED_GUILDS = {
     "COCOAS": COCOAS_GUILD_ID,
@@ -19,6 +49,20 @@ WHITELISTED_GUILDS = {
 }
 WHITELISTED_GUILD_IDS = set(WHITELISTED_GUILDS.values())
 
+# Shown in place of a custom emoji the bot can't see
+EMOJI_FALLBACKS = {
+    "cocoaLicense": "🎬",
+    "cocoaLove": "🩷",
+    "cocoaBoba": "🧋",
+    "cocoaShy": "🥺",
+    "cocoaBonk": "🔨",
+    "cocoaMwah": "😘",
+    "cocoaCaughtIn4K": "👀",
+    "cocoaLargeCoke": "🥤",
+    "cocoascontroller": "🎮",
+    "sparkles": "✨",
+}
+
 # Im sick of setting these
 class BotState:
     def __init__(self):
@@ -27,8 +71,19 @@ class BotState:
         self.privateguild = None
         self.twitch = None
         self.eventsub = None
+        self.relay = None
+        self.leader = None
+        self.shard_metrics = None
+        self.outbox = None
+        self.supervisor = None
+        self.routing = None
+        self.reconciler = None
+        self.live_status = None
+        self.webhooks = None
+        self.guild_configs = None
         self.tree = None
         self.user_auth_scope = None
+        self.emojis = {}
 
 # Global instance
 bot_state = BotState()
@@ -51,6 +106,43 @@ def get_twitch():
 def get_eventsub():
     return bot_state.eventsub
 
+def get_relay():
+    return bot_state.relay
+
+def get_leader():
+    return bot_state.leader
+
+def is_leader():
+    # Without an election (single process, bench) everything runs here.
+    return bot_state.leader is None or bot_state.leader.is_leader
+
+def get_shard_metrics():
+    return bot_state.shard_metrics
+
+def get_outbox():
+    return bot_state.outbox
+
+def get_supervisor():
+    return bot_state.supervisor
+
+def get_routing():
+    return bot_state.routing
+
+def get_reconciler():
+    return bot_state.reconciler
+
+def get_live_status():
+    return bot_state.live_status
+
+def get_webhooks():
+    return bot_state.webhooks
+
+def get_guild_configs():
+    return bot_state.guild_configs
+
+def get_emoji(name: str):
+    return bot_state.emojis.get(name) or EMOJI_FALLBACKS.get(name, "")
+
 def get_bot():
     return bot_state.bot
 
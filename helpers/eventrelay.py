@@ -0,0 +1,177 @@
+"""
+    Hands EventSub notifications from the ingest process (ingest.py) to the Discord
+    worker (worker.py) through the eventsub_events table. The ingest side inserts and
+    NOTIFYs in one statement; the worker LISTENs, leases rows with SKIP LOCKED and
+    dispatches them through its EventSubReceiver as when the webhook runs in-process.
+    A row is only deleted once its handler has finished (for stream.online, once the
+    pings are in the outbox), so a worker going away mid-event leaves it for another.
+
+    Each event is handled by one worker, but every worker keeps its own
+    LiveStatusCache, so the cache side of each event (title, category, online and
+    offline) is also broadcast on BROADCAST_CHANNEL and applied by all of them.
+"""
+import asyncio
+import json
+from datetime import datetime
+from handlers.logger import logger
+from psql import get_pool, execute, fetch
+from helpers.eventsub import EventSubReceiver
+from helpers.livestatus import LiveStatusCache
+from helpers.constants import (
+    EVENTSUB_RELAY_BATCH,
+    EVENTSUB_RELAY_POLL_INTERVAL
+)
+
+NOTIFY_CHANNEL = "eventsub_events"
+BROADCAST_CHANNEL = "eventsub_broadcast"
+
+STORE_SQL = """
+    WITH stored AS (
+        INSERT INTO eventsub_events (message_id, sub_type, payload)
+        VALUES ($1, $2, $3::jsonb)
+        ON CONFLICT (message_id) DO NOTHING
+        RETURNING id
+    )
+    SELECT pg_notify($4, id::text), pg_notify($5, $6) FROM stored
+"""
+
+# A claimed event is hidden from other workers for this long, then handed out again.
+# Handling one twice is harmless: the go-live transition only succeeds once.
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 5
+
+CLAIM_SQL = """
+    UPDATE eventsub_events
+    SET attempts = attempts + 1,
+        available_at = now() + make_interval(secs => $2::float8)
+    WHERE id IN (
+        SELECT id FROM eventsub_events
+        WHERE available_at <= now()
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+        LIMIT $1
+    )
+    RETURNING id, payload, attempts
+"""
+
+COMPLETE_SQL = "DELETE FROM eventsub_events WHERE id = $1"
+
+async def store(data: dict):
+    """EventSubReceiver sink for the ingest process."""
+    metadata = data["metadata"]
+    sub_type = metadata["subscription_type"] or ""
+    # Just the event, well under NOTIFY's 8000 byte payload limit.
+    broadcast = json.dumps({"type": sub_type, "event": data.get("event", {})})
+    await execute(STORE_SQL, metadata["message_id"], sub_type, json.dumps(data), NOTIFY_CHANNEL, BROADCAST_CHANNEL, broadcast)
+
+class EventRelay:
+    def __init__(self, receiver: EventSubReceiver, live_status: LiveStatusCache | None = None, batch_size: int = EVENTSUB_RELAY_BATCH, poll_interval: float = EVENTSUB_RELAY_POLL_INTERVAL):
+        self.receiver = receiver
+        self.live_status = live_status
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._listen_conn = None
+        self._task = None
+        self._pending = set()
+        self.relayed = 0
+
+    async def start(self):
+        self._listen_conn = await get_pool().acquire()
+        await self._listen_conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        await self._listen_conn.add_listener(BROADCAST_CHANNEL, self._on_broadcast)
+        # Anything stored while no worker was running is picked up on the first pass.
+        self._wake.set()
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Relaying EventSub events from {NOTIFY_CHANNEL}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Let events already handed to the supervisor finish; any still running after
+        # that stay leased and go to whichever worker claims them next.
+        if self._pending:
+            await asyncio.wait(self._pending, timeout=30)
+        if self._listen_conn is not None:
+            await self._listen_conn.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+            await self._listen_conn.remove_listener(BROADCAST_CHANNEL, self._on_broadcast)
+            await get_pool().release(self._listen_conn)
+            self._listen_conn = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._wake.set()
+
+    def _on_broadcast(self, connection, pid, channel, payload):
+        if self.live_status is None:
+            return
+        try:
+            message = json.loads(payload)
+            event = message["event"]
+            broadcaster_id = event["broadcaster_user_id"]
+            login = event["broadcaster_user_login"]
+            name = event["broadcaster_user_name"]
+            if message["type"] == "stream.online":
+                self.live_status.set_online(broadcaster_id, login, name, datetime.fromisoformat(event["started_at"]))
+            elif message["type"] == "stream.offline":
+                self.live_status.set_offline(broadcaster_id, login, name)
+            elif message["type"] == "channel.update":
+                self.live_status.update_channel(broadcaster_id, login, name, event["title"], event["category_name"])
+        except Exception:
+            logger.exception(f"Could not apply broadcast EventSub event: {payload[:200]}")
+
+    async def drain(self) -> int:
+        """Claim and dispatch everything waiting. Returns how many events were relayed."""
+        count = 0
+        while True:
+            rows = await fetch(CLAIM_SQL, self.batch_size, float(LEASE_SECONDS))
+            for row in sorted(rows, key=lambda r: r["id"]):
+                await self._dispatch(row)
+            count += len(rows)
+            if len(rows) < self.batch_size:
+                break
+        self.relayed += count
+        return count
+
+    async def _dispatch(self, row):
+        try:
+            # stream.online hands its work to the supervisor and returns a future for it
+            result = await self.receiver.dispatch(json.loads(row["payload"]))
+        except Exception:
+            logger.exception(f"Error dispatching relayed EventSub event {row['id']}")
+            result = False
+        if isinstance(result, asyncio.Future):
+            task = asyncio.create_task(self._settle(row, result))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+        else:
+            await self._settle(row, result)
+
+    async def _settle(self, row, result):
+        ok = await result if isinstance(result, asyncio.Future) else result is not False
+        if not ok and row["attempts"] < MAX_ATTEMPTS:
+            # Handed out again once the lease runs out.
+            logger.warning(f"Relayed EventSub event {row['id']} failed (attempt {row['attempts']}), will retry")
+            return
+        if not ok:
+            logger.error(f"Giving up on relayed EventSub event {row['id']} after {row['attempts']} attempts")
+        try:
+            await execute(COMPLETE_SQL, row["id"])
+        except Exception:
+            logger.exception(f"Could not delete relayed EventSub event {row['id']}")
+
+    async def _loop(self):
+        while True:
+            # The poll is only a safety net for notifications missed while the LISTEN connection was down.
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Could not relay EventSub events")
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from collections import deque
+from datetime import datetime, timedelta
+from helpers.timeutil import utcnow
+from aiohttp import web
+from twitchAPI.twitch import Twitch
+from twitchAPI.type import TwitchAPIException
+from twitchAPI.object.eventsub import StreamOnlineEvent, StreamOfflineEvent, ChannelUpdateEvent
+from handlers.logger import logger
+from helpers import metrics
+
+# Twitch recommends rejecting anything older than this to block replays.
+MAX_MESSAGE_AGE = timedelta(minutes=10)
+
+EVENT_TYPES = {
+    "stream.online": StreamOnlineEvent,
+    "stream.offline": StreamOfflineEvent,
+    "channel.update": ChannelUpdateEvent,
+}
+
+class EventSubReceiver:
+    """
+        EventSub webhook receiver that runs on the bot's own event loop.
+        Requests are verified and acked straight away; the work happens in a
+        consumer task (see start_consumer) that drains an internal queue.
+
+        With a `sink` the receiver only ingests: each verified notification is
+        awaited into the sink (see helpers/eventrelay.py) before the ack, and
+        nothing is dispatched locally.
+    """
+    def __init__(self, twitch: Twitch | None, callback_url: str, secret: str, port: int, host: str = "0.0.0.0", sink=None):
+        self.twitch = twitch
+        self.callback_url = callback_url.rstrip("/")
+        self.secret = secret
+        self.port = port
+        self.host = host
+        self.sink = sink
+        self.queue = asyncio.Queue()
+        # sub type -> (callback, event class); dispatching by type means events for
+        # subscriptions created by a previous process still reach the right handler.
+        self._callbacks = {}
+        self._seen_ids = deque(maxlen=1000)
+        self._seen_set = set()
+        self._runner = None
+        self._consumer = None
+
+    def build_app(self, callback: bool = True):
+        app = web.Application()
+        app.add_routes([
+            web.get("/", self._handle_default),
+            web.get("/metrics", metrics.handle_metrics)
+        ])
+        if callback:
+            app.add_routes([web.post("/callback", self._handle_callback)])
+        return app
+
+    def start_consumer(self):
+        """
+            Start dispatching queued events. Separate from start() so events acked
+            while the handlers' state is still loading wait in the queue.
+        """
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume())
+
+    async def start(self, retries: int = 3, callback: bool = True):
+        """
+            Start the HTTP server; nothing is dispatched until start_consumer().
+            With `callback` False (events arrive some other way) only / and /metrics
+            are served.
+        """
+        self._runner = web.AppRunner(self.build_app(callback), access_log=None)
+        await self._runner.setup()
+        for attempt in range(1, retries + 1):
+            try:
+                await web.TCPSite(self._runner, self.host, self.port).start()
+                break
+            except OSError as e:
+                if attempt == retries:
+                    logger.error(f"Failed to bind EventSub receiver to port {self.port}: {e}")
+                    raise
+                logger.warning(f"Port {self.port} unavailable ({e}), retrying...")
+                await asyncio.sleep(1)
+        logger.info(f"EventSub receiver listening on port {self.port}")
+
+    async def stop(self):
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # Subscriptions
+    async def listen_stream_online(self, broadcaster_user_id: str, callback):
+        return await self._subscribe("stream.online", "1", {"broadcaster_user_id": broadcaster_user_id}, callback, StreamOnlineEvent)
+
+    async def listen_stream_offline(self, broadcaster_user_id: str, callback):
+        return await self._subscribe("stream.offline", "1", {"broadcaster_user_id": broadcaster_user_id}, callback, StreamOfflineEvent)
+
+    async def listen_channel_update(self, broadcaster_user_id: str, callback):
+        return await self._subscribe("channel.update", "2", {"broadcaster_user_id": broadcaster_user_id}, callback, ChannelUpdateEvent)
+
+    def on(self, sub_type: str, callback):
+        """Route events of `sub_type` to `callback` without creating a subscription."""
+        self._callbacks[sub_type] = (callback, EVENT_TYPES[sub_type])
+
+    async def _subscribe(self, sub_type, version, condition, callback, event):
+        self._callbacks[sub_type] = (callback, event)
+        # Twitch answers 409 when the subscription already exists, which is fine here.
+        await self.twitch.create_eventsub_subscription(
+            sub_type,
+            version,
+            condition,
+            {"method": "webhook", "callback": f"{self.callback_url}/callback", "secret": self.secret}
+        )
+
+    async def unsubscribe_all(self):
+        subs = await self.twitch.get_eventsub_subscriptions()
+        async for sub in subs:
+            try:
+                await self.twitch.delete_eventsub_subscription(sub.id)
+            except TwitchAPIException as e:
+                logger.warning(f"Failed to unsubscribe from {sub.id}: {e}")
+
+    # HTTP
+    def verify_signature(self, headers, body: bytes) -> bool:
+        try:
+            message = (headers["Twitch-Eventsub-Message-Id"] + headers["Twitch-Eventsub-Message-Timestamp"]).encode("utf-8") + body
+            expected = headers["Twitch-Eventsub-Message-Signature"]
+        except KeyError:
+            return False
+        signature = "sha256=" + hmac.new(self.secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature, expected)
+
+    def _is_duplicate(self, message_id):
+        if message_id in self._seen_set:
+            return True
+        if len(self._seen_ids) == self._seen_ids.maxlen:
+            self._seen_set.discard(self._seen_ids[0])
+        self._seen_ids.append(message_id)
+        self._seen_set.add(message_id)
+        return False
+
+    def _forget(self, message_id):
+        # Let Twitch's retry through if we failed to take the message.
+        self._seen_set.discard(message_id)
+
+    @staticmethod
+    async def _handle_default(request: web.Request):
+        return web.Response(text="cocoabot EventSub")
+
+    async def _handle_callback(self, request: web.Request):
+        sub_type = request.headers.get("Twitch-Eventsub-Subscription-Type", "unknown")
+        metrics.EVENTSUB_RECEIVED.inc(sub_type)
+        response = await self._process_callback(request)
+        if 200 <= response.status < 300:
+            metrics.EVENTSUB_ACKED.inc(sub_type)
+        return response
+
+    async def _process_callback(self, request: web.Request):
+        body = await request.read()
+        if not self.verify_signature(request.headers, body):
+            logger.warning("EventSub message signature mismatch, discarding")
+            return web.Response(status=403)
+
+        try:
+            sent_at = datetime.fromisoformat(request.headers["Twitch-Eventsub-Message-Timestamp"].replace("Z", "+00:00"))
+            if utcnow() - sent_at > MAX_MESSAGE_AGE:
+                logger.warning("EventSub message is too old, discarding")
+                return web.Response(status=204)
+        except ValueError:
+            return web.Response(status=400)
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            logger.error("EventSub message with malformed body, discarding")
+            return web.Response(status=400)
+
+        msg_type = request.headers.get("Twitch-Eventsub-Message-Type", "").lower()
+        if msg_type == "webhook_callback_verification":
+            logger.info(f"Confirmed EventSub subscription {data.get('subscription', {}).get('id')}")
+            return web.Response(text=data.get("challenge", ""), content_type="text/plain")
+
+        if msg_type == "revocation":
+            sub = data.get("subscription", {})
+            logger.warning(f"EventSub subscription {sub.get('id')} ({sub.get('type')}) revoked: {sub.get('status')}")
+            return web.Response(status=204)
+
+        message_id = request.headers["Twitch-Eventsub-Message-Id"]
+        if self._is_duplicate(message_id):
+            logger.info(f"Duplicate EventSub message {message_id}, discarding")
+            return web.Response(status=204)
+
+        data["metadata"] = {
+            "message_id": message_id,
+            "message_type": msg_type,
+            "message_timestamp": request.headers["Twitch-Eventsub-Message-Timestamp"],
+            "subscription_type": request.headers.get("Twitch-Eventsub-Subscription-Type"),
+            "subscription_version": request.headers.get("Twitch-Eventsub-Subscription-Version"),
+        }
+        if self.sink is None:
+            self.queue.put_nowait(data)
+            return web.Response(status=204)
+        try:
+            await self.sink(data)
+        except Exception:
+            logger.exception(f"Could not store EventSub message {message_id}")
+            self._forget(message_id)
+            # Non-2xx makes Twitch retry the delivery.
+            return web.Response(status=503)
+        return web.Response(status=204)
+
+    # Dispatch
+    async def dispatch(self, data: dict):
+        """Run the handler for one notification and return what it returns."""
+        sub_type = data.get("subscription", {}).get("type")
+        handler = self._callbacks.get(sub_type)
+        if handler is None:
+            logger.warning(f"No handler registered for EventSub type {sub_type}")
+            return None
+        callback, event = handler
+        return await callback(event(**data))
+
+    async def _consume(self):
+        while True:
+            data = await self.queue.get()
+            try:
+                await self.dispatch(data)
+            except Exception:
+                logger.exception("Error dispatching EventSub event")
+            finally:
+                self.queue.task_done()
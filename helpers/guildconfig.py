@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from handlers.logger import logger
+from psql import fetch, fetchrow, execute
+
+@dataclass(slots=True)
+class BirthdayGuildConfig:
+    guild_id: int
+    channel_id: int | None
+    role_id: int | None = None
+
+class GuildConfigCache:
+    """
+        Copy of birthday_guild keyed by guild id. Preloaded at startup and kept in step
+        by save_birthday() and the channel/role delete listeners, which clear the
+        deleted id in both places; with no channel, birthdays aren't announced until
+        setup is run again. Guilds the bot leaves are re-read on next use.
+    """
+    def __init__(self):
+        self.birthday = {}
+        self._stale = set()
+
+    async def load(self):
+        rows = await fetch("SELECT guild_id, channel_id, role_id FROM birthday_guild")
+        self.birthday = {row["guild_id"]: BirthdayGuildConfig(row["guild_id"], row["channel_id"], row["role_id"]) for row in rows}
+        self._stale.clear()
+        logger.info(f"Guild config cache loaded: {len(self.birthday)} birthday configs")
+
+    async def get_birthday(self, guild_id: int) -> BirthdayGuildConfig | None:
+        if guild_id in self._stale:
+            self._stale.discard(guild_id)
+            row = await fetchrow("SELECT guild_id, channel_id, role_id FROM birthday_guild WHERE guild_id = $1", guild_id)
+            if row:
+                self.birthday[guild_id] = BirthdayGuildConfig(row["guild_id"], row["channel_id"], row["role_id"])
+            else:
+                self.birthday.pop(guild_id, None)
+        return self.birthday.get(guild_id)
+
+    async def save_birthday(self, guild_id: int, channel_id: int, role_id: int | None, overwrite: bool = False):
+        if overwrite:
+            await execute("""
+                INSERT INTO birthday_guild (guild_id, channel_id, role_id)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (guild_id)
+                DO UPDATE SET channel_id = EXCLUDED.channel_id, role_id = EXCLUDED.role_id
+            """,
+                guild_id,
+                channel_id,
+                role_id
+            )
+        else:
+            await execute("""
+                INSERT INTO birthday_guild (guild_id, channel_id, role_id)
+                VALUES ($1, $2, $3)
+            """,
+                guild_id,
+                channel_id,
+                role_id
+            )
+        self.birthday[guild_id] = BirthdayGuildConfig(guild_id, channel_id, role_id)
+        self._stale.discard(guild_id)
+
+    def invalidate(self, guild_id: int):
+        self._stale.add(guild_id)
+
+    # Listeners
+    async def on_guild_remove(self, guild):
+        self.invalidate(guild.id)
+
+    # Re-reading the row wouldn't help here: it still holds the deleted id.
+    async def on_guild_channel_delete(self, channel):
+        config = self.birthday.get(channel.guild.id)
+        if config and config.channel_id == channel.id:
+            # Nowhere left to announce until the server runs setup again; the role is kept.
+            logger.warning(f"Birthday channel {channel.id} in guild {channel.guild.id} was deleted")
+            await execute("UPDATE birthday_guild SET channel_id = NULL WHERE guild_id = $1 AND channel_id = $2", channel.guild.id, channel.id)
+            config.channel_id = None
+
+    async def on_guild_role_delete(self, role):
+        config = self.birthday.get(role.guild.id)
+        if config and config.role_id == role.id:
+            # Announcements carry on without a role ping.
+            await execute("UPDATE birthday_guild SET role_id = NULL WHERE guild_id = $1 AND role_id = $2", role.guild.id, role.id)
+            config.role_id = None
@@ -0,0 +1,53 @@
+"""
+    Batched and bounded Helix lookups shared by the Twitch commands and background jobs.
+"""
+import asyncio
+from twitchAPI.twitch import Twitch
+
+# Most ids/logins Helix accepts in one Get Users / Get Streams / Get Games call.
+HELIX_BATCH_SIZE = 100
+# Per-broadcaster endpoints (clips, videos, schedule) have no batch form; cap how
+# many run at once so an "all tracked" command doesn't burst the rate limit.
+HELIX_FANOUT = 8
+
+def batches(items, size: int = HELIX_BATCH_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+async def take(generator, limit: int) -> list:
+    """First `limit` items of a paginated Helix generator, without fetching further pages."""
+    items = []
+    if limit <= 0:
+        return items
+    async for item in generator:
+        items.append(item)
+        if len(items) >= limit:
+            break
+    return items
+
+async def get_users(twitch: Twitch, user_ids=(), logins=()) -> list:
+    users = []
+    for batch in batches(user_ids):
+        users.extend([user async for user in twitch.get_users(user_ids=batch)])
+    for batch in batches(logins):
+        users.extend([user async for user in twitch.get_users(logins=batch)])
+    return users
+
+async def get_game_names(twitch: Twitch, game_ids) -> dict:
+    """game id -> name for every id that Helix knows about."""
+    names = {}
+    for batch in batches({game_id for game_id in game_ids if game_id}):
+        async for game in twitch.get_games(game_ids=batch):
+            names[game.id] = game.name
+    return names
+
+async def gather_limited(coros, limit: int = HELIX_FANOUT) -> list:
+    """asyncio.gather with at most `limit` coroutines running at once. Exceptions are returned, not raised."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=True)
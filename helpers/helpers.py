@@ -1,21 +1,32 @@
-import pprint
-from twitchAPI.object.eventsub import StreamOnlineEvent, StreamOfflineEvent
-from twitchAPI.eventsub.webhook import EventSubWebhook
-from twitchAPI.type import AuthScope
+from twitchAPI.object.eventsub import StreamOnlineEvent, StreamOfflineEvent, ChannelUpdateEvent
+from twitchAPI.type import AuthScope as AS
+from twitchAPI.helper import first
 from aiohttp import ClientTimeout
 from handlers.logger import logger
-from threading import Thread
-import uvicorn
 import discord
 import asyncio
+import time
+import logging
 import helpers.constants as constants
+import helpers.profiler as profiler
+from helpers.eventsub import EventSubReceiver
+from helpers.eventrelay import EventRelay
+from helpers.leader import LeaderElection
+from helpers.sharding import ShardMetrics, owns_guild, shard_group
+from helpers.members import warm_birthday_members
+from helpers import metrics
+import helpers.outbox as outbox
+from helpers.supervisor import TaskSupervisor
+from helpers.reconciler import LiveStateReconciler
+from helpers.livestatus import LiveStatusCache
+from helpers.webhooks import WebhookDelivery
+from helpers.routing import RoutingTable
+from helpers.guildconfig import GuildConfigCache
 from twitchAPI.twitch import Twitch
 import handlers.errors as er
 from psql import (
-    fetch, 
     fetchrow, 
-    execute, 
-    fetchval,
+    get_pool,
     init_pool
 )
 from helpers.constants import (
@@ -24,74 +35,122 @@ from helpers.constants import (
     TWITCH_WEBHOOK_SECRET,
     COCOAS_GUILD_ID,
     PRIVATE_GUILD_ID,
-    PUBLIC_URL
+    PUBLIC_URL,
+    NOTIFY_DELIVERY,
+    MEMBER_CACHE,
+    EVENTSUB_MODE
 )
 import os
 
-async def setup(bot):
+async def timed(name, coro):
+    start = time.perf_counter()
+    with profiler.phase(name):
+        result = await coro
+    logger.info(f"Startup step '{name}' took {(time.perf_counter() - start) * 1000:.0f} ms")
+    return result
+
+async def setup(bot, load_cogs):
+    """
+        One-shot startup, run from setup_hook before the gateway connects. Independent
+        steps run concurrently; anything that needs the guild cache lives in on_guild_ready.
+    """
+    start = time.perf_counter()
     
     bot.add_listener(handle_stream_online, name="on_stream_online")
     bot.add_listener(handle_stream_offline, name="on_stream_offline")
+    bot.add_listener(handle_channel_update, name="on_channel_update")
+    bot.add_listener(handle_guild_emojis_update, name="on_guild_emojis_update")
+    bot.add_listener(handle_app_command_completion, name="on_app_command_completion")
+    metrics.install_log_hooks()
     
-    twitch = Twitch(app_id=TWITCH_CLIENT_ID, app_secret=TWITCH_CLIENT_SECRET, session_timeout=ClientTimeout(total=60))
-    await initialize_twitch(twitch)
+    constants.bot_state.bot = bot
+    constants.bot_state.tree = bot.tree
+    er.setup_errors(bot.tree)
+    constants.bot_state.shard_metrics = ShardMetrics(bot)
+    constants.bot_state.shard_metrics.start()
     
-    logger.debug(f"TWITCH_WEBHOOK_SECRET: {TWITCH_WEBHOOK_SECRET} (type: {type(TWITCH_WEBHOOK_SECRET)})")
-    logger.debug(f"twitch: {twitch} (type: {type(twitch)})")
-    logger.info("Twitch object details:\n" + pprint.pformat(vars(twitch), indent=4))
+    # Background work from the stream handlers runs here; start it before events can arrive
+    constants.bot_state.supervisor = TaskSupervisor()
+    constants.bot_state.supervisor.start()
     
+    twitch = Twitch(app_id=TWITCH_CLIENT_ID, app_secret=TWITCH_CLIENT_SECRET, session_timeout=ClientTimeout(total=60))
+    metrics.instrument_twitch(twitch)
+    constants.bot_state.twitch = twitch
+    constants.bot_state.live_status = LiveStatusCache(twitch)
+    # Created before the cogs load so they can register on_elected callbacks
+    leader = constants.bot_state.leader = LeaderElection(group=shard_group())
     webhook_port = int(os.getenv('PORT', 8080))
-    logger.info(f"Setting up EventSub webhook on port {webhook_port}")
+    if EVENTSUB_MODE == "relay":
+        logger.info("EventSub webhook runs in ingest.py, relaying events through Postgres")
+    else:
+        logger.info(f"Setting up EventSub webhook on port {webhook_port}")
     
-    eventsub = EventSubWebhook(
-        callback_url=PUBLIC_URL,
-        port=webhook_port,
-        twitch=twitch,
-        callback_loop=asyncio.get_running_loop()
+    _, _, _, eventsub = await asyncio.gather(
+        timed("database", setup_database(bot)),
+        timed("twitch auth", initialize_twitch(twitch)),
+        timed("cogs", load_cogs()),
+        timed("webhook", create_eventsub(twitch, webhook_port))
     )
+    constants.bot_state.eventsub = eventsub
+    # The webhook acks from the start, but events wait in the queue until the routing table has loaded
+    eventsub.start_consumer()
     
-    if TWITCH_WEBHOOK_SECRET:
-        eventsub._secret = TWITCH_WEBHOOK_SECRET.encode('utf-8') if isinstance(TWITCH_WEBHOOK_SECRET, str) else TWITCH_WEBHOOK_SECRET
-        logger.info("Webhook secret configured")
-    else:
-        logger.error("TWITCH_WEBHOOK_SECRET not found in environment variables!")
-        raise ValueError("TWITCH_WEBHOOK_SECRET is required")
+    if EVENTSUB_MODE == "relay":
+        constants.bot_state.relay = EventRelay(eventsub, constants.get_live_status())
+        await constants.bot_state.relay.start()
     
-    # Start EventSub in background thread with better error handling
-    def start_eventsub_with_retry():
-        max_retries = 3
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                logger.info(f"Starting EventSub webhook (attempt {retry_count + 1}/{max_retries})")
-                eventsub.start()
-                break
-            except OSError as e:
-                if e.errno == 98:  # Address already in use
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        logger.warning(f"Port {webhook_port} in use, retrying in 5 seconds...")
-                        import time
-                        time.sleep(5)
-                    else:
-                        logger.error(f"Failed to bind to port {webhook_port} after {max_retries} attempts")
-                        raise
-                else:
-                    raise
-            except Exception as e:
-                logger.exception("Failed to start EventSub webhook")
-                raise
+    # Catches stream.online/offline events that never arrived
+    constants.bot_state.reconciler = LiveStateReconciler(twitch, constants.get_routing(), constants.get_live_status())
+    constants.bot_state.reconciler.start()
     
-    Thread(target=start_eventsub_with_retry, daemon=True).start()
+    logger.debug(f"TWITCH_WEBHOOK_SECRET: {TWITCH_WEBHOOK_SECRET} (type: {type(TWITCH_WEBHOOK_SECRET)})")
+    logger.debug(f"twitch: {twitch} (type: {type(twitch)})")
+    if logger.isEnabledFor(logging.DEBUG):
+        import pprint
+        logger.debug("Twitch object details:\n" + pprint.pformat(vars(twitch), indent=4))
+    if EVENTSUB_MODE != "relay":
+        logger.info(f"Started Twitch EventSub webhook on port {webhook_port}")
+    logger.info(f"Webhook URL: {PUBLIC_URL}")
     
-    # Wait a bit for the webhook to start
-    await asyncio.sleep(2)
+    # Resubscribing is paced to stay clear of Twitch rate limits, so don't hold up the gateway for it.
+    # Only the leader does it; every replica doing it would keep deleting each other's subscriptions.
+    async def resubscribe():
+        await constants.get_supervisor().submit("subscribe", subscribe_all, eventsub)
+    # Subscriptions are global, so with shards split across processes only shard 0's group owns them.
+    if shard_group() == 0:
+        leader.on_elected(resubscribe)
+    await timed("leader election", leader.start())
     
-    logger.info(f"Started Twitch EventSub webhook on port {webhook_port} in background thread")
-    logger.info(f"Webhook URL: {PUBLIC_URL}")
-    logger.info(f"Eventsub secret configured: {eventsub._secret is not None}")
+    logger.info(f"Setup complete in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+async def setup_database(bot):
+    await init_pool()
+    
+    # Load who to ping for each broadcaster so the go-live path never waits on the database
+    # Relay workers can run side by side, so they share is_live through Postgres
+    constants.bot_state.routing = RoutingTable(shared=EVENTSUB_MODE == "relay")
+    
+    # Birthday guild configs, kept in step by the setup flows and the listeners below
+    guild_configs = constants.bot_state.guild_configs = GuildConfigCache()
+    bot.add_listener(guild_configs.on_guild_remove, name="on_guild_remove")
+    bot.add_listener(guild_configs.on_guild_channel_delete, name="on_guild_channel_delete")
+    bot.add_listener(guild_configs.on_guild_role_delete, name="on_guild_role_delete")
     
+    # Start delivering queued notifications, including any left over from a previous run
+    if NOTIFY_DELIVERY == "webhook":
+        webhooks = constants.bot_state.webhooks = WebhookDelivery(bot)
+        bot.add_listener(webhooks.on_guild_available, name="on_guild_available")
+        bot.add_listener(webhooks.on_guild_join, name="on_guild_join")
+        await webhooks.start()
+    constants.bot_state.outbox = outbox.Outbox(bot, webhooks=constants.get_webhooks())
+    
+    await asyncio.gather(
+        constants.bot_state.routing.start(),
+        guild_configs.load(),
+        constants.bot_state.outbox.start()
+    )
+
+async def subscribe_all(eventsub: EventSubReceiver):
     # Clean up existing subscriptions
     try:
         await eventsub.unsubscribe_all()
@@ -99,68 +158,120 @@ async def setup(bot):
     except Exception as e:
         logger.warning(f"Could not clean up existing subscriptions: {e}")
     
-    # Initialize bot state
-    constants.bot_state.bot = bot
-    constants.bot_state.twitch = twitch
-    constants.bot_state.eventsub = eventsub
-    constants.bot_state.privateguild = discord.utils.get(bot.guilds, id=PRIVATE_GUILD_ID)
-    constants.bot_state.cocoasguild = discord.utils.get(bot.guilds, id=COCOAS_GUILD_ID)
-    constants.bot_state.tree = bot.tree
-    er.setup_errors(bot.tree)
+    # Title and category for go-live embeds until channel.update events take over
+    try:
+        await constants.get_live_status().prime(constants.get_routing().broadcasters())
+    except Exception as e:
+        logger.warning(f"Could not load channel information: {e}")
     
     # Set up subscriptions with retry logic
-    rows = await fetch("SELECT broadcaster_id FROM notification")
     successful_subs = 0
     failed_subs = 0
     
-    for row in rows:
+    for broadcaster_id in list(constants.get_routing().broadcasters()):
         try:
-            logger.info(f"Setting up subscriptions for broadcaster {row['broadcaster_id']}")
+            logger.info(f"Setting up subscriptions for broadcaster {broadcaster_id}")
             
             # Add delays between subscription attempts
             await asyncio.sleep(1)
             
             await eventsub.listen_stream_online(
-                broadcaster_user_id=row["broadcaster_id"],
+                broadcaster_user_id=broadcaster_id,
                 callback=handle_stream_online
             )
             
             await asyncio.sleep(0.5)
             
             await eventsub.listen_stream_offline(
-                broadcaster_user_id=row["broadcaster_id"],
+                broadcaster_user_id=broadcaster_id,
                 callback=handle_stream_offline
             )
             
+            await asyncio.sleep(0.5)
+            
+            await eventsub.listen_channel_update(
+                broadcaster_user_id=broadcaster_id,
+                callback=handle_channel_update
+            )
+            
             successful_subs += 1
-            logger.info(f"Successfully set up subscriptions for broadcaster {row['broadcaster_id']}")
+            logger.info(f"Successfully set up subscriptions for broadcaster {broadcaster_id}")
             
         except Exception as e:
             failed_subs += 1
-            logger.error(f"Failed to set up subscriptions for broadcaster {row['broadcaster_id']}: {e}")
+            logger.error(f"Failed to set up subscriptions for broadcaster {broadcaster_id}: {e}")
             # Continue with other subscriptions instead of failing completely
     
+    logger.info(f"EventSub subscriptions: {successful_subs} successful, {failed_subs} failed")
+
+async def on_guild_ready(bot):
+    """Runs on every READY, including reconnects, so keep it to cheap guild-cache lookups."""
+    constants.bot_state.privateguild = discord.utils.get(bot.guilds, id=PRIVATE_GUILD_ID)
+    constants.bot_state.cocoasguild = discord.utils.get(bot.guilds, id=COCOAS_GUILD_ID)
+    build_emoji_registry(bot)
+    
     logger.info("Validating bot state...")
     required_components = [
         ("bot", constants.get_bot()),
         ("twitch", constants.get_twitch()),
         ("eventsub", constants.get_eventsub()),
-        ("cocoasguild", constants.get_cocoasguild()),
         ("tree", constants.get_tree())
     ]
+    # Another process is connected to Cocoa's server when shards are split up
+    if owns_guild(bot, COCOAS_GUILD_ID):
+        required_components.append(("cocoasguild", constants.get_cocoasguild()))
     
     missing = [name for name, component in required_components if component is None]
     if missing:
         raise RuntimeError(f"Setup incomplete - missing components: {missing}")
     
     logger.info("All bot components properly initialized")
-    logger.info(f"EventSub subscriptions: {successful_subs} successful, {failed_subs} failed")
-    logger.info(f"Setup complete.")
     
+    # Nothing is chunked at startup; fetch just the members birthdays need, off the READY path
+    if MEMBER_CACHE != "all":
+        await constants.get_supervisor().submit("member cache", warm_birthday_members, bot)
+    
+def build_emoji_registry(bot):
+    """
+        name -> emoji lookup used instead of scanning guild.emojis on every call.
+        Cocoa's server wins on name clashes; other servers only fill in names it lacks.
+    """
+    registry = {}
+    for emoji in bot.emojis:
+        registry.setdefault(emoji.name, emoji)
+    cocoasguild = constants.get_cocoasguild()
+    if cocoasguild:
+        registry.update({emoji.name: emoji for emoji in cocoasguild.emojis})
+    constants.bot_state.emojis = registry
+    logger.info(f"Emoji registry built with {len(registry)} emojis")
+
+async def handle_guild_emojis_update(guild, before, after):
+    build_emoji_registry(constants.get_bot())
+
+async def handle_app_command_completion(interaction: discord.Interaction, command):
+    metrics.COMMAND.observe((discord.utils.utcnow() - interaction.created_at).total_seconds(), command.qualified_name)
+
+async def create_eventsub(twitch: Twitch, webhook_port: int) -> EventSubReceiver:
+    if not TWITCH_WEBHOOK_SECRET:
+        logger.error("TWITCH_WEBHOOK_SECRET not found in environment variables!")
+        raise ValueError("TWITCH_WEBHOOK_SECRET is required")
+    
+    eventsub = EventSubReceiver(
+        twitch=twitch,
+        callback_url=PUBLIC_URL,
+        secret=TWITCH_WEBHOOK_SECRET,
+        port=webhook_port
+    )
+    # Events can arrive before subscribe_all gets to resubscribing, so route them up front
+    eventsub.on("stream.online", handle_stream_online)
+    eventsub.on("stream.offline", handle_stream_offline)
+    eventsub.on("channel.update", handle_channel_update)
+    await eventsub.start(callback=EVENTSUB_MODE != "relay")
+    logger.info("Webhook secret configured")
+    return eventsub
+
 async def initialize_twitch(twitch: Twitch):
     try:
-        from twitchAPI.type import AuthScope as AS
-        from twitchAPI.helper import first
         USER_AUTH_SCOPES=[AS.CLIPS_EDIT]
         constants.bot_state.user_auth_scope = USER_AUTH_SCOPES
         assert isinstance(twitch, Twitch), "twitch is not an instance of Twitch"
@@ -200,105 +311,100 @@ async def handle_stream_online(event: StreamOnlineEvent):
     logger.info(f"Broadcaster {broadcaster_id} went live.")
 
     async def process():
-        try:
-            if not all([constants.get_twitch(), constants.get_bot(), constants.get_cocoasguild()]):
-                logger.error(f"Bot state not initialized when handling stream online for {broadcaster_id}")
-                return
-                
-            is_already_live = await fetchval(
-                "SELECT is_live FROM notification WHERE broadcaster_id = $1",
-                broadcaster_id
-            )
-
-            if is_already_live:
-                logger.info(f"Skipping already live broadcaster: {broadcaster_id}")
-                return
-                
-            # Fetch stream info
-            stream = None
-            twitch = constants.get_twitch()
-            async for s in twitch.get_streams(user_id=[broadcaster_id]):
-                stream = s
-                break
-
-            if not stream:
-                logger.warning(f"No stream found for broadcaster {broadcaster_id}")
-                return
-
-            title = stream.title.strip() if stream.title else "No stream title found"
-
-            # Fetch rows of configured notification channels
-            rows = await fetch(
-                "SELECT channel_id, role_id FROM notification WHERE broadcaster_id = $1",
-                broadcaster_id
-            )
-
-            await execute(
-                "UPDATE notification SET is_live = TRUE WHERE broadcaster_id = $1",
-                broadcaster_id
-            )
+        # Failures are logged and counted by the supervisor
+        if not all([constants.get_twitch(), constants.get_bot(), constants.get_routing()]):
+            logger.error(f"Bot state not initialized when handling stream online for {broadcaster_id}")
+            return
+            
+        routing = constants.get_routing()
+        routes = routing.get(broadcaster_id)
+        if not routes:
+            logger.info(f"No notifications configured for broadcaster {broadcaster_id}")
+            return
 
-            for row in rows:
-                bot = constants.get_bot()
-                channel = bot.get_channel(row["channel_id"])
-                if not channel:
-                    continue
+        if routing.is_live(broadcaster_id):
+            logger.info(f"Skipping already live broadcaster: {broadcaster_id}")
+            return
+        
+        # Title and category are cached from channel.update, so the embed doesn't wait on
+        # Get Streams (which lags EventSub and often has nothing yet).
+        live_status = constants.get_live_status()
+        status = live_status.set_online(broadcaster_id, data.broadcaster_user_login, data.broadcaster_user_name, data.started_at)
+        if status.title is None:
+            await live_status.fetch_channel(broadcaster_id)
+        # The Helix stream (real thumbnail, viewer data) is picked up in the background for /status.
+        live_status.poll_stream(broadcaster_id)
 
-                # Emojis
-                cocoasguild = constants.get_cocoasguild()
-                personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else None
-                streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else None
+        title = status.title.strip() if status.title else "No stream title found"
 
-                embed = discord.Embed(
-                    title=f"🩷 {data.broadcaster_user_name} is LIVE",
-                    url=f"https://twitch.tv/{data.broadcaster_user_login}",
-                    color=discord.Color(value=0xf8e7ef)
-                )
-                embed.add_field(
-                    name=f"{streamEmoji or ''} Title:",
-                    value=title,
-                    inline=False
-                )
-                embed.add_field(
-                    name=f"<:cocoascontroller:1378540036437573734> Game:",
-                    value=stream.game_name or "Unknown",
-                    inline=False
-                )
-                
-                embed.add_field(
-                    name=f"{personEmoji or ''} Watch Now:",
-                    value=f"https://twitch.tv/{data.broadcaster_user_login}",
-                    inline=False
-                )
-                embed.set_footer(text="Stream started just now!")
-                embed.timestamp = stream.started_at
-                embed.set_thumbnail(
-                    url=stream.thumbnail_url.replace("{width}", "320").replace("{height}", "180")
-                )
+        # Emojis
+        personEmoji = constants.get_emoji("cocoaLove")
+        streamEmoji = constants.get_emoji("cocoaLicense")
 
-                await channel.send(
-                    content=f"<@&{row['role_id']}> https://twitch.tv/{data.broadcaster_user_login}",
-                    embed=embed
-                )
+        embed = discord.Embed(
+            title=f"🩷 {data.broadcaster_user_name} is LIVE",
+            url=f"https://twitch.tv/{data.broadcaster_user_login}",
+            color=discord.Color(value=0xf8e7ef)
+        )
+        embed.add_field(
+            name=f"{streamEmoji or ''} Title:",
+            value=title,
+            inline=False
+        )
+        embed.add_field(
+            name=f"<:cocoascontroller:1378540036437573734> Game:",
+            value=status.game_name or "Unknown",
+            inline=False
+        )
+        
+        embed.add_field(
+            name=f"{personEmoji or ''} Watch Now:",
+            value=f"https://twitch.tv/{data.broadcaster_user_login}",
+            inline=False
+        )
+        embed.set_footer(text="Stream started just now!")
+        embed.timestamp = data.started_at
+        embed.set_thumbnail(url=status.thumbnail())
 
-        except Exception as e:
-            logger.exception("Error in handle_stream_online process")
+        # Marked live in the same transaction the pings are queued in, so a duplicate event
+        # (on this worker or another) is skipped, and a failed enqueue leaves it offline for
+        # the next event to retry.
+        try:
+            async with get_pool().acquire() as conn:
+                async with conn.transaction():
+                    if not await routing.transition(broadcaster_id, True, conn):
+                        logger.info(f"Skipping already live broadcaster: {broadcaster_id}")
+                        return
+                    # Persist the pings, then hand them straight to the outbox workers.
+                    jobs = await outbox.enqueue(conn, broadcaster_id, embed, [
+                        (route.channel_id, f"<@&{route.role_id}> https://twitch.tv/{data.broadcaster_user_login}")
+                        for route in routes
+                    ])
+        except Exception:
+            # The in-memory live set isn't rolled back with the transaction.
+            if not routing.shared:
+                routing.set_live(broadcaster_id, False)
+            raise
+        outbox.dispatch(jobs)
 
-    asyncio.create_task(process())
+    # Resolves once the pings are queued, see EventRelay
+    return await constants.get_supervisor().submit("stream_online", process)
 
 async def handle_stream_offline(event: StreamOfflineEvent):
     data = event.event
     broadcaster_id = data.broadcaster_user_id
     logger.info(f"Broadcaster {broadcaster_id} went offline.")
+    # In memory unless the routing table is shared between workers; it writes is_live back to the database.
+    await constants.get_routing().transition(broadcaster_id, False)
+    constants.get_live_status().set_offline(broadcaster_id, data.broadcaster_user_login, data.broadcaster_user_name)
 
-    async def process():
-        try:
-            await execute(
-                "UPDATE notification SET is_live = FALSE WHERE broadcaster_id = $1",
-                broadcaster_id
-            )
-
-        except Exception as e:
-            logger.exception("Error in handle_stream_offline process")
-
-    asyncio.create_task(process())
\ No newline at end of file
+async def handle_channel_update(event: ChannelUpdateEvent):
+    data = event.event
+    logger.info(f"Broadcaster {data.broadcaster_user_id} updated their channel: {data.title!r} ({data.category_name})")
+    constants.get_live_status().update_channel(
+        data.broadcaster_user_id,
+        data.broadcaster_user_login,
+        data.broadcaster_user_name,
+        data.title,
+        data.category_name
+    )
@@ -0,0 +1,106 @@
+"""
+    Leader election for jobs that must only run in one replica: the hourly birthday
+    check and the EventSub resubscription at startup. The leader holds a session
+    level advisory lock on a dedicated connection and heartbeats it; standbys retry
+    pg_try_advisory_lock every LEADER_HEARTBEAT seconds, so one takes over within a
+    few seconds of the leader's session going away. When shards are split across
+    processes, each shard group elects its own leader.
+"""
+import asyncio
+from handlers.logger import logger
+from psql import get_pool
+from helpers.constants import LEADER_HEARTBEAT
+
+# Arbitrary, just has to differ from the other advisory lock ids (see psql.MIGRATION_LOCK_ID).
+LEADER_LOCK_ID = 507_047
+
+class LeaderElection:
+    def __init__(self, lock_id: int = LEADER_LOCK_ID, group: int = 0, heartbeat: float = LEADER_HEARTBEAT):
+        self.lock_id = lock_id
+        self.group = group
+        self.heartbeat = heartbeat
+        self.is_leader = False
+        self._conn = None
+        self._task = None
+        self._callbacks = []
+        self._running = set()
+
+    def on_elected(self, callback):
+        """Run `callback()` (a coroutine function) every time this process becomes leader."""
+        self._callbacks.append(callback)
+
+    async def start(self):
+        # First attempt inline so a lone instance is leader before setup finishes.
+        await self._campaign()
+        if not self.is_leader:
+            logger.info("Another instance is leader, standing by")
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._conn is not None:
+            if self.is_leader:
+                try:
+                    await self._conn.execute("SELECT pg_advisory_unlock($1, $2)", self.lock_id, self.group)
+                    logger.info("Released leadership")
+                except Exception as e:
+                    logger.warning(f"Could not release the leader lock: {e}")
+            self.is_leader = False
+            await self._release()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            await self._campaign()
+
+    async def _campaign(self):
+        try:
+            if self._conn is None:
+                self._conn = await get_pool().acquire()
+            if self.is_leader:
+                # The lock lives exactly as long as this session, so a live session means we still hold it.
+                await asyncio.wait_for(self._conn.fetchval("SELECT 1"), timeout=self.heartbeat)
+                return
+            acquired = await asyncio.wait_for(
+                self._conn.fetchval("SELECT pg_try_advisory_lock($1, $2)", self.lock_id, self.group),
+                timeout=self.heartbeat
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.is_leader:
+                logger.error(f"Lost leadership, leader connection failed: {e}")
+            else:
+                logger.warning(f"Leader election attempt failed: {e}")
+            self.is_leader = False
+            # Drop the session so any lock it still holds is freed for a standby.
+            if self._conn is not None:
+                self._conn.terminate()
+            await self._release()
+            return
+
+        if acquired:
+            self.is_leader = True
+            logger.info("Elected leader, running singleton jobs in this process")
+            for callback in self._callbacks:
+                task = asyncio.create_task(self._run(callback))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _run(self, callback):
+        try:
+            await callback()
+        except Exception:
+            logger.exception(f"Leader callback {getattr(callback, '__name__', callback)} failed")
+
+    async def _release(self):
+        if self._conn is None:
+            return
+        try:
+            await get_pool().release(self._conn)
+        except Exception:
+            pass
+        self._conn = None
@@ -0,0 +1,207 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from twitchAPI.twitch import Twitch
+from twitchAPI.helper import first
+from handlers.logger import logger
+from helpers.helix import HELIX_BATCH_SIZE, batches
+from helpers.constants import LIVE_STATUS_TTL, get_routing
+
+# Twitch serves a placeholder at the preview URL until the first frame is captured,
+# so a go-live embed can use it straight away.
+PREVIEW_URL = "https://static-cdn.jtvnw.net/previews-ttv/live_user_{login}-{{width}}x{{height}}.jpg"
+# Get Streams lags EventSub by up to a couple of minutes; poll it a bounded number of times.
+STREAM_POLL_DELAYS = (5, 10, 20, 40, 60)
+CHANNEL_FETCH_DELAYS = (0.5, 1, 2)
+
+@dataclass(slots=True)
+class LiveStatus:
+    broadcaster_id: str
+    login: str
+    display_name: str
+    live: bool = False
+    title: str | None = None
+    game_name: str | None = None
+    started_at: datetime | None = None
+    thumbnail_url: str | None = None
+    updated_at: float = 0.0
+
+    def thumbnail(self, width: int = 320, height: int = 180) -> str | None:
+        if not self.thumbnail_url:
+            return None
+        return self.thumbnail_url.replace("{width}", str(width)).replace("{height}", str(height))
+
+class LiveStatusCache:
+    """
+        Who is live right now, keyed by broadcaster id. Broadcasters with notifications
+        set up are kept current by the stream events and the reconciler, so get() only
+        goes to Helix for them on a miss; anyone else is refetched once their entry is
+        older than LIVE_STATUS_TTL. Concurrent misses for the same login share one request.
+    """
+    def __init__(self, twitch: Twitch, ttl: float = LIVE_STATUS_TTL):
+        self.twitch = twitch
+        self.ttl = ttl
+        self.statuses = {}
+        self._ids = {}  # login -> broadcaster id; ids never change
+        self._inflight = {}
+        self._polls = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, login: str) -> LiveStatus | None:
+        login = login.lower()
+        status = self.statuses.get(self._ids.get(login))
+        if status is not None and self._fresh(status, time.monotonic()):
+            self.hits += 1
+            return status
+
+        self.misses += 1
+        task = self._inflight.get(login)
+        if task is None:
+            task = self._inflight[login] = asyncio.create_task(self._fetch(login))
+            task.add_done_callback(lambda _: self._inflight.pop(login, None))
+        # Shielded so one caller timing out doesn't cancel the lookup for everyone else.
+        return await asyncio.shield(task)
+
+    def _fresh(self, status: LiveStatus, now: float) -> bool:
+        # Tracked broadcasters have EventSub subscriptions; updated_at is 0 until their live state is first known.
+        routing = get_routing()
+        if status.updated_at and routing is not None and routing.get(status.broadcaster_id):
+            return True
+        return now - status.updated_at < self.ttl
+
+    async def _fetch(self, login: str) -> LiveStatus | None:
+        broadcaster_id = self._ids.get(login)
+        display_name = login
+        if broadcaster_id is None:
+            user = await first(self.twitch.get_users(logins=[login]))
+            if user is None:
+                return None
+            broadcaster_id = self._ids[login] = user.id
+            display_name = user.display_name
+        elif broadcaster_id in self.statuses:
+            display_name = self.statuses[broadcaster_id].display_name
+
+        stream = await first(self.twitch.get_streams(user_id=[broadcaster_id]))
+        logger.debug(f"Live status cache miss for {login}, fetched from Helix")
+        if stream is not None:
+            return self.set_stream(stream)
+        return self.set_offline(broadcaster_id, login, display_name)
+
+    async def prime(self, broadcaster_ids):
+        """Load title and category for tracked broadcasters, 100 per Helix call."""
+        count = 0
+        for batch in batches(broadcaster_ids):
+            for info in await self.twitch.get_channel_information(batch):
+                self.update_channel(info.broadcaster_id, info.broadcaster_login, info.broadcaster_name, info.title, info.game_name)
+            count += len(batch)
+        logger.info(f"Live status cache primed with channel info for {count} broadcasters")
+
+    async def fetch_channel(self, broadcaster_id: str) -> LiveStatus | None:
+        """Fill in title and category from Get Channel Information, retrying a few times."""
+        for delay in (0, *CHANNEL_FETCH_DELAYS):
+            await asyncio.sleep(delay)
+            try:
+                info = await self.twitch.get_channel_information(broadcaster_id)
+            except Exception as e:
+                logger.warning(f"Get Channel Information failed for {broadcaster_id}: {e}")
+                continue
+            if info:
+                return self.update_channel(broadcaster_id, info[0].broadcaster_login, info[0].broadcaster_name, info[0].title, info[0].game_name)
+            return None
+        return None
+
+    def poll_stream(self, broadcaster_id: str):
+        """Fetch the Helix stream in the background, backing off until it shows up."""
+        if broadcaster_id not in self._polls:
+            task = self._polls[broadcaster_id] = asyncio.create_task(self._poll_stream(broadcaster_id))
+            task.add_done_callback(lambda _: self._polls.pop(broadcaster_id, None))
+
+    async def stop(self):
+        for task in list(self._polls.values()):
+            task.cancel()
+        await asyncio.gather(*self._polls.values(), return_exceptions=True)
+
+    async def _poll_stream(self, broadcaster_id: str):
+        for delay in STREAM_POLL_DELAYS:
+            await asyncio.sleep(delay)
+            status = self.statuses.get(broadcaster_id)
+            if status is None or not status.live:
+                return
+            try:
+                stream = await first(self.twitch.get_streams(user_id=[broadcaster_id]))
+            except Exception as e:
+                logger.warning(f"Get Streams failed for {broadcaster_id}: {e}")
+                continue
+            if stream is not None:
+                self.set_stream(stream)
+                return
+        logger.info(f"Stream for {broadcaster_id} still not visible in Helix after {sum(STREAM_POLL_DELAYS)}s")
+
+    async def get_many(self, users) -> list[LiveStatus]:
+        """Statuses for several TwitchUsers; stale ones are refreshed 100 per Get Streams call."""
+        now = time.monotonic()
+        stale = [u for u in users if u.id not in self.statuses or not self._fresh(self.statuses[u.id], now)]
+        self.hits += len(users) - len(stale)
+        self.misses += len(stale)
+        streams = {}
+        for batch in batches(u.id for u in stale):
+            async for stream in self.twitch.get_streams(user_id=batch, first=HELIX_BATCH_SIZE):
+                streams[stream.user_id] = stream
+        for user in stale:
+            if user.id in streams:
+                self.set_stream(streams[user.id])
+            else:
+                self.set_offline(user.id, user.login, user.display_name)
+        return [self.statuses[u.id] for u in users]
+
+    # Writers, called from the EventSub handlers and the reconciler
+    def set_online(self, broadcaster_id: str, login: str, display_name: str, started_at: datetime) -> LiveStatus:
+        """Record a stream.online event. Title and category come from channel.update."""
+        status = self._entry(broadcaster_id, login, display_name)
+        status.live = True
+        status.started_at = started_at
+        status.thumbnail_url = PREVIEW_URL.format(login=login.lower())
+        status.updated_at = time.monotonic()
+        return status
+
+    def set_stream(self, stream) -> LiveStatus:
+        """Record a live Stream object from Helix."""
+        status = self._entry(stream.user_id, stream.user_login, stream.user_name)
+        status.live = True
+        status.title = stream.title
+        status.game_name = stream.game_name
+        status.started_at = stream.started_at
+        status.thumbnail_url = stream.thumbnail_url
+        status.updated_at = time.monotonic()
+        return status
+
+    def set_offline(self, broadcaster_id: str, login: str | None = None, display_name: str | None = None) -> LiveStatus | None:
+        status = self.statuses.get(broadcaster_id)
+        if status is None:
+            if login is None:
+                return None
+            status = self._entry(broadcaster_id, login, display_name or login)
+        status.live = False
+        status.started_at = None
+        status.thumbnail_url = None
+        status.updated_at = time.monotonic()
+        return status
+
+    def update_channel(self, broadcaster_id: str, login: str, display_name: str, title: str | None, game_name: str | None) -> LiveStatus:
+        """Title/category change; keeps the live flag and start time as they are."""
+        status = self._entry(broadcaster_id, login, display_name)
+        status.title = title
+        status.game_name = game_name
+        return status
+
+    def _entry(self, broadcaster_id: str, login: str, display_name: str) -> LiveStatus:
+        self._ids[login.lower()] = broadcaster_id
+        status = self.statuses.get(broadcaster_id)
+        if status is None:
+            status = self.statuses[broadcaster_id] = LiveStatus(broadcaster_id, login, display_name)
+        else:
+            status.login = login
+            status.display_name = display_name
+        return status
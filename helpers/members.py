@@ -0,0 +1,77 @@
+"""
+    Member cache policy. Members are only needed to mention and name users with a
+    registered birthday, so with MEMBER_CACHE=birthdays (the default) guilds aren't
+    chunked at startup and nothing is cached automatically; instead the registered
+    users of guilds with birthday notifications set up are requested over the gateway
+    after READY, 100 ids per request. MEMBER_CACHE=all restores discord.py's default
+    of chunking and caching every member of every guild.
+"""
+import asyncio
+import discord
+from handlers.logger import logger
+from psql import fetch
+from helpers.sharding import owns_guild
+from helpers.constants import (
+    MEMBER_CACHE,
+    get_guild_configs
+)
+
+# Most user ids one Request Guild Members gateway command accepts.
+MEMBER_QUERY_LIMIT = 100
+
+def member_cache_options() -> dict:
+    if MEMBER_CACHE == "all":
+        return {}
+    return {
+        "chunk_guilds_at_startup": False,
+        "member_cache_flags": discord.MemberCacheFlags.none()
+    }
+
+async def get_members(guild: discord.Guild, user_ids) -> dict:
+    """
+        user id -> Member for the given ids. Cached members are used as is; the rest
+        are requested over the gateway (and cached) in batches, falling back to one
+        REST fetch per member if the gateway can't be used. Users who left are omitted.
+    """
+    members = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        member = guild.get_member(user_id)
+        if member is not None:
+            members[user_id] = member
+        else:
+            missing.append(user_id)
+
+    for i in range(0, len(missing), MEMBER_QUERY_LIMIT):
+        batch = missing[i:i + MEMBER_QUERY_LIMIT]
+        try:
+            found = await guild.query_members(user_ids=batch, limit=len(batch), cache=True)
+        except (asyncio.TimeoutError, RuntimeError, discord.ClientException) as e:
+            logger.warning(f"Member query for guild {guild.id} failed, fetching members one by one: {e}")
+            for user_id in missing[i:]:
+                try:
+                    # doesn't require server member intents but can be rate limited and slower
+                    members[user_id] = await guild.fetch_member(user_id)
+                except (discord.Forbidden, discord.HTTPException, discord.NotFound):
+                    pass
+            break
+        members.update((member.id, member) for member in found)
+    return members
+
+async def warm_birthday_members(bot):
+    """Cache the registered members of every guild with birthday notifications set up."""
+    guild_ids = [guild_id for guild_id in get_guild_configs().birthday if owns_guild(bot, guild_id)]
+    if not guild_ids:
+        return
+    rows = await fetch("SELECT guild_id, user_id FROM birthday_user WHERE guild_id = ANY($1::bigint[])", guild_ids)
+    users = {}
+    for row in rows:
+        users.setdefault(row["guild_id"], []).append(row["user_id"])
+
+    cached = 0
+    for guild_id, user_ids in users.items():
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            continue
+        cached += len(await get_members(guild, user_ids))
+    logger.info(f"Member cache warmed with {cached} birthday members across {len(users)} guilds")
@@ -0,0 +1,166 @@
+"""
+    Prometheus metrics, served as text at /metrics on the EventSub receiver's port.
+    Small enough that it doesn't need prometheus_client: counters and histograms
+    with labels, plus collectors for values read at scrape time.
+"""
+import logging
+import math
+import time
+from aiohttp import web
+from handlers.logger import logger
+
+PREFIX = "cocoabot_"
+# Seconds; covers a fast DB query up to a slow Helix call or a retried ping.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics = []
+_collectors = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = PREFIX + name + "_total"
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.values = {}
+        _metrics.append(self)
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [bucket counts..., sum, count]
+        _metrics.append(self)
+
+    def observe(self, value: float, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in self.values.items():
+            for bound, count in zip(self.buckets, series):
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', _number(bound))])} {count}"
+            yield f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', '+Inf')])} {series[-1]}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}"
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+def add_collector(collect):
+    """`collect()` returns (name, type, help, [(labels dict, value), ...]) tuples, read on every scrape."""
+    _collectors.append(collect)
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        try:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {PREFIX}{name} {help}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{PREFIX}{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+        except Exception:
+            logger.exception("Metrics collector failed")
+    return "\n".join(lines) + "\n"
+
+async def handle_metrics(request: web.Request):
+    return web.Response(body=render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+# Metrics
+EVENTSUB_RECEIVED = Counter("eventsub_received", "EventSub webhook requests received", ["type"])
+EVENTSUB_ACKED = Counter("eventsub_acked", "EventSub webhook requests answered with a 2xx", ["type"])
+TIME_TO_NOTIFICATION = Histogram(
+    "time_to_notification_seconds",
+    "Stream start (Twitch started_at) to the go-live ping being sent",
+    buckets=(0.5, 1, 2, 3, 5, 10, 20, 30, 60, 120, 300)
+)
+DISCORD_SEND = Histogram("discord_send_seconds", "Sending one go-live ping to Discord", ["via"])
+DISCORD_RATE_LIMITED = Counter("discord_rate_limited", "429 responses from Discord that were waited out", ["source"])
+HELIX_REQUEST = Histogram("helix_request_seconds", "Helix API requests, until the response headers arrive", ["endpoint", "status"])
+DB_QUERY = Histogram("db_query_seconds", "PostgreSQL queries by statement type", ["statement"])
+BIRTHDAY_CHECK = Histogram("birthday_check_seconds", "One hourly birthday check and announcement pass")
+COMMAND = Histogram("command_seconds", "Slash command latency from the interaction being created to the command finishing", ["command"])
+
+# Hooks
+def on_query(record):
+    """asyncpg query logger, see psql.init_pool."""
+    statement = record.query.lstrip().split(None, 1)[0].upper() if record.query.strip() else "UNKNOWN"
+    DB_QUERY.observe(record.elapsed, statement)
+
+def instrument_twitch(twitch):
+    """Time every Helix request the Twitch client makes."""
+    # twitchAPI (pinned in requirements.txt) funnels every Helix call through
+    # _api_request and creates its own sessions, so there's no public hook to use.
+    api_request = twitch._api_request
+
+    async def timed_request(method, session, url, *args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await api_request(method, session, url, *args, **kwargs)
+            status = str(response.status)
+            return response
+        finally:
+            endpoint = url.split("?", 1)[0].rstrip("/").rsplit("/helix/", 1)[-1]
+            HELIX_REQUEST.observe(time.perf_counter() - start, endpoint, status)
+
+    twitch._api_request = timed_request
+
+class RateLimitCounter(logging.Handler):
+    """discord.py waits out 429s internally and only logs them, so count the warnings."""
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+
+    def emit(self, record):
+        if "rate limit" in str(record.msg):
+            DISCORD_RATE_LIMITED.inc("webhook" if record.name.startswith("discord.webhook") else "bot")
+
+def install_log_hooks():
+    logging.getLogger("discord").addHandler(RateLimitCounter())
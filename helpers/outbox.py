@@ -0,0 +1,288 @@
+import asyncio
+import collections
+import json
+import random
+import time
+import discord
+from handlers.logger import logger
+from helpers import metrics
+from psql import get_pool, execute, fetch, fetchval
+from helpers.constants import (
+    get_outbox,
+    OUTBOX_WORKERS,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_METRICS_INTERVAL
+)
+
+# A claimed job is hidden from other workers for this long. If the worker dies
+# mid-send the job becomes claimable again once the lease runs out. Leases of jobs
+# still waiting in memory or being sent are renewed once a third of them is used up.
+LEASE_SECONDS = 60
+MAX_BACKOFF_SECONDS = 600
+
+# New jobs are inserted already claimed by this process (attempts = 1, leased), so
+# they can be sent straight from memory without a second round trip to claim them.
+ENQUEUE_SQL = """
+    INSERT INTO notification_outbox (broadcaster_id, channel_id, content, embed, attempts, available_at)
+    SELECT $1::text, t.channel_id, t.content, $4::jsonb, 1, now() + make_interval(secs => $5::float8)
+    FROM unnest($2::bigint[], $3::text[]) AS t(channel_id, content)
+    RETURNING id, channel_id, content, embed, attempts, created_at
+"""
+
+CLAIM_SQL = """
+    UPDATE notification_outbox
+    SET attempts = attempts + 1,
+        available_at = now() + make_interval(secs => $2::float8)
+    WHERE id IN (
+        SELECT id FROM notification_outbox
+        WHERE NOT dead AND available_at <= now()
+        ORDER BY available_at, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT $1
+    )
+    RETURNING id, channel_id, content, embed, attempts, created_at
+"""
+
+# Only renews leases that are still ours: a job claimed again elsewhere has had its attempts bumped.
+RENEW_SQL = """
+    UPDATE notification_outbox AS o
+    SET available_at = now() + make_interval(secs => $3::float8)
+    FROM unnest($1::bigint[], $2::int[]) AS t(id, attempts)
+    WHERE o.id = t.id AND o.attempts = t.attempts AND NOT o.dead
+    RETURNING o.id
+"""
+
+COMPLETE_SQL = "DELETE FROM notification_outbox WHERE id = ANY($1::bigint[])"
+
+RETRY_SQL = """
+    UPDATE notification_outbox
+    SET available_at = now() + make_interval(secs => $2::float8),
+        last_error = $3,
+        dead = $4
+    WHERE id = $1
+"""
+
+DEPTH_SQL = "SELECT COUNT(*) FROM notification_outbox WHERE NOT dead"
+
+class PermanentFailure(Exception):
+    """The job can never succeed (channel deleted, missing access), so don't retry it."""
+
+async def enqueue(conn, broadcaster_id: str, embed: discord.Embed, jobs):
+    """
+        Queue go-live messages on `conn`; `jobs` is a list of (channel_id, content)
+        sharing one embed. Returns the new rows, which should be passed to dispatch()
+        once the surrounding transaction (if any) has committed.
+    """
+    if not jobs:
+        return []
+    channel_ids, contents = zip(*jobs)
+    return await conn.fetch(
+        ENQUEUE_SQL,
+        broadcaster_id,
+        list(channel_ids),
+        list(contents),
+        json.dumps(embed.to_dict()),
+        float(LEASE_SECONDS)
+    )
+
+def dispatch(jobs):
+    outbox = get_outbox()
+    if outbox:
+        outbox.dispatch(jobs)
+
+def backoff(attempts: int) -> float:
+    delay = min(MAX_BACKOFF_SECONDS, 2 ** attempts)
+    return delay + random.uniform(0, delay / 2)
+
+class Outbox:
+    """
+        Worker pool that delivers queued notifications from the notification_outbox
+        table. Jobs are claimed with FOR UPDATE SKIP LOCKED, so any number of workers
+        (or bot instances) can drain the same table without double-sending.
+    """
+    def __init__(self, bot: discord.Client, workers: int = OUTBOX_WORKERS, webhooks=None):
+        self.bot = bot
+        self.workers = workers
+        # Optional WebhookDelivery; channel.send is used when it's off or declines a job.
+        self.webhooks = webhooks
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._ready = collections.deque()
+        self._leases = {}  # job id -> (attempts, last renewed, time.monotonic()) for jobs held in memory
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.send_time = 0.0
+        self.queue_latency = 0.0
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._report()))
+        self._tasks.append(asyncio.create_task(self._renew_loop()))
+        logger.info(f"Notification outbox started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self):
+        self._wakeup.set()
+
+    def dispatch(self, jobs):
+        """Hand freshly enqueued (already leased) jobs straight to the workers."""
+        self._hold(jobs)
+        self._ready.extend(jobs)
+        self._wakeup.set()
+
+    async def depth(self) -> int:
+        return await fetchval(DEPTH_SQL)
+
+    def stats(self):
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_send_ms": self.send_time / self.sent * 1000 if self.sent else 0.0,
+            "avg_queue_ms": self.queue_latency / self.sent * 1000 if self.sent else 0.0
+        }
+
+    async def _worker(self, n: int):
+        while True:
+            # Cleared before claiming so a wake() that lands mid-claim isn't lost.
+            self._wakeup.clear()
+            try:
+                if self._ready:
+                    popped = [self._ready.popleft() for _ in range(min(OUTBOX_BATCH_SIZE, len(self._ready)))]
+                    # Another worker has any whose lease was lost while they waited here.
+                    jobs = [job for job in popped if job["id"] in self._leases]
+                else:
+                    async with get_pool().acquire() as conn:
+                        popped = jobs = await conn.fetch(CLAIM_SQL, OUTBOX_BATCH_SIZE, float(LEASE_SECONDS))
+                    self._hold(jobs)
+                if popped:
+                    await self._send(jobs)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Outbox worker {n} failed to claim jobs")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, jobs):
+        try:
+            # Jobs in a batch go to different channels, so send them concurrently.
+            # One job failing unexpectedly mustn't stop the others from being completed,
+            # or they'd be claimed and sent again once their lease runs out.
+            delivered = await asyncio.gather(*(self._deliver(job) for job in jobs), return_exceptions=True)
+        finally:
+            for job in jobs:
+                self._leases.pop(job["id"], None)
+        for job, ok in zip(jobs, delivered):
+            if isinstance(ok, Exception):
+                logger.error(f"Outbox job {job['id']} for channel {job['channel_id']} failed", exc_info=ok)
+        done = [job["id"] for job, ok in zip(jobs, delivered) if ok is True]
+        if done:
+            await execute(COMPLETE_SQL, done)
+
+    def _hold(self, jobs):
+        now = time.monotonic()
+        for job in jobs:
+            self._leases[job["id"]] = (job["attempts"], now)
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            cutoff = time.monotonic() - LEASE_SECONDS / 3
+            due = {job_id: attempts for job_id, (attempts, renewed_at) in self._leases.items() if renewed_at <= cutoff}
+            if not due:
+                continue
+            renewed_at = time.monotonic()
+            try:
+                rows = await fetch(RENEW_SQL, list(due), list(due.values()), float(LEASE_SECONDS))
+            except Exception:
+                logger.exception(f"Failed to renew the leases of {len(due)} outbox jobs, will retry")
+                continue
+            renewed = {row["id"] for row in rows}
+            for job_id, attempts in due.items():
+                # Sent (and completed) while the renewal was running
+                if job_id not in self._leases:
+                    continue
+                if job_id in renewed:
+                    self._leases[job_id] = (attempts, renewed_at)
+                else:
+                    del self._leases[job_id]
+                    logger.warning(f"Lease on outbox job {job_id} ran out before it was sent, leaving it to whoever claimed it")
+
+    async def _deliver(self, job):
+        start = time.perf_counter()
+        try:
+            channel = self.bot.get_channel(job["channel_id"])
+            if channel is None:
+                try:
+                    channel = await self.bot.fetch_channel(job["channel_id"])
+                except (discord.NotFound, discord.Forbidden) as e:
+                    raise PermanentFailure(f"channel unavailable: {e}")
+            embed = job["embed"]
+            if isinstance(embed, str):
+                embed = json.loads(embed)
+            embed = discord.Embed.from_dict(embed)
+            send_start = time.perf_counter()
+            try:
+                via = "webhook"
+                if self.webhooks is None or not await self.webhooks.send(channel, job["content"], embed):
+                    via = "bot"
+                    await channel.send(content=job["content"], embed=embed)
+            except (discord.NotFound, discord.Forbidden) as e:
+                raise PermanentFailure(str(e))
+            metrics.DISCORD_SEND.observe(time.perf_counter() - send_start, via)
+            # Go-live embeds are stamped with the stream's started_at
+            if embed.timestamp is not None:
+                metrics.TIME_TO_NOTIFICATION.observe((discord.utils.utcnow() - embed.timestamp).total_seconds())
+        except Exception as e:
+            dead = isinstance(e, PermanentFailure) or job["attempts"] >= OUTBOX_MAX_ATTEMPTS
+            try:
+                await execute(RETRY_SQL, job["id"], backoff(job["attempts"]), str(e)[:500], dead)
+            except Exception:
+                # The job is still leased, so it's retried once the lease runs out instead.
+                logger.exception(f"Could not reschedule outbox job {job['id']}")
+            if dead:
+                self.failed += 1
+                logger.error(f"Giving up on outbox job {job['id']} for channel {job['channel_id']} after {job['attempts']} attempts: {e}")
+            else:
+                self.retried += 1
+                logger.warning(f"Outbox job {job['id']} for channel {job['channel_id']} failed (attempt {job['attempts']}), will retry: {e}")
+            return False
+
+        self.sent += 1
+        self.send_time += time.perf_counter() - start
+        created_at = job["created_at"]
+        if created_at is not None:
+            now = discord.utils.utcnow() if created_at.tzinfo else created_at.now()
+            self.queue_latency += max(0.0, (now - created_at).total_seconds())
+        return True
+
+    async def _report(self):
+        last_sent = 0
+        while True:
+            await asyncio.sleep(OUTBOX_METRICS_INTERVAL)
+            try:
+                depth = await self.depth()
+                rate = (self.sent - last_sent) / OUTBOX_METRICS_INTERVAL
+                last_sent = self.sent
+                stats = self.stats()
+                logger.info(
+                    f"Outbox: {rate:.2f} sends/s, queue depth {depth}, sent {self.sent}, "
+                    f"retried {self.retried}, failed {self.failed}, "
+                    f"avg send {stats['avg_send_ms']:.1f} ms, avg queued {stats['avg_queue_ms']:.1f} ms"
+                    + (f", via webhook {self.webhooks.sent} (fell back {self.webhooks.fallbacks})" if self.webhooks else "")
+                )
+            except Exception:
+                logger.exception("Failed to report outbox metrics")
@@ -0,0 +1,100 @@
+"""
+    Startup profiler, enabled with STARTUP_PROFILE=true. Times every module import
+    (inclusive and self time) and named boot phases, and logs both once the bot is
+    ready. Deliberately imports nothing heavy so it can be installed first thing in main.py.
+"""
+import os
+import sys
+import time
+
+ENABLED = os.getenv("STARTUP_PROFILE", "false").lower() in ("1", "true", "yes")
+TOP_N = int(os.getenv("STARTUP_PROFILE_TOP", 25))
+
+_started = time.perf_counter()
+_imports = {}  # module name -> [inclusive seconds, self seconds]
+_stack = []
+_phases = []  # (name, start offset, seconds)
+
+class _TimedLoader:
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        _stack.append(0.0)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = _stack.pop()
+            if _stack:
+                _stack[-1] += elapsed
+            _imports[module.__name__] = [elapsed, elapsed - children]
+
+class _ImportTimer:
+    """Meta path finder that wraps every other finder's loader in a timer."""
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+def install():
+    if ENABLED and not any(isinstance(f, _ImportTimer) for f in sys.meta_path):
+        sys.meta_path.insert(0, _ImportTimer())
+
+class phase:
+    """Context manager recording how long a named boot phase took."""
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            _phases.append((self.name, self.start - _started, time.perf_counter() - self.start))
+        return False
+
+def mark(name: str):
+    """Record a zero-length phase, e.g. 'ready', at the current time."""
+    if ENABLED:
+        _phases.append((name, time.perf_counter() - _started, 0.0))
+
+def report() -> str:
+    lines = [f"Startup profile ({(time.perf_counter() - _started) * 1000:.0f} ms since profiler import)"]
+    lines.append("phases (offset ms, duration ms):")
+    for name, offset, seconds in _phases:
+        lines.append(f"  {name:<32} {offset * 1000:>8.0f} {seconds * 1000:>8.0f}")
+    lines.append(f"imports, top {TOP_N} by self time (self ms, inclusive ms):")
+    ranked = sorted(_imports.items(), key=lambda item: item[1][1], reverse=True)[:TOP_N]
+    for name, (inclusive, own) in ranked:
+        lines.append(f"  {name:<48} {own * 1000:>8.1f} {inclusive * 1000:>8.1f}")
+    total = sum(own for _, own in _imports.values())
+    lines.append(f"  {len(_imports)} modules, {total * 1000:.0f} ms total")
+    return "\n".join(lines)
+
+def log_report():
+    if not ENABLED:
+        return
+    from handlers.logger import logger
+    logger.info(report())
+    # Only the first READY is interesting; reconnects shouldn't repeat it.
+    uninstall()
+
+def uninstall():
+    global ENABLED
+    ENABLED = False
+    sys.meta_path[:] = [f for f in sys.meta_path if not isinstance(f, _ImportTimer)]
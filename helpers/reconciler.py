@@ -0,0 +1,83 @@
+import asyncio
+import time
+from twitchAPI.twitch import Twitch
+from handlers.logger import logger
+from helpers.routing import RoutingTable
+from helpers.livestatus import LiveStatusCache
+from helpers.helix import HELIX_BATCH_SIZE, batches
+from helpers.constants import (
+    RECONCILE_INTERVAL,
+    RECONCILE_GRACE
+)
+
+class LiveStateReconciler:
+    """
+        Periodically asks Helix which tracked broadcasters are live and corrects the
+        routing table's live set, so a lost stream.online/offline event can't leave
+        is_live wrong (and the next go-live ping suppressed) indefinitely.
+    """
+    def __init__(self, twitch: Twitch, routing: RoutingTable, live_status: LiveStatusCache | None = None, interval: float = RECONCILE_INTERVAL, grace: float = RECONCILE_GRACE):
+        self.twitch = twitch
+        self.routing = routing
+        self.live_status = live_status
+        self.interval = interval
+        self.grace = grace
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Live state reconciler started (every {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def fetch_live(self, broadcaster_ids) -> set:
+        live = set()
+        for batch in batches(broadcaster_ids):
+            async for stream in self.twitch.get_streams(user_id=batch, first=HELIX_BATCH_SIZE):
+                live.add(stream.user_id)
+                if self.live_status is not None:
+                    self.live_status.set_stream(stream)
+        return live
+
+    async def reconcile(self) -> int:
+        """Run one pass. Returns how many broadcasters were corrected."""
+        started = time.monotonic()
+        broadcaster_ids = list(self.routing.broadcasters())
+        if not broadcaster_ids:
+            return 0
+        live = await self.fetch_live(broadcaster_ids)
+
+        corrected = 0
+        for broadcaster_id in broadcaster_ids:
+            # Helix lags EventSub by a minute or two; trust recent events over the poll.
+            if self.routing.changed_since(broadcaster_id, started - self.grace):
+                continue
+            is_live = broadcaster_id in live
+            if not is_live and self.live_status is not None:
+                self.live_status.set_offline(broadcaster_id)
+            if await self.routing.transition(broadcaster_id, is_live):
+                corrected += 1
+                logger.warning(f"Reconciler: broadcaster {broadcaster_id} is {'live' if is_live else 'offline'} but was recorded otherwise")
+
+        if corrected:
+            # Write the corrections now in one batch rather than waiting on the flush loop.
+            await self.routing.flush()
+        logger.info(
+            f"Reconciled live state for {len(broadcaster_ids)} broadcasters "
+            f"({len(live)} live, {corrected} corrected) in {(time.monotonic() - started) * 1000:.0f} ms"
+        )
+        return corrected
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live state reconciliation failed")
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from handlers.logger import logger
+from psql import fetch, get_pool
+from helpers.constants import (
+    ROUTING_FLUSH_INTERVAL,
+    ROUTING_LISTEN
+)
+
+# Postgres channel used to tell other replicas a broadcaster's routes changed.
+NOTIFY_CHANNEL = "notification_routes"
+
+LOAD_SQL = "SELECT broadcaster_id, guild_id, channel_id, role_id, is_live FROM notification"
+LOAD_ONE_SQL = "SELECT broadcaster_id, guild_id, channel_id, role_id, is_live FROM notification WHERE broadcaster_id = $1"
+FLUSH_SQL = "UPDATE notification SET is_live = $2 WHERE broadcaster_id = $1"
+# Shared live state: only the statement that actually flips is_live gets rows back,
+# and the NOTIFY (sent on commit) has the other workers reload the broadcaster.
+TRANSITION_SQL = """
+    WITH changed AS (
+        UPDATE notification SET is_live = $2
+        WHERE broadcaster_id = $1 AND is_live <> $2
+        RETURNING broadcaster_id
+    )
+    SELECT broadcaster_id, pg_notify($3, $1) FROM changed
+"""
+
+class Route:
+    __slots__ = ("guild_id", "channel_id", "role_id")
+
+    def __init__(self, guild_id: int, channel_id: int, role_id: int):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.role_id = role_id
+
+class RoutingTable:
+    """
+        In-memory copy of the notification table: broadcaster_id -> tuple of Routes,
+        plus the set of broadcasters currently live. The go-live path reads only from
+        here; is_live changes are written back to Postgres in batches.
+
+        With `shared` (several workers handling events, see worker.py) Postgres owns
+        is_live instead: transition() changes it there, and every worker's copy
+        follows over NOTIFY_CHANNEL.
+    """
+    def __init__(self, shared: bool = False):
+        self.shared = shared
+        self.routes = {}
+        self.live = set()
+        self._changed_at = {}
+        self._dirty = {}
+        self._flush_wakeup = asyncio.Event()
+        self._flusher = None
+        self._listen_conn = None
+        self._reloads = set()
+
+    async def load(self):
+        rows = await fetch(LOAD_SQL)
+        routes = {}
+        live = set()
+        for row in rows:
+            routes.setdefault(row["broadcaster_id"], []).append(Route(row["guild_id"], row["channel_id"], row["role_id"]))
+            if row["is_live"]:
+                live.add(row["broadcaster_id"])
+        self.routes = {b: tuple(r) for b, r in routes.items()}
+        self.live = live
+        logger.info(f"Routing table loaded: {len(rows)} routes for {len(self.routes)} broadcasters")
+
+    async def start(self):
+        await self.load()
+        self._flusher = asyncio.create_task(self._flush_loop())
+        if ROUTING_LISTEN or self.shared:
+            self._listen_conn = await get_pool().acquire()
+            await self._listen_conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+            logger.info(f"Listening for routing changes on {NOTIFY_CHANNEL}")
+
+    async def stop(self):
+        if self._listen_conn is not None:
+            await self._listen_conn.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+            await get_pool().release(self._listen_conn)
+            self._listen_conn = None
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(f"Failed to write is_live for {len(self._dirty)} broadcasters on shutdown")
+
+    # Reads
+    def get(self, broadcaster_id: str) -> tuple:
+        return self.routes.get(broadcaster_id, ())
+
+    def route(self, broadcaster_id: str, guild_id: int):
+        for route in self.get(broadcaster_id):
+            if route.guild_id == guild_id:
+                return route
+        return None
+
+    def broadcasters(self):
+        return self.routes.keys()
+
+    def is_live(self, broadcaster_id: str) -> bool:
+        return broadcaster_id in self.live
+
+    def changed_since(self, broadcaster_id: str, when: float) -> bool:
+        """Whether set_live last changed this broadcaster after `when` (time.monotonic())."""
+        return self._changed_at.get(broadcaster_id, float("-inf")) > when
+
+    # Writes. Call these after the matching notification row has been committed.
+    async def add(self, broadcaster_id: str, guild_id: int, channel_id: int, role_id: int):
+        routes = tuple(r for r in self.get(broadcaster_id) if r.guild_id != guild_id)
+        self.routes[broadcaster_id] = routes + (Route(guild_id, channel_id, role_id),)
+        await self._notify(broadcaster_id)
+
+    async def remove(self, broadcaster_id: str, guild_id: int):
+        routes = tuple(r for r in self.get(broadcaster_id) if r.guild_id != guild_id)
+        if routes:
+            self.routes[broadcaster_id] = routes
+        else:
+            self.routes.pop(broadcaster_id, None)
+            self.live.discard(broadcaster_id)
+        await self._notify(broadcaster_id)
+
+    def set_live(self, broadcaster_id: str, live: bool) -> bool:
+        """Update is_live in memory and schedule the write. Returns False if nothing changed."""
+        if (broadcaster_id in self.live) == live:
+            return False
+        if live:
+            self.live.add(broadcaster_id)
+        else:
+            self.live.discard(broadcaster_id)
+        self._changed_at[broadcaster_id] = time.monotonic()
+        self._dirty[broadcaster_id] = live
+        self._flush_wakeup.set()
+        return True
+
+    async def transition(self, broadcaster_id: str, live: bool, conn=None) -> bool:
+        """
+            Like set_live(), but atomic across workers when the table is shared: of two
+            workers handling events for the same broadcaster, only one sees the change.
+            Pass `conn` to make it part of a transaction; the local copy is updated
+            through NOTIFY once that commits.
+        """
+        if not self.shared:
+            return self.set_live(broadcaster_id, live)
+        if conn is None:
+            rows = await fetch(TRANSITION_SQL, broadcaster_id, live, NOTIFY_CHANNEL)
+        else:
+            rows = await conn.fetch(TRANSITION_SQL, broadcaster_id, live, NOTIFY_CHANNEL)
+        return bool(rows)
+
+    # Write-behind
+    async def flush(self):
+        if not self._dirty:
+            return
+        pending, self._dirty = self._dirty, {}
+        try:
+            async with get_pool().acquire() as conn:
+                await conn.executemany(FLUSH_SQL, list(pending.items()))
+        except Exception:
+            # Keep anything that changed again while we were writing.
+            self._dirty = {**pending, **self._dirty}
+            raise
+
+    async def _flush_loop(self):
+        while True:
+            await self._flush_wakeup.wait()
+            self._flush_wakeup.clear()
+            # Coalesce bursts of online/offline events into one round trip.
+            await asyncio.sleep(ROUTING_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception(f"Failed to write is_live for {len(self._dirty)} broadcasters, will retry")
+                self._flush_wakeup.set()
+
+    # Cross-replica invalidation
+    async def _notify(self, broadcaster_id: str):
+        if not ROUTING_LISTEN:
+            return
+        async with get_pool().acquire() as conn:
+            await conn.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, broadcaster_id)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        task = asyncio.create_task(self._reload(payload))
+        self._reloads.add(task)
+        task.add_done_callback(self._reloads.discard)
+
+    async def _reload(self, broadcaster_id: str):
+        try:
+            rows = await fetch(LOAD_ONE_SQL, broadcaster_id)
+        except Exception:
+            logger.exception(f"Failed to reload routes for {broadcaster_id}")
+            return
+        if rows:
+            self.routes[broadcaster_id] = tuple(Route(r["guild_id"], r["channel_id"], r["role_id"]) for r in rows)
+            # Without shared the local copy is newer than the table until it's flushed.
+            live = any(r["is_live"] for r in rows)
+            if self.shared and (broadcaster_id in self.live) != live:
+                if live:
+                    self.live.add(broadcaster_id)
+                else:
+                    self.live.discard(broadcaster_id)
+                self._changed_at[broadcaster_id] = time.monotonic()
+        else:
+            self.routes.pop(broadcaster_id, None)
+            self.live.discard(broadcaster_id)
@@ -0,0 +1,167 @@
+"""
+    Opt-in sharding. With SHARD_COUNT unset the bot is a plain single-connection
+    commands.Bot as before; "auto" lets Discord pick the shard count and runs every
+    shard in this process, and a number (optionally with SHARD_IDS) splits shards
+    across processes. Guild-scoped jobs use owns_guild() to skip guilds another
+    process is connected to. Go-live pings go out over REST, which works for any
+    channel, so they aren't filtered by shard.
+"""
+import asyncio
+import math
+import time
+from discord.ext import commands
+from handlers.logger import logger
+from helpers import metrics
+from helpers.constants import (
+    SHARD_COUNT,
+    SHARD_IDS,
+    SHARD_METRICS_INTERVAL
+)
+
+def is_sharded() -> bool:
+    return SHARD_COUNT != ""
+
+def bot_class():
+    return commands.AutoShardedBot if is_sharded() else commands.Bot
+
+def bot_options() -> dict:
+    if not is_sharded():
+        if SHARD_IDS:
+            raise ValueError("SHARD_IDS requires SHARD_COUNT to be set to the total number of shards")
+        return {}
+    # "auto" leaves shard_count as None so discord.py asks the gateway for it.
+    options = {"shard_count": None if SHARD_COUNT == "auto" else int(SHARD_COUNT)}
+    if SHARD_IDS:
+        # AutoShardedBot refuses shard_ids without a shard_count, and the split has to be fixed
+        # anyway for every process to agree on which guilds it owns.
+        if options["shard_count"] is None:
+            raise ValueError("SHARD_IDS requires a numeric SHARD_COUNT, not \"auto\"")
+        invalid = [shard_id for shard_id in SHARD_IDS if not 0 <= shard_id < options["shard_count"]]
+        if invalid:
+            raise ValueError(f"SHARD_IDS {invalid} out of range for SHARD_COUNT={options['shard_count']}")
+        options["shard_ids"] = SHARD_IDS
+    return options
+
+def shard_group() -> int:
+    """Lowest shard this process runs; processes with the same group are replicas of each other."""
+    return SHARD_IDS[0] if SHARD_IDS else 0
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+def owns_guild(bot, guild_id: int) -> bool:
+    shard_count = getattr(bot, "shard_count", None)
+    if not shard_count or shard_count == 1:
+        return True
+    shard_ids = getattr(bot, "shard_ids", None)
+    # AutoShardedBot without SHARD_IDS runs every shard.
+    if shard_ids is None:
+        return True
+    return shard_for(guild_id, shard_count) in shard_ids
+
+class ShardStats:
+    __slots__ = ("shard_id", "latency", "events_per_second", "guilds", "disconnects")
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.latency = float("nan")
+        self.events_per_second = 0.0
+        self.guilds = 0
+        self.disconnects = 0
+
+class ShardMetrics:
+    """
+        Per-shard gateway latency, dispatch event rate, guild count and disconnects,
+        sampled every SHARD_METRICS_INTERVAL seconds. The event rate comes from each
+        shard's gateway sequence number, which goes up by one per dispatched event.
+    """
+    def __init__(self, bot, interval: float = SHARD_METRICS_INTERVAL):
+        self.bot = bot
+        self.interval = interval
+        self.shards = {}
+        self._sequences = {}
+        self._sampled_at = None
+        self._task = None
+        bot.add_listener(self.on_shard_disconnect, name="on_shard_disconnect")
+        bot.add_listener(self.on_disconnect, name="on_disconnect")
+        metrics.add_collector(self.collect)
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _stats(self, shard_id: int) -> ShardStats:
+        stats = self.shards.get(shard_id)
+        if stats is None:
+            stats = self.shards[shard_id] = ShardStats(shard_id)
+        return stats
+
+    async def on_shard_disconnect(self, shard_id: int):
+        self._stats(shard_id).disconnects += 1
+
+    async def on_disconnect(self):
+        # Sharded clients dispatch on_shard_disconnect as well; only count this one for a single connection.
+        if not is_sharded():
+            self._stats(0).disconnects += 1
+
+    def _connections(self):
+        """(shard id, websocket) for every shard this process runs."""
+        if is_sharded():
+            # ShardInfo only exposes the websocket through its parent Shard.
+            return [(shard_id, info._parent.ws) for shard_id, info in self.bot.shards.items()]
+        return [(0, self.bot.ws)]
+
+    def sample(self) -> dict:
+        now = time.monotonic()
+        elapsed = now - self._sampled_at if self._sampled_at is not None else None
+        self._sampled_at = now
+
+        guilds = {}
+        for guild in self.bot.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+        for shard_id, ws in self._connections():
+            stats = self._stats(shard_id)
+            stats.guilds = guilds.get(shard_id, 0)
+            if ws is None:
+                continue
+            stats.latency = ws.latency
+            sequence = ws.sequence or 0
+            previous = self._sequences.get(shard_id)
+            self._sequences[shard_id] = sequence
+            if elapsed and previous is not None:
+                # A new session restarts the sequence from zero.
+                delta = sequence - previous if sequence >= previous else sequence
+                stats.events_per_second = delta / elapsed
+        return self.shards
+
+    def collect(self):
+        """Values for /metrics; latency is read live, the event rate is from the last sample."""
+        latency = {shard_id: ws.latency for shard_id, ws in self._connections() if ws is not None}
+        shards = self.shards.values()
+        return [
+            ("shard_latency_seconds", "gauge", "Gateway heartbeat latency", [({"shard": s}, l) for s, l in latency.items() if math.isfinite(l)]),
+            ("shard_events_per_second", "gauge", "Gateway dispatch events per second over the last sample", [({"shard": s.shard_id}, s.events_per_second) for s in shards]),
+            ("shard_guilds", "gauge", "Guilds on the shard", [({"shard": s.shard_id}, s.guilds) for s in shards]),
+            ("shard_disconnects_total", "counter", "Gateway disconnects", [({"shard": s.shard_id}, s.disconnects) for s in shards]),
+        ]
+
+    async def _loop(self):
+        await self.bot.wait_until_ready()
+        self.sample()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                for stats in self.sample().values():
+                    logger.info(
+                        f"Shard {stats.shard_id}: latency {stats.latency * 1000:.0f} ms, "
+                        f"{stats.events_per_second:.2f} events/s, {stats.guilds} guilds, "
+                        f"{stats.disconnects} disconnects"
+                    )
+            except Exception:
+                logger.exception("Failed to report shard metrics")
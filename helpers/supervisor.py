@@ -0,0 +1,96 @@
+import asyncio
+import time
+from handlers.logger import logger
+from helpers.constants import (
+    SUPERVISOR_MAX_IN_FLIGHT,
+    SUPERVISOR_QUEUE_SIZE
+)
+
+class TaskStats:
+    __slots__ = ("count", "failed", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float, failed: bool):
+        self.count += 1
+        self.failed += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+class TaskSupervisor:
+    """
+        Owns the bot's background work. Jobs wait in a bounded queue and at most
+        `max_in_flight` run at once; submit() blocks while the queue is full, which
+        pushes back on whatever is producing events.
+    """
+    def __init__(self, max_in_flight: int = SUPERVISOR_MAX_IN_FLIGHT, queue_size: int = SUPERVISOR_QUEUE_SIZE):
+        self.max_in_flight = max_in_flight
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.stats = {}
+        self.in_flight = 0
+        self._workers = []
+        self._closing = False
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_in_flight)]
+        logger.info(f"Task supervisor started ({self.max_in_flight} in flight, queue of {self.queue.maxsize})")
+
+    async def submit(self, name: str, func, *args) -> asyncio.Future:
+        """
+            Queue `func(*args)` to run in the background. `func` must be an async function.
+            Returns a future that resolves to whether it ran successfully.
+        """
+        done = asyncio.get_running_loop().create_future()
+        if self._closing:
+            logger.warning(f"Task supervisor is shutting down, dropping {name}")
+            done.set_result(False)
+            return done
+        if self.queue.full():
+            logger.warning(f"Task supervisor queue is full ({self.queue.qsize()}), waiting to queue {name}")
+        await self.queue.put((name, func, args, done))
+        return done
+
+    async def join(self):
+        """Wait until everything queued so far has finished."""
+        await self.queue.join()
+
+    async def drain(self, timeout: float = 30):
+        """Stop accepting work, let queued and running jobs finish, then stop the workers."""
+        self._closing = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Task supervisor drain timed out with {self.queue.qsize()} queued and {self.in_flight} running")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for name, stats in self.stats.items():
+            logger.info(
+                f"Task {name}: {stats.count} run, {stats.failed} failed, "
+                f"avg {stats.total / stats.count * 1000:.1f} ms, max {stats.max * 1000:.1f} ms"
+            )
+
+    async def _worker(self):
+        while True:
+            name, func, args, done = await self.queue.get()
+            self.in_flight += 1
+            start = time.perf_counter()
+            failed = False
+            try:
+                await func(*args)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                failed = True
+                logger.exception(f"Background task {name} failed")
+            finally:
+                self.in_flight -= 1
+                self.stats.setdefault(name, TaskStats()).add(time.perf_counter() - start, failed)
+                self.queue.task_done()
+            if not done.done():
+                done.set_result(not failed)
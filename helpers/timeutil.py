@@ -0,0 +1,38 @@
+"""
+    Shared time zone handling. The IANA zone list is scanned once, ZoneInfo objects are
+    memoized by name, and "now" is always an aware UTC datetime.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+UTC = timezone.utc
+
+@lru_cache(maxsize=1)
+def all_timezones() -> frozenset[str]:
+    # available_timezones() walks the tz database on every call. Some tzdata builds
+    # also ship a stray build/etc/localtime, which isn't a zone anyone should pick.
+    return frozenset(name for name in available_timezones() if not name.endswith("localtime"))
+
+@lru_cache(maxsize=1)
+def sorted_timezones() -> tuple[tuple[str, str], ...]:
+    """(name, lowercased name) pairs in display order, for autocomplete."""
+    return tuple((name, name.lower()) for name in sorted(all_timezones()))
+
+def is_valid_timezone(name: str) -> bool:
+    return name in all_timezones()
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo | None:
+    """Memoized ZoneInfo lookup; returns None for unknown names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def utcnow() -> datetime:
+    return datetime.now(UTC)
+
+def to_local(dt: datetime, name: str) -> datetime:
+    """Convert an aware datetime to the named zone, falling back to UTC."""
+    return dt.astimezone(get_zone(name) or UTC)
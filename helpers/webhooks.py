@@ -0,0 +1,119 @@
+import asyncio
+import re
+import aiohttp
+import discord
+from handlers.logger import logger
+from helpers.constants import (
+    WEBHOOK_NAME,
+    WEBHOOK_POOL_SIZE
+)
+
+ROLE_MENTION = re.compile(r"<@&(\d+)>")
+ALLOWED_MENTIONS = discord.AllowedMentions(everyone=False, users=False, roles=True)
+
+class WebhookDelivery:
+    """
+        Sends notifications through a per-channel webhook instead of the bot user.
+        Webhook executes have their own rate limit buckets and go out on a separate
+        pooled session, so big go-live fan-outs don't queue behind (or ahead of)
+        interaction responses. send() returns False whenever the caller should fall
+        back to channel.send.
+    """
+    def __init__(self, bot: discord.Client, pool_size: int = WEBHOOK_POOL_SIZE):
+        self.bot = bot
+        self.pool_size = pool_size
+        self._session = None
+        self._webhooks = {}  # channel id -> partial Webhook bound to our session
+        self._unavailable = {}  # channel id -> guild id, for channels where we can't manage webhooks
+        self._pending = {}
+        self.sent = 0
+        self.fallbacks = 0
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        logger.info(f"Webhook delivery enabled ({self.pool_size} connections)")
+
+    async def stop(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def send(self, channel, content: str, embed: discord.Embed) -> bool:
+        # Webhooks can only ping roles that are mentionable; the bot user may be allowed more.
+        # With shards split across processes the channel may be fetched over REST
+        # with no cached guild behind it; the bot user can still send there.
+        guild = getattr(channel, "guild", None)
+        if not hasattr(guild, "get_role"):
+            return self._fallback()
+        for role_id in ROLE_MENTION.findall(content or ""):
+            role = guild.get_role(int(role_id))
+            if role is not None and not role.mentionable:
+                return self._fallback()
+
+        webhook = await self._get(channel)
+        if webhook is None:
+            return self._fallback()
+        me = self.bot.user
+        try:
+            await webhook.send(
+                content=content,
+                embed=embed,
+                username=me.display_name if me else WEBHOOK_NAME,
+                avatar_url=me.display_avatar.url if me else None,
+                allowed_mentions=ALLOWED_MENTIONS
+            )
+        except discord.NotFound:
+            # Someone deleted the webhook; make a new one next time.
+            self._webhooks.pop(channel.id, None)
+            return self._fallback()
+        except discord.HTTPException as e:
+            logger.warning(f"Webhook send to channel {channel.id} failed, falling back to the bot: {e}")
+            return self._fallback()
+        self.sent += 1
+        return True
+
+    # Permissions may have changed while the guild was away, so look its channels up again.
+    async def on_guild_available(self, guild: discord.Guild):
+        self._forget_guild(guild.id)
+
+    async def on_guild_join(self, guild: discord.Guild):
+        self._forget_guild(guild.id)
+
+    def _forget_guild(self, guild_id: int):
+        for channel_id in [c for c, g in self._unavailable.items() if g == guild_id]:
+            del self._unavailable[channel_id]
+
+    def _fallback(self) -> bool:
+        self.fallbacks += 1
+        return False
+
+    async def _get(self, channel):
+        webhook = self._webhooks.get(channel.id)
+        if webhook is not None or channel.id in self._unavailable or self._session is None:
+            return webhook
+        if not hasattr(channel, "webhooks"):
+            self._unavailable[channel.id] = channel.guild.id
+            return None
+        # One lookup per channel even when a fan-out hits it many times at once.
+        task = self._pending.get(channel.id)
+        if task is None:
+            task = self._pending[channel.id] = asyncio.create_task(self._resolve(channel))
+            task.add_done_callback(lambda _: self._pending.pop(channel.id, None))
+        return await asyncio.shield(task)
+
+    async def _resolve(self, channel):
+        try:
+            existing = await channel.webhooks()
+            webhook = next((w for w in existing if w.name == WEBHOOK_NAME and w.token and w.user == self.bot.user), None)
+            if webhook is None:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME, reason="Live notifications")
+                logger.info(f"Created notification webhook in channel {channel.id}")
+        except discord.Forbidden:
+            logger.warning(f"Missing Manage Webhooks in channel {channel.id}, notifications there will use the bot")
+            self._unavailable[channel.id] = channel.guild.id
+            return None
+        except discord.HTTPException as e:
+            logger.warning(f"Could not set up a webhook in channel {channel.id}: {e}")
+            return None
+        self._webhooks[channel.id] = discord.Webhook.partial(webhook.id, webhook.token, session=self._session)
+        return self._webhooks[channel.id]
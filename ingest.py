@@ -0,0 +1,58 @@
+"""
+    Standalone EventSub ingest: verifies and acks Twitch webhooks, stores each
+    notification in eventsub_events and NOTIFYs the worker. No Discord connection,
+    so it can be restarted or scaled separately from the bot.
+
+    Run with `python ingest.py`, and the bot with `python worker.py` (the same as
+    main.py with EVENTSUB_MODE=relay). PUBLIC_URL must point at this process; the
+    worker still owns the Twitch subscriptions.
+"""
+import asyncio
+import os
+import signal
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from handlers.logger import logger
+from psql import (
+    init_pool,
+    close_pool
+)
+from helpers.eventsub import EventSubReceiver
+from helpers import eventrelay
+from helpers.constants import (
+    TWITCH_WEBHOOK_SECRET,
+    PUBLIC_URL
+)
+
+async def main():
+    if not TWITCH_WEBHOOK_SECRET:
+        logger.error("TWITCH_WEBHOOK_SECRET not found in environment variables!")
+        raise ValueError("TWITCH_WEBHOOK_SECRET is required")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await init_pool()
+    receiver = EventSubReceiver(
+        twitch=None,
+        callback_url=PUBLIC_URL or "",
+        secret=TWITCH_WEBHOOK_SECRET,
+        port=int(os.getenv('PORT', 8080)),
+        sink=eventrelay.store
+    )
+    try:
+        await receiver.start()
+        logger.info("EventSub ingest running")
+        await stop.wait()
+        logger.info("Received shutdown signal, shutting down...")
+    finally:
+        await receiver.stop()
+        await close_pool()
+        logger.info("Shutdown complete.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,8 @@
+# Must come first so the startup profiler (STARTUP_PROFILE=true) can time every other import
+import helpers.profiler as profiler
+profiler.install()
+
 # Import from libraries
-from twitchAPI.helper import first
 import discord, asyncio
 from discord import app_commands
 from discord.ext import commands, tasks
@@ -9,36 +12,51 @@ from dotenv import load_dotenv
 import helpers.constants as constants
 from handlers.logger import logger
 from psql import (
-    init_pool,
     close_pool
 )
 from helpers.helpers import (
     setup,
+    on_guild_ready
 )
+from helpers.commandsync import sync_commands
+import helpers.sharding as sharding
+from helpers.members import member_cache_options
 from helpers.constants import (
     is_whitelisted,
+    get_emoji,
     DISCORD_TOKEN
 )
 
 load_dotenv()
+profiler.mark("imports done")
 
 """
     I know I can use discord webhook in the discord developer portal but at that point it was a sunk cost...
+    Go-live pings can go out through channel webhooks now, see NOTIFY_DELIVERY and helpers/webhooks.py.
 """
 
 intents = discord.Intents.default()
 intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+# commands.Bot unless SHARD_COUNT is set, see helpers/sharding.py; member caching per helpers/members.py
+bot = sharding.bot_class()(command_prefix="!", intents=intents, **sharding.bot_options(), **member_cache_options())
 tree = bot.tree
 
-# startup
+# startup, runs once per process
 @bot.event
-async def on_ready():
-    await setup(bot)
-    await load_cogs()
+async def setup_hook():
+    profiler.mark("logged in")
+    with profiler.phase("setup_hook"):
+        await setup(bot, load_cogs)
+        with profiler.phase("command sync"):
+            await sync_commands(tree)
 
+# runs again on every reconnect
+@bot.event
+async def on_ready():
+    await on_guild_ready(bot)
     logger.info(f"Logged in as {bot.user}")
-    await tree.sync()
+    profiler.mark("ready")
+    profiler.log_report()
         
 # About
 @tree.command(name="about", description="About the bot.")
@@ -46,12 +64,11 @@ async def on_ready():
 async def about(interaction: discord.Interaction):
     await interaction.response.defer()
     try:
-        cocoasguild = constants.get_cocoasguild()
-        streamEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLicense") if cocoasguild else ''
-        personEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaLove") if cocoasguild else ''
-        shyEmoji = discord.utils.get(cocoasguild.emojis, name="cocoaShy") if cocoasguild else ''
-        bonk = discord.utils.get(cocoasguild.emojis, name="cocoaBonk") if cocoasguild else ''
-        mwah = discord.utils.get(cocoasguild.emojis, name="cocoaMwah") if cocoasguild else ''
+        streamEmoji = get_emoji("cocoaLicense")
+        personEmoji = get_emoji("cocoaLove")
+        shyEmoji = get_emoji("cocoaShy")
+        bonk = get_emoji("cocoaBonk")
+        mwah = get_emoji("cocoaMwah")
         
         embed = discord.Embed(
             title=f"{streamEmoji} About Cocoabot",
@@ -114,6 +131,9 @@ async def about(interaction: discord.Interaction):
         logger.exception("About failed")
         await interaction.followup.send(f"❌ About failed: `{str(e)}`", ephemeral=True)
 
+# Every cog loads eagerly since its commands have to be on the tree before sync_commands.
+# Their rarely used dependencies (CSV import/export, the tests' Twitch helpers) are imported
+# inside the commands instead; run with STARTUP_PROFILE=true to see what each module costs.
 async def load_cogs():
     await bot.load_extension("handlers.twitch")
     await bot.load_extension("handlers.timezone")
@@ -123,13 +143,33 @@ async def load_cogs():
 
 async def main():
     try:
-        await init_pool()
         await bot.start(DISCORD_TOKEN)
     except KeyboardInterrupt:
         logger.info("Received SIGINT or KeyboardInterrupt, shutting down...")
     except Exception as e:
         logger.exception("Error starting bot")
     finally:
+        # Step down first so a standby can take over the singleton jobs straight away
+        if constants.get_leader():
+            await constants.get_leader().stop()
+        if constants.get_relay():
+            await constants.get_relay().stop()
+        if constants.get_eventsub():
+            await constants.get_eventsub().stop()
+        if constants.get_supervisor():
+            await constants.get_supervisor().drain()
+        if constants.get_reconciler():
+            await constants.get_reconciler().stop()
+        if constants.get_live_status():
+            await constants.get_live_status().stop()
+        if constants.get_outbox():
+            await constants.get_outbox().stop()
+        if constants.get_webhooks():
+            await constants.get_webhooks().stop()
+        if constants.get_routing():
+            await constants.get_routing().stop()
+        if constants.get_shard_metrics():
+            await constants.get_shard_metrics().stop()
         await close_pool()
         logger.info("Shutdown complete.")
 
@@ -1,9 +1,14 @@
 import asyncpg
 import os
 from handlers.logger import logger
+from helpers import metrics
 
 _pool = None
 
+async def init_connection(conn):
+    # Query timings for /metrics
+    conn.add_query_logger(metrics.on_query)
+
 async def init_pool():
     global _pool
     if _pool is None:
@@ -11,12 +16,20 @@ async def init_pool():
             dsn=os.getenv("DATABASE_URL"),
             min_size=1,
             max_size=10,
-            command_timeout=60
+            command_timeout=60,
+            init=init_connection
         )
         logger.info("PostgreSQL connection pool initialized.")
     
     async with _pool.acquire() as conn:
-        await conn.execute("""
+        await migrate(conn)
+
+# Ordered schema migrations. Each entry is (version, description, statements).
+# Only ever append to this list, never edit an entry that has already shipped.
+# Statements should stay idempotent so a partially migrated database can re-run them.
+MIGRATIONS = [
+    (1, "baseline tables", [
+        """
             CREATE TABLE IF NOT EXISTS notification (
                 broadcaster_id TEXT,
                 twitch_name TEXT NOT NULL,
@@ -27,17 +40,15 @@ async def init_pool():
                 is_live BOOLEAN NOT NULL DEFAULT FALSE,
                 PRIMARY KEY (broadcaster_id, guild_id)
             )
-        """)
-        logger.info("Notification table checked/created.")
-        await conn.execute("""
+        """,
+        """
             CREATE TABLE IF NOT EXISTS birthday_guild (
                 guild_id BIGINT PRIMARY KEY,
                 channel_id BIGINT NOT NULL,
                 role_id BIGINT NULL
             )
-        """)
-        logger.info("Birthday Guild table checked/created.")
-        await conn.execute("""
+        """,
+        """
             CREATE TABLE IF NOT EXISTS birthday_user (
                 guild_id BIGINT NOT NULL,
                 user_id BIGINT NOT NULL,
@@ -46,24 +57,140 @@ async def init_pool():
                 last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 PRIMARY KEY (guild_id, user_id)
             )
-        """)
-        logger.info("Birthday User table checked/created.")
-        await conn.execute("""
+        """,
+        """
             CREATE TABLE IF NOT EXISTS user_timezone (
                 user_id BIGINT PRIMARY KEY,
                 timezone TEXT NOT NULL
             )
-        """)
-        logger.info("User timezone table checked/created.")
-        await conn.execute("""
+        """,
+        """
             CREATE TABLE IF NOT EXISTS twitch_tokens (
                 discord_user_id BIGINT PRIMARY KEY,
                 access_token TEXT NOT NULL,
                 refresh_token TEXT NOT NULL,
                 expires_at TIMESTAMP NOT NULL
             )
+        """
+    ]),
+    (2, "birthday_user guild/birthdate index", [
+        """
+            CREATE INDEX IF NOT EXISTS birthday_user_guild_birthdate_idx
+            ON birthday_user (guild_id, birthdate)
+        """
+    ]),
+    (3, "notification guild and fan-out indexes", [
+        # /liststreamers, /alert and the streamer autocomplete filter on guild_id alone.
+        """
+            CREATE INDEX IF NOT EXISTS notification_guild_id_idx
+            ON notification (guild_id)
+        """,
+        # Lets the go-live fan-out read channel/role/is_live from the index without touching the heap.
+        """
+            CREATE INDEX IF NOT EXISTS notification_broadcaster_fanout_idx
+            ON notification (broadcaster_id) INCLUDE (channel_id, role_id, is_live)
+        """
+    ]),
+    (4, "notification outbox", [
+        # Go-live pings waiting to be sent. Rows are deleted once delivered; rows that
+        # can never be delivered are kept with dead = TRUE for inspection.
+        """
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id BIGSERIAL PRIMARY KEY,
+                broadcaster_id TEXT NOT NULL,
+                channel_id BIGINT NOT NULL,
+                content TEXT NOT NULL,
+                embed JSONB NOT NULL,
+                attempts INT NOT NULL DEFAULT 0,
+                dead BOOLEAN NOT NULL DEFAULT FALSE,
+                last_error TEXT NULL,
+                available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """,
+        """
+            CREATE INDEX IF NOT EXISTS notification_outbox_available_idx
+            ON notification_outbox (available_at, id) WHERE NOT dead
+        """
+    ]),
+    (5, "bot_meta key/value table", [
+        # Small bits of process-wide state, e.g. the hash of the last synced command tree.
+        """
+            CREATE TABLE IF NOT EXISTS bot_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+    ]),
+    (6, "eventsub_events handoff table", [
+        # Written by ingest.py, drained by the worker; the unique message id drops
+        # Twitch redeliveries even across several ingest processes.
+        """
+            CREATE TABLE IF NOT EXISTS eventsub_events (
+                id BIGSERIAL PRIMARY KEY,
+                message_id TEXT NOT NULL UNIQUE,
+                sub_type TEXT NOT NULL,
+                payload JSONB NOT NULL,
+                received_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """
+    ]),
+    (7, "eventsub_events leases", [
+        # Rows are leased to a worker and only deleted once handled, like notification_outbox.
+        "ALTER TABLE eventsub_events ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0",
+        "ALTER TABLE eventsub_events ADD COLUMN IF NOT EXISTS available_at TIMESTAMPTZ NOT NULL DEFAULT now()",
+    ]),
+    (8, "birthday_guild channel can be cleared", [
+        # Set to NULL when the channel is deleted, keeping the role until setup is run again.
+        "ALTER TABLE birthday_guild ALTER COLUMN channel_id DROP NOT NULL",
+    ]),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Arbitrary key for pg_advisory_lock so two instances booting at once don't migrate concurrently.
+MIGRATION_LOCK_ID = 507_026
+
+async def get_schema_version(conn):
+    try:
+        version = await conn.fetchval("SELECT MAX(version) FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return 0
+    return version or 0
+
+async def migrate(conn):
+    # Fast path: a single query and no DDL when the schema is already current.
+    current = await get_schema_version(conn)
+    if current >= SCHEMA_VERSION:
+        logger.info(f"Database schema is up to date (version {current}).")
+        return
+
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
         """)
-        logger.info("Twitch token table checked/created.")
+        # Another instance may have migrated while we were waiting on the lock.
+        current = await get_schema_version(conn)
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            async with conn.transaction():
+                for statement in statements:
+                    await conn.execute(statement)
+                await conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES ($1, $2)",
+                    version,
+                    description
+                )
+            logger.info(f"Applied migration {version}: {description}")
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+    logger.info(f"Database schema migrated from version {current} to {SCHEMA_VERSION}.")
 
 def get_pool():
     if _pool is None:
@@ -0,0 +1,13 @@
+"""
+    The bot without its own EventSub webhook: events stored by ingest.py are taken
+    from Postgres (LISTEN eventsub_events) and handled exactly as in main.py.
+"""
+import os
+
+os.environ.setdefault("EVENTSUB_MODE", "relay")
+
+import asyncio
+import main
+
+if __name__ == "__main__":
+    asyncio.run(main.main())